@@ -23,6 +23,20 @@ python generate_metadata.py
 echo "Copying plugin files..."
 cp -r virtughan_qgis/* "$BUILD_DIR/$PLUGIN_NAME/"
 
+if [ -d "$BUILD_DIR/$PLUGIN_NAME/wheelhouse" ]; then
+    echo "Writing wheelhouse manifest..."
+    python - "$BUILD_DIR/$PLUGIN_NAME/wheelhouse" <<'EOF'
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+wheelhouse = Path(sys.argv[1])
+wheels = {p.name: hashlib.sha256(p.read_bytes()).hexdigest() for p in sorted(wheelhouse.glob("*.whl"))}
+(wheelhouse / "wheelhouse.manifest.json").write_text(json.dumps({"wheels": wheels}, indent=2) + "\n")
+EOF
+fi
+
 echo "Copying license and documentation..."
 cp LICENSE.txt "$BUILD_DIR/$PLUGIN_NAME/"
 
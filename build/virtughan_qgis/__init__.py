@@ -0,0 +1,3 @@
+def classFactory(iface):
+    from .main_plugin import VirtuGhanPlugin
+    return VirtuGhanPlugin(iface)
@@ -0,0 +1,459 @@
+# virtughan_qgis/bootstrap.py
+import base64
+import csv
+import hashlib
+import importlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import sysconfig
+import zipfile
+
+from qgis.core import Qgis, QgsMessageLog
+from qgis.PyQt.QtCore import QEventLoop, QProcess, Qt, QTimer
+from qgis.PyQt.QtWidgets import (
+    QDialog,
+    QMessageBox,
+    QProgressDialog,
+    QPushButton,
+    QTextEdit,
+    QVBoxLayout,
+)
+
+PKG_NAME = "virtughan"
+_INSTALL_TIMEOUT = 120
+
+PLUGIN_DIR = os.path.dirname(__file__)
+LIBS_DIR = os.path.join(PLUGIN_DIR, "libs")
+WHEELHOUSE = os.path.join(PLUGIN_DIR, "wheelhouse")
+WHEELHOUSE_MANIFEST = os.path.join(WHEELHOUSE, "wheelhouse.manifest.json")
+
+_installed = False
+
+
+def _log(msg, level=Qgis.Info):
+    QgsMessageLog.logMessage(f"VirtuGhan Bootstrap: {msg}", "VirtuGhan", level)
+
+
+def check_dependencies():
+    # find_spec only walks the finders; importing virtughan here would pull in
+    # its whole rasterio/numpy tree on every QGIS start.
+    try:
+        found = importlib.util.find_spec(PKG_NAME) is not None
+    except (ImportError, ValueError):
+        found = False
+
+    if found:
+        _log("VirtuGhan package found")
+    else:
+        _log("VirtuGhan package not found", Qgis.Warning)
+    return found
+
+
+def _sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _wheel_record_ok(zf):
+    """Verify every member listed in the wheel's RECORD against its sha256."""
+    record = next((n for n in zf.namelist() if n.endswith(".dist-info/RECORD")), None)
+    if record is None:
+        return False
+    with zf.open(record) as raw:
+        for row in csv.reader(io.TextIOWrapper(raw, encoding="utf-8")):
+            if len(row) < 2 or not row[1]:
+                continue
+            algo, _, expected = row[1].partition("=")
+            if algo != "sha256":
+                return False
+            digest = base64.urlsafe_b64encode(hashlib.sha256(zf.read(row[0])).digest())
+            if digest.rstrip(b"=").decode("ascii") != expected:
+                return False
+    return True
+
+
+def _install_from_wheelhouse_direct():
+    """
+    Unpack the bundled wheelhouse straight into LIBS_DIR, skipping pip.
+    Only used when the wheels match wheelhouse.manifest.json written by build.sh.
+    """
+    if not os.path.isfile(WHEELHOUSE_MANIFEST):
+        return False
+
+    try:
+        with open(WHEELHOUSE_MANIFEST, "r", encoding="utf-8") as f:
+            expected = json.load(f).get("wheels", {})
+        present = sorted(fn for fn in os.listdir(WHEELHOUSE) if fn.endswith(".whl"))
+        if not expected or present != sorted(expected):
+            _log("Wheelhouse does not match its manifest; falling back to pip", Qgis.Warning)
+            return False
+
+        for fn in present:
+            if _sha256_file(os.path.join(WHEELHOUSE, fn)) != expected[fn]:
+                _log(f"Wheel hash mismatch: {fn}; falling back to pip", Qgis.Warning)
+                return False
+
+        os.makedirs(LIBS_DIR, exist_ok=True)
+        for fn in present:
+            with zipfile.ZipFile(os.path.join(WHEELHOUSE, fn)) as zf:
+                if not _wheel_record_ok(zf):
+                    _log(f"RECORD verification failed for {fn}; falling back to pip", Qgis.Warning)
+                    return False
+                zf.extractall(LIBS_DIR)
+    except Exception as e:
+        _log(f"Wheelhouse install failed: {str(e)}", Qgis.Warning)
+        return False
+
+    if LIBS_DIR not in sys.path:
+        sys.path.insert(0, LIBS_DIR)
+    importlib.invalidate_caches()
+    _log(f"Installed bundled wheels into {LIBS_DIR}")
+    return check_dependencies()
+
+
+def _get_safe_python_executable():
+    if hasattr(sys, "real_prefix") or (
+        hasattr(sys, "base_prefix") and sys.base_prefix != sys.prefix
+    ):
+        _log("Running in virtual environment")
+        return sys.executable
+
+    candidates = [sys.executable, "python", "python3"]
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate):
+            return candidate
+
+    return "python"
+
+
+def _is_externally_managed():
+    """True when the interpreter is marked EXTERNALLY-MANAGED (PEP 668)."""
+    try:
+        stdlib = sysconfig.get_paths()["stdlib"]
+        return os.path.isfile(os.path.join(stdlib, "EXTERNALLY-MANAGED"))
+    except Exception:
+        return False
+
+
+def _pip_module_available(python_exe, popen_kwargs):
+    try:
+        result = subprocess.run(
+            [python_exe, "-m", "pip", "--version"],
+            capture_output=True,
+            text=True,
+            timeout=30,
+            **popen_kwargs,
+        )
+        return result.returncode == 0
+    except Exception:
+        return False
+
+
+def _viable_install_commands(install_commands, python_exe, popen_kwargs):
+    """Drop candidates that cannot work here so they are not raced for nothing."""
+    on_path = [cmd for cmd in install_commands if shutil.which(cmd[0])]
+    has_pip_module = _pip_module_available(python_exe, popen_kwargs)
+    externally_managed = _is_externally_managed()
+
+    viable = []
+    for cmd in on_path:
+        uses_pip_module = cmd[0] == python_exe
+        if uses_pip_module != has_pip_module:
+            # bare pip/pip3 are only a fallback for a missing `python -m pip`
+            continue
+        if "--break-system-packages" in cmd and not externally_managed:
+            continue
+        viable.append(cmd)
+
+    return viable or on_path or install_commands
+
+
+def _install_commands(python_exe, is_windows):
+    if is_windows:
+        return [
+            [python_exe, "-m", "pip", "install", "virtughan", "--user"],
+            ["pip", "install", "virtughan", "--user"],
+            [python_exe, "-m", "pip", "install", "virtughan"],
+        ]
+    return [
+        [
+            python_exe,
+            "-m",
+            "pip",
+            "install",
+            "virtughan",
+            "--break-system-packages",
+        ],
+        [python_exe, "-m", "pip", "install", "virtughan", "--user"],
+        ["pip3", "install", "virtughan", "--break-system-packages"],
+        ["pip", "install", "virtughan", "--user"],
+    ]
+
+
+def _popen_kwargs(is_windows):
+    if is_windows:
+        return {
+            "cwd": os.path.expanduser("~"),
+            "shell": True,
+            "creationflags": subprocess.CREATE_NO_WINDOW,
+        }
+    # Run from ~ so `python -m pip` doesn't put QGIS's working directory first
+    # on sys.path, where it could shadow pip's own imports.
+    return {"cwd": os.path.expanduser("~")}
+
+
+def _try_install_virtughan():
+    is_windows = platform.system() == "Windows"
+    python_exe = _get_safe_python_executable()
+
+    _log(f"Platform: {platform.system()}")
+    _log(f"Python executable: {python_exe}")
+
+    popen_kwargs = _popen_kwargs(is_windows)
+    viable = _viable_install_commands(
+        _install_commands(python_exe, is_windows), python_exe, popen_kwargs
+    )
+
+    # Installs run one after another: concurrent pips writing the same
+    # site-packages (and terminating the losers mid-install) can corrupt it.
+    for i, cmd in enumerate(viable):
+        _log(f"Trying installation method {i + 1}: {' '.join(cmd[:4])}")
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                **popen_kwargs,
+            )
+            try:
+                proc.communicate(timeout=_INSTALL_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.communicate()
+                _log(f"Method {i + 1} timed out")
+                continue
+        except FileNotFoundError:
+            _log(f"Method {i + 1} failed: command not found")
+            continue
+        except Exception as e:
+            _log(f"Method {i + 1} failed with exception: {str(e)}")
+            continue
+
+        if proc.returncode == 0:
+            _log(f"Installation successful with method {i + 1}")
+            return True, None
+        _log(f"Method {i + 1} failed with return code {proc.returncode}")
+
+    return False, "All installation methods failed"
+
+
+def _run_in_qprocess(cmd, parent, dialog):
+    """Run one install command on the Qt event loop; True on exit code 0."""
+    proc = QProcess(parent)
+    proc.setProcessChannelMode(QProcess.MergedChannels)
+    proc.setWorkingDirectory(os.path.expanduser("~"))
+
+    loop = QEventLoop()
+    timeout = QTimer()
+    timeout.setSingleShot(True)
+    timeout.timeout.connect(proc.kill)
+
+    def _on_output():
+        text = bytes(proc.readAllStandardOutput()).decode("utf-8", errors="replace")
+        lines = [ln for ln in text.splitlines() if ln.strip()]
+        for ln in lines:
+            _log(ln)
+        if lines and dialog is not None:
+            dialog.setLabelText(lines[-1][:120])
+
+    def _on_error(err):
+        if err == QProcess.FailedToStart:
+            loop.quit()
+
+    proc.readyReadStandardOutput.connect(_on_output)
+    proc.finished.connect(lambda *_: loop.quit())
+    proc.errorOccurred.connect(_on_error)
+
+    proc.start(cmd[0], cmd[1:])
+    timeout.start(_INSTALL_TIMEOUT * 1000)
+    if proc.state() != QProcess.NotRunning:
+        loop.exec_()
+    timeout.stop()
+
+    ok = proc.exitStatus() == QProcess.NormalExit and proc.exitCode() == 0
+    if not ok:
+        _log(f"Installation exited with code {proc.exitCode()}: {proc.errorString()}", Qgis.Warning)
+    proc.deleteLater()
+    return ok
+
+
+def _install_with_progress_dialog(parent):
+    """
+    Run the pip install through QProcess so the Qt event loop keeps pumping:
+    the progress dialog animates and pip output streams into its label.
+    Viable commands are tried in order until one exits with code 0.
+    """
+    is_windows = platform.system() == "Windows"
+    python_exe = _get_safe_python_executable()
+    viable = _viable_install_commands(
+        _install_commands(python_exe, is_windows), python_exe, _popen_kwargs(is_windows)
+    )
+
+    dialog = QProgressDialog("Installing VirtuGhan…", None, 0, 0, parent)
+    dialog.setWindowTitle("VirtuGhan")
+    dialog.setWindowModality(Qt.WindowModal)
+    dialog.setMinimumDuration(0)
+    dialog.show()
+
+    try:
+        for i, cmd in enumerate(viable):
+            _log(f"Trying installation method {i + 1}: {' '.join(cmd)}")
+            if _run_in_qprocess(cmd, parent, dialog):
+                _log(f"Installation successful with method {i + 1}")
+                return True, None
+    finally:
+        dialog.close()
+    return False, "All installation methods failed"
+
+
+def install_dependencies(parent=None, quiet=False):
+    if check_dependencies():
+        return True
+
+    if _install_from_wheelhouse_direct():
+        return True
+
+    _log("Starting dependency installation")
+
+    if not quiet and parent:
+        reply = QMessageBox.question(
+            parent,
+            "Install VirtuGhan?",
+            "VirtuGhan package not found. Try automatic installation?\n\n"
+            "This will attempt to install the package using pip.",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes,
+        )
+
+        if reply != QMessageBox.Yes:
+            _log("User declined installation")
+            return False
+
+    try:
+        if not quiet and parent:
+            success, error = _install_with_progress_dialog(parent)
+        else:
+            # no hidden nested event loop for quiet installs: block like before
+            success, error = _try_install_virtughan()
+        importlib.invalidate_caches()
+
+        if success and check_dependencies():
+            if not quiet and parent:
+                QMessageBox.information(
+                    parent,
+                    "Success",
+                    "VirtuGhan installed successfully!\n\nPlease restart QGIS to ensure proper functionality.",
+                )
+            _log("Installation completed successfully")
+            return True
+        else:
+            _log(f"Installation failed: {error}", Qgis.Warning)
+
+    except Exception as e:
+        _log(f"Installation error: {str(e)}", Qgis.Critical)
+        if not quiet and parent:
+            QMessageBox.warning(
+                parent,
+                "Installation Error",
+                f"An error occurred during installation:\n{str(e)}",
+            )
+
+    if not quiet and parent:
+        _show_manual_install_dialog(parent)
+
+    return False
+
+
+def _show_manual_install_dialog(parent):
+    try:
+        dialog = QDialog(parent)
+        dialog.setWindowTitle("Manual Installation Required")
+        dialog.setMinimumSize(650, 400)
+
+        layout = QVBoxLayout()
+
+        is_windows = platform.system() == "Windows"
+
+        if is_windows:
+            instruction_text = """Automatic installation failed. Please install manually:
+
+WINDOWS - Method 1 (OSGeo4W Shell):
+1. Open OSGeo4W Shell as Administrator
+2. Run: python -m pip install virtughan
+
+WINDOWS - Method 2 (Command Prompt):
+1. Open Command Prompt as Administrator
+2. Run: python -m pip install virtughan --user
+
+WINDOWS - Method 3 (QGIS Python Console):
+1. In QGIS, go to Plugins > Python Console
+2. Run: import subprocess; subprocess.run(['python', '-m', 'pip', 'install', 'virtughan', '--user'])
+
+After installation, restart QGIS completely.
+"""
+        else:
+            instruction_text = """Automatic installation failed. Please install manually:
+
+LINUX/MAC - Method 1:
+python3 -m pip install virtughan --break-system-packages
+
+LINUX/MAC - Method 2:
+python3 -m pip install virtughan --user
+
+LINUX/MAC - Method 3 (if using conda):
+conda install -c conda-forge pip
+pip install virtughan
+
+After installation, restart QGIS.
+"""
+
+        text_edit = QTextEdit()
+        text_edit.setPlainText(instruction_text)
+        text_edit.setReadOnly(True)
+        layout.addWidget(text_edit)
+
+        ok_button = QPushButton("OK")
+        ok_button.clicked.connect(dialog.accept)
+        layout.addWidget(ok_button)
+
+        dialog.setLayout(layout)
+        dialog.exec_()
+
+    except Exception as e:
+        _log(f"Error showing manual install dialog: {str(e)}", Qgis.Warning)
+
+
+def ensure_virtughan_installed(parent=None, quiet=True):
+    global _installed
+    if _installed:
+        return True
+    try:
+        _installed = install_dependencies(parent, quiet)
+    except Exception as e:
+        _log(f"Bootstrap error: {str(e)}", Qgis.Critical)
+        _installed = check_dependencies()
+    return _installed
+
+
+# Deprecated alias kept for callers of the older bootstrap API.
+ensure_virtughan = ensure_virtughan_installed
@@ -0,0 +1,150 @@
+import os
+from qgis.PyQt import uic, QtWidgets
+from qgis.PyQt.QtCore import QDate
+from qgis.core import Qgis, QgsMessageLog
+import zipfile
+from functools import lru_cache, partial
+from pathlib import PurePosixPath
+
+from .common_logic import (
+    load_bands_meta, populate_band_combos, band_gsd_map, gsd_mismatch_warning,
+    auto_workers, qdate_to_iso
+)
+
+FORM_PATH = os.path.join(os.path.dirname(__file__), "common_form.ui")
+FORM_CLASS, _ = uic.loadUiType(FORM_PATH)
+
+class CommonParamsWidget(QtWidgets.QWidget, FORM_CLASS):
+    """
+    Reusable panel: startDate, endDate, cloudSpin, band1Combo, band2Combo, formulaEdit.
+    API:
+      - get_params() -> dict
+      - set_defaults(...)
+      - warn_resolution_if_needed(callback)
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setupUi(self)
+        self.ui = self
+        self._bands_meta = load_bands_meta()
+        self._band_gsd = band_gsd_map(self._bands_meta)
+        # Fires on every combo change; memoize per (band1, band2) pair
+        self._resolution_warning = lru_cache(maxsize=128)(partial(gsd_mismatch_warning, self._band_gsd))
+
+        
+        self.startDate.setDate(QDate.currentDate().addMonths(-1))
+        self.endDate.setDate(QDate.currentDate())
+        self.cloudSpin.setRange(0, 100)
+        self.cloudSpin.setValue(80)
+        self.formulaEdit.setText("(band2-band1)/(band2+band1)")
+
+        populate_band_combos(self.band1Combo, self.band2Combo, self._bands_meta)
+
+        
+        self.band1Combo.currentTextChanged.connect(self._on_band_change)
+        self.band2Combo.currentTextChanged.connect(self._on_band_change)
+
+        self._warn_callback = None
+
+    def _on_band_change(self, *_):
+        if not self._warn_callback:
+            return
+        b1 = self.band1Combo.currentText().strip()
+        b2 = self.band2Combo.currentText().strip()
+        msg = self._resolution_warning(b1, b2)
+        if msg:
+            try:
+                self._warn_callback(msg)
+            except Exception:
+                QgsMessageLog.logMessage(msg, "VirtuGhan", Qgis.Warning)
+
+    def warn_resolution_if_needed(self, callback):
+        """Provide a function(str) to be called when we detect a GSD mismatch."""
+        self._warn_callback = callback
+
+    def get_params(self):
+        return {
+            "start_date": qdate_to_iso(self.startDate.date()),
+            "end_date": qdate_to_iso(self.endDate.date()),
+            "cloud_cover": int(self.cloudSpin.value()),
+            "band1": self.band1Combo.currentText().strip(),
+            "band2": (self.band2Combo.currentText().strip() or None),
+            "formula": self.formulaEdit.text().strip(),
+        }
+
+    def set_defaults(self, *, start_date=None, end_date=None, cloud=None, band1=None, band2=None, formula=None):
+        if start_date: self.startDate.setDate(start_date)
+        if end_date: self.endDate.setDate(end_date)
+        if cloud is not None: self.cloudSpin.setValue(int(cloud))
+        if band1: self.band1Combo.setCurrentText(band1)
+        if band2 is not None: self.band2Combo.setCurrentText(band2)
+        if formula: self.formulaEdit.setText(formula)
+
+
+def _unsafe_member(name: str) -> bool:
+    """True if a zip member name is absolute or climbs out of the extraction dir."""
+    parts = PurePosixPath(name.replace("\\", "/")).parts
+    return bool(parts) and (parts[0] == "/" or ":" in parts[0] or ".." in parts)
+
+
+def _iter_zips(root: str):
+    """Yield DirEntry objects for *.zip files under root (recursive)."""
+    try:
+        it = os.scandir(root)
+    except OSError:
+        return
+    with it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _iter_zips(entry.path)
+                elif entry.name.lower().endswith(".zip") and entry.is_file():
+                    yield entry
+            except OSError:
+                continue
+
+
+def extract_zipfiles(out_dir: str, logger=None, delete_archives: bool = False) -> list[str]:
+    """
+    Find and extract all .zip files under `out_dir` into sibling folders named
+    after the zip (without extension). Returns a list of destination folders.
+
+    - logger: optional callable (msg, level) -> None; if provided, called for logs
+    - delete_archives: if True, remove the .zip after successful extraction
+    """
+    extracted_dirs: list[str] = []
+
+    def _log(msg, level=Qgis.Info):
+        if logger:
+            try:
+                logger(msg, level)
+            except Exception:
+                pass
+
+    try:
+        # Collect first so folders created by extraction are not rescanned
+        for entry in list(_iter_zips(out_dir)):
+            zpath = entry.path
+            dest = os.path.splitext(zpath)[0]
+            os.makedirs(dest, exist_ok=True)
+            try:
+                with zipfile.ZipFile(zpath) as zf:
+                    # Zip-slip protection
+                    bad = next((n for n in zf.namelist() if _unsafe_member(n)), None)
+                    if bad is not None:
+                        raise RuntimeError(f"Unsafe member path in zip: {bad}")
+                    zf.extractall(dest)
+                extracted_dirs.append(dest)
+                _log(f"Extracted zip: {zpath} -> {dest}")
+                if delete_archives:
+                    try:
+                        os.remove(zpath)
+                        _log(f"Deleted archive: {zpath}")
+                    except Exception as e:
+                        _log(f"Could not delete archive {zpath}: {e}", Qgis.Warning)
+            except Exception as e:
+                _log(f"Failed to extract {zpath}: {e}", Qgis.Warning)
+    except Exception as e:
+        _log(f"Zip extraction step failed: {e}", Qgis.Warning)
+
+    return extracted_dirs
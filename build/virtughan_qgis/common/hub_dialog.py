@@ -0,0 +1,154 @@
+import os
+from functools import lru_cache
+from qgis.PyQt.QtCore import Qt, QSize
+from qgis.PyQt.QtWidgets import (
+    QDialog, QListWidget, QListWidgetItem, QStackedWidget,
+    QHBoxLayout, QVBoxLayout, QWidget, QDockWidget,
+    QFrame, QAbstractItemView, QApplication, QStyle
+)
+from qgis.PyQt.QtGui import QIcon, QPixmap
+from qgis.core import QgsApplication, Qgis, QgsMessageLog
+
+
+PLUGIN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_icon(rel_path: str, fallback: QStyle.StandardPixmap = QStyle.SP_FileDialogListView) -> QIcon:
+
+    if rel_path.startswith(":/"):
+        ic = QIcon(rel_path)
+        if not ic.isNull():
+            return ic
+
+    return _icon_from_file(os.path.normpath(os.path.join(PLUGIN_ROOT, rel_path)), fallback)
+
+
+@lru_cache(maxsize=32)
+def _icon_from_file(abs_path: str, fallback: QStyle.StandardPixmap) -> QIcon:
+    # Decode each image once; QIcon is implicitly shared so handing out the same one is cheap
+    pix = QPixmap(abs_path)
+    if not pix.isNull():
+        return QIcon(pix)
+
+    # fallback
+    QgsMessageLog.logMessage(f"[VirtuGhan] Icon not found, using fallback: {abs_path}", "VirtuGhan", Qgis.Warning)
+    return QApplication.style().standardIcon(fallback)
+
+
+class VirtughanHubDialog(QDialog):
+    def __init__(self, iface, start_page: str = "engine", parent=None):
+        super().__init__(parent)
+        self.iface = iface
+        self.setWindowTitle("VirtuGhan")
+        self.resize(700, 680)
+
+        root = QHBoxLayout(self)
+
+        self.nav = QListWidget()
+        self.nav.setObjectName("virtNav")
+        self.nav.setSelectionMode(self.nav.SingleSelection)
+        self.nav.setAlternatingRowColors(False)
+        self.nav.setFixedWidth(240)
+        self.nav.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.nav.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.nav.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.nav.setFocusPolicy(Qt.NoFocus)
+        self.nav.setFrameShape(QFrame.NoFrame)
+        self.nav.setIconSize(QSize(18, 18))
+        self.nav.setSpacing(0) 
+
+        self.pages = QStackedWidget()
+        self.pages.setObjectName("virtPages")
+
+        root.addWidget(self.nav)
+        root.addWidget(self.pages, 1)
+
+        # Pages are built on first visit; only the start page is constructed up front
+        self._factories = []
+        self._add_page_lazy("Engine",    _engine_page,    load_icon("../static/images/virtughan-logo.png"))
+        self._add_page_lazy("Extractor", _extractor_page, load_icon("../static/images/virtughan-logo.png"))
+        self._add_page_lazy("Tiler",     _tiler_page,     load_icon("../static/images/virtughan-logo.png"))
+
+        self.nav.currentRowChanged.connect(self._on_row_changed)
+
+        # select initial page
+        start_index = {"engine": 0, "extractor": 1, "tiler": 2}.get(start_page.lower(), 0)
+        self.nav.setCurrentRow(start_index)
+        self._on_row_changed(self.nav.currentRow())
+
+        # Styling 
+        self.setStyleSheet("""
+            QDialog { background: palette(window); }
+
+            /* LEFT NAV */
+            QListWidget#virtNav, QListView#virtNav, QListView#virtNav::viewport {
+                background: #494d57;             
+                color: #e9e9e9;
+                border: none;
+                outline: none;
+            }
+            
+            QListWidget#virtNav::item {
+                padding: 6px 12px;                
+                margin: 0;
+                border: none;
+            }
+            QListWidget#virtNav::item:hover {
+                background: #2a2f38;
+            }
+            QListWidget#virtNav::item:selected {
+                background: #394150;               
+                color: #ffffff;
+            }
+
+            /* RIGHT PAGES */
+            QStackedWidget#virtPages {
+                background: palette(window);
+            }
+        """)
+
+    def _add_page_lazy(self, title: str, factory, icon: QIcon):
+        # Empty placeholder page; the dock is created by _ensure_page()
+        page = QWidget()
+        lay = QVBoxLayout(page)
+        lay.setContentsMargins(8, 8, 8, 8)
+        self.pages.addWidget(page)
+        self._factories.append(factory)
+
+        # Sidebar item with enforced height
+        item = QListWidgetItem(icon, title)
+        item.setSizeHint(QSize(200, 32))  
+        self.nav.addItem(item)
+
+    def _ensure_page(self, index: int):
+        if not 0 <= index < len(self._factories):
+            return
+        factory = self._factories[index]
+        if factory is None:
+            return
+        self._factories[index] = None
+        dock = factory(self.iface)
+
+        # Strip dock chrome so it looks like a plain page
+        dock.setFeatures(QDockWidget.NoDockWidgetFeatures)
+        dock.setAllowedAreas(Qt.NoDockWidgetArea)
+        dock.setTitleBarWidget(QWidget(dock))
+        self.pages.widget(index).layout().addWidget(dock)
+
+    def _on_row_changed(self, index: int):
+        self._ensure_page(index)
+        self.pages.setCurrentIndex(index)
+
+
+def _engine_page(iface):
+    from ..engine.engine_widget import EngineDockWidget
+    return EngineDockWidget(iface)
+
+
+def _extractor_page(iface):
+    from ..extractor.extractor_widget import ExtractorDockWidget
+    return ExtractorDockWidget(iface)
+
+
+def _tiler_page(iface):
+    from ..tiler.tiler_widget import TilerDockWidget
+    return TilerDockWidget(iface)
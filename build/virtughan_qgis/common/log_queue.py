@@ -0,0 +1,38 @@
+# virtughan_qgis/common/log_queue.py
+from collections import deque
+
+from qgis.PyQt.QtCore import QTimer
+
+
+class LogQueue:
+    """Coalesces log lines for a QPlainTextEdit into one appendPlainText per tick.
+
+    Each appendPlainText is a relayout + repaint; chatty callers would otherwise
+    pay that per line. The timer only runs while lines are pending.
+    """
+    def __init__(self, text_edit, interval_ms: int = 100):
+        self._edit = text_edit
+        self._lines = deque()
+        self._timer = QTimer(text_edit)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+
+    def append(self, msg: str, urgent: bool = False):
+        self._lines.append(msg)
+        if urgent:
+            self.flush()
+        elif not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        self._timer.stop()
+        if not self._lines:
+            return
+        text = "\n".join(self._lines)
+        self._lines.clear()
+        self._edit.appendPlainText(text)
+
+    def clear(self):
+        self._timer.stop()
+        self._lines.clear()
@@ -0,0 +1,320 @@
+import os, io, time, traceback
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
+from pathlib import Path
+
+from qgis.PyQt.QtCore import QDate, Qt
+from qgis.core import (
+    QgsProcessingAlgorithm, QgsProcessingParameterExtent,
+    QgsProcessingParameterNumber, QgsProcessingParameterString, QgsProcessingParameterBoolean,
+    QgsProcessingParameterEnum, QgsProcessingParameterFolderDestination, QgsProcessingUtils,
+    QgsProcessingException, QgsProject, QgsCoordinateReferenceSystem, QgsCoordinateTransform,
+    QgsRasterLayer, QgsProcessingParameterDefinition,
+)
+
+from ..common.aoi import _get_xform, lonlat_bbox
+from ..common.common_logic import auto_workers, formula_error, has_raster_signature, iter_rasters, run_dir
+from .engine_worker import REMOTE_READ_OPTIONS, cogify_outputs, gdal_config, install_scene_cache
+
+try:
+    from qgis.core import QgsProcessingParameterDate
+    HAVE_DATE_PARAM = True
+except Exception:
+    QgsProcessingParameterDate = None
+    HAVE_DATE_PARAM = False
+
+
+def _coerce_to_qdate(val) -> QDate:
+    if isinstance(val, QDate):
+        return val
+    s = "" if val is None else str(val).strip()
+    if not s:
+        return QDate()
+    return QDate.fromString(s, Qt.ISODate)
+
+
+_WGS84 = QgsCoordinateReferenceSystem.fromEpsgId(4326)
+
+
+def _check_lonlat(bbox):
+    checked = lonlat_bbox(bbox)
+    if checked is None:
+        raise QgsProcessingException(f"Converted bbox is not valid lon/lat: {bbox}")
+    return checked
+
+
+def _extent_to_wgs84_bbox(extent, src_crs):
+    auth = src_crs.authid() if src_crs else ""
+    if auth.upper() == "EPSG:4326" or not src_crs or not src_crs.isValid():
+        # Already lon/lat (or unknown): no transform object is built at all
+        return _check_lonlat([extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()])
+
+    if auth:
+        xform = _get_xform(auth, "EPSG:4326")
+    else:
+        xform = QgsCoordinateTransform(src_crs, _WGS84, QgsProject.instance())
+    # transformBoundingBox densifies the edges; two corners can miss curved bounds
+    r = xform.transformBoundingBox(extent, QgsCoordinateTransform.ForwardTransform, True)
+    bbox = [r.xMinimum(), r.yMinimum(), r.xMaximum(), r.yMaximum()]
+    if bbox[0] > bbox[2]:
+        # with 180° crossover handling, xmin > xmax means the AOI spans the antimeridian
+        raise QgsProcessingException(f"AOI crosses the antimeridian; split it at 180°: {bbox}")
+    return _check_lonlat(bbox)
+
+
+_OPS = ("mean", "median", "max", "min", "std", "sum", "var", "none")
+# enum index -> value passed to the engine ("none" maps straight to None)
+_OP_BY_IDX = tuple(None if op == "none" else op for op in _OPS)
+
+_PUSH_INTERVAL_S = 0.05
+_PUSH_MAX_LINES = 32
+
+
+class _FeedbackTee(io.TextIOBase):
+    def __init__(self, file_obj, feedback):
+        self.file = file_obj
+        self.feedback = feedback
+        self._buf = []  # pieces of the current, not yet newline-terminated line
+        # UI side is rate-limited: lines are batched into one pushInfo per interval
+        self._pending_lines = []
+        self._last_push = 0.0
+
+    def write(self, s):
+        if not s:
+            return 0
+        self.file.write(s)
+        self._buf.append(s)
+        if "\n" in s:
+            joined = "".join(self._buf)
+            lines = joined.splitlines()
+            if joined.endswith(("\n", "\r")):
+                self._buf = []
+            else:
+                self._buf = [lines.pop()]
+            self._pending_lines.extend(line for line in lines if line.strip())
+        if self._pending_lines and (len(self._pending_lines) >= _PUSH_MAX_LINES
+                                    or time.monotonic() - self._last_push > _PUSH_INTERVAL_S):
+            # any write past the interval pushes, so a burst followed by silence isn't held back
+            self._push_pending()
+        return len(s)
+
+    def _push_pending(self):
+        batch, self._pending_lines = self._pending_lines, []
+        self._last_push = time.monotonic()
+        if batch:
+            try:
+                self.feedback.pushInfo("\n".join(batch))
+            except Exception:
+                pass
+
+    def flush(self):
+        # print(..., flush=True) lands here; the UI push still honours the throttle
+        try:
+            self.file.flush()
+        except Exception:
+            pass
+        if self._pending_lines and time.monotonic() - self._last_push > _PUSH_INTERVAL_S:
+            self._push_pending()
+
+
+@contextmanager
+def _drained(tee):
+    """Push whatever the throttled tee still holds when the block exits."""
+    try:
+        yield tee
+    finally:
+        tee._push_pending()
+
+
+class VirtuGhanEngineAlgorithm(QgsProcessingAlgorithm):
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterExtent("EXTENT", "Area of interest (any CRS)"))
+
+        if HAVE_DATE_PARAM:
+            self.addParameter(QgsProcessingParameterString(
+                "START_DATE", "Start date (YYYY-MM-DD)",
+                defaultValue=QDate.currentDate().addMonths(-1).toString("yyyy-MM-dd")
+            ))
+            self.addParameter(QgsProcessingParameterString(
+                "END_DATE", "End date (YYYY-MM-DD)",
+                defaultValue=QDate.currentDate().toString("yyyy-MM-dd")
+            ))
+        else:
+            self.addParameter(QgsProcessingParameterString(
+                "START_DATE", "Start date (YYYY-MM-DD)",
+                defaultValue=QDate.currentDate().addYears(-1).toString("yyyy-MM-dd")))
+            self.addParameter(QgsProcessingParameterString(
+                "END_DATE", "End date (YYYY-MM-DD)",
+                defaultValue=QDate.currentDate().toString("yyyy-MM-dd")))
+
+        self.addParameter(QgsProcessingParameterNumber(
+            "CLOUD_COVER", "Max cloud cover (%)",
+            type=QgsProcessingParameterNumber.Integer, defaultValue=30, minValue=0, maxValue=100))
+        self.addParameter(QgsProcessingParameterString("FORMULA", "Formula",
+            defaultValue="(band2-band1)/(band2+band1)"))
+        self.addParameter(QgsProcessingParameterString("BAND1", "Band 1", defaultValue="red"))
+        self.addParameter(QgsProcessingParameterString("BAND2", "Band 2 (optional)",
+            defaultValue="nir", optional=True))
+        self.addParameter(QgsProcessingParameterEnum(
+            "OPERATION", "Aggregation",
+            options=list(_OPS), defaultValue=_OPS.index("none")))
+        self.addParameter(QgsProcessingParameterBoolean(
+            "TIMESERIES", "Generate timeseries (GIF)", defaultValue=False))
+        self.addParameter(QgsProcessingParameterBoolean(
+            "SMART_FILTER", "Apply smart filter", defaultValue=False))
+        self.addParameter(QgsProcessingParameterNumber(
+            "WORKERS", "Workers (0=auto)",
+            type=QgsProcessingParameterNumber.Integer, defaultValue=1, minValue=0, maxValue=64))
+        self.addParameter(QgsProcessingParameterFolderDestination(
+            "OUTPUT_FOLDER", "Output folder (blank = temp)", optional=True))
+
+        int16_copy = QgsProcessingParameterBoolean(
+            "INT16_COPY", "Also write compact Int16 copies of index rasters (lossy, scale 0.0001)",
+            defaultValue=False)
+        int16_copy.setFlags(int16_copy.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(int16_copy)
+
+        gdal_debug = QgsProcessingParameterBoolean(
+            "GDAL_DEBUG", "Write GDAL debug output (CPL_DEBUG) to runtime.log", defaultValue=False)
+        gdal_debug.setFlags(gdal_debug.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(gdal_debug)
+
+    def name(self): return "virtughan_engine"
+    def displayName(self): return "VirtuGhan Engine"
+    def group(self): return "VirtuGhan"
+    def groupId(self): return "virtughan"
+    def shortHelpString(self): return "Run VirtuGhan Engine from the Processing Toolbox."
+    def createInstance(self): return VirtuGhanEngineAlgorithm()
+
+    def processAlgorithm(self, parameters, context, feedback):
+        # imported here so loading the provider doesn't pull in numpy/rasterio
+        try:
+            from virtughan.engine import VirtughanProcessor
+        except Exception as e:
+            raise QgsProcessingException(f"VirtughanProcessor import failed: {e}")
+
+        extent = self.parameterAsExtent(parameters, "EXTENT", context)
+        try:
+            src_crs = self.parameterAsExtentCrs(parameters, "EXTENT", context)
+        except Exception:
+            src_crs = QgsProject.instance().crs()
+        bbox = _extent_to_wgs84_bbox(extent, src_crs)
+        feedback.pushInfo(f"AOI (EPSG:4326): {bbox}")
+
+        if HAVE_DATE_PARAM:
+            sd = self.parameterAsDate(parameters, "START_DATE", context); sd = sd.date() if hasattr(sd, "date") else sd
+            ed = self.parameterAsDate(parameters, "END_DATE", context);   ed = ed.date() if hasattr(ed, "date") else ed
+            sd_q = sd if isinstance(sd, QDate) else _coerce_to_qdate(sd)
+            ed_q = ed if isinstance(ed, QDate) else _coerce_to_qdate(ed)
+        else:
+            sd_q = _coerce_to_qdate(self.parameterAsString(parameters, "START_DATE", context))
+            ed_q = _coerce_to_qdate(self.parameterAsString(parameters, "END_DATE", context))
+        if not sd_q.isValid() or not ed_q.isValid():
+            raise QgsProcessingException("Invalid date. Use YYYY-MM-DD.")
+        if sd_q > ed_q:
+            raise QgsProcessingException("Start date must be before end date.")
+        s = sd_q.toString("yyyy-MM-dd"); e = ed_q.toString("yyyy-MM-dd")
+
+        cloud = max(0, min(100, int(self.parameterAsDouble(parameters, "CLOUD_COVER", context))))
+        formula = (self.parameterAsString(parameters, "FORMULA", context) or "").strip()
+        band1 = (self.parameterAsString(parameters, "BAND1", context) or "").strip()
+        b2 = (self.parameterAsString(parameters, "BAND2", context) or "").strip()
+        band2 = b2 or None
+        if not formula: raise QgsProcessingException("Formula is required.")
+        if not band1:   raise QgsProcessingException("Band 1 is required.")
+        err = formula_error(formula, band2)
+        if err: raise QgsProcessingException(err)
+
+        op_idx = self.parameterAsEnum(parameters, "OPERATION", context)
+        operation = _OP_BY_IDX[op_idx] if 0 <= op_idx < len(_OP_BY_IDX) else None
+
+        ts = self.parameterAsBool(parameters, "TIMESERIES", context)
+        smart = self.parameterAsBool(parameters, "SMART_FILTER", context)
+
+        if ts is False and operation is None:
+            raise QgsProcessingException("Operation is required when 'Generate timeseries' is disabled.")
+
+        workers = int(self.parameterAsDouble(parameters, "WORKERS", context))
+        if workers <= 0:
+            workers = auto_workers()
+
+        out_base = (self.parameterAsString(parameters, "OUTPUT_FOLDER", context) or "").strip()
+        if not out_base:
+            out_base = getattr(context, "temporaryFolder", lambda: None)() or QgsProcessingUtils.tempFolder()
+        out_dir = run_dir(out_base, "virtughan_engine")
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+        log_path = str(Path(out_dir, "runtime.log"))
+
+        gdal_debug = self.parameterAsBool(parameters, "GDAL_DEBUG", context)
+        int16_copy = self.parameterAsBool(parameters, "INT16_COPY", context)
+
+        feedback.pushInfo(f"Output: {out_dir}")
+        feedback.pushInfo(f"Log file: {log_path}")
+        feedback.pushInfo(f"Params: bbox={bbox}, start={s}, end={e}, cloud={cloud}, "
+                          f"band1={band1}, band2={band2}, op={operation}, "
+                          f"timeseries={ts}, workers={workers}, smart_filter={smart}")
+
+        # Block-buffered: prints and CPL output would otherwise cost one write() per line.
+        # The file is flushed on explicit flush() calls and when it is closed.
+        # GDAL options are scoped to this run and restored afterwards (CPL_DEBUG only on request)
+        with open(log_path, "a", encoding="utf-8", buffering=65536) as lf, \
+                gdal_config(CPL_LOG=log_path, GDAL_HTTP_TIMEOUT="30",
+                            CPL_DEBUG="ON" if gdal_debug else None, **REMOTE_READ_OPTIONS):
+            tee = _FeedbackTee(lf, feedback)
+            with redirect_stdout(tee), redirect_stderr(tee), _drained(tee):
+                try:
+                    print("Starting compute() …", flush=True)
+                    install_scene_cache()
+                    proc = VirtughanProcessor(
+                        bbox=bbox,
+                        start_date=s,
+                        end_date=e,
+                        cloud_cover=cloud,
+                        formula=formula,
+                        band1=band1,
+                        band2=band2,
+                        operation=operation,
+                        timeseries=ts,
+                        output_dir=out_dir,
+                        log_file=lf,
+                        cmap="RdYlGn",
+                        workers=workers,
+                        smart_filter=smart,
+                    )
+                    print("[checkpoint] entering VirtughanProcessor.compute()", flush=True)
+                    proc.compute()
+                    print("[checkpoint] exited VirtughanProcessor.compute()", flush=True)
+                    print("compute() finished.", flush=True)
+                    cogs = cogify_outputs(out_dir, int16_copy)
+                    if cogs:
+                        print("".join(f"Wrote COG: {path}\n" for path in cogs), end="", flush=True)
+                except Exception:
+                    print("[exception]", flush=True)
+                    print(traceback.format_exc(), flush=True)
+                    raise QgsProcessingException("VirtughanProcessor.compute() failed – see runtime.log for details.")
+
+        loaded = []
+        layers = []
+        # Outputs carry their own CRS and no sidecar style: skip the prompt/validation and style lookup
+        layer_opts = QgsRasterLayer.LayerOptions(False, context.transformContext())
+        layer_opts.skipCrsValidation = True
+        for entry in iter_rasters(out_dir):
+            path = os.path.normpath(entry.path)
+            name = entry.name.rpartition(".")[0]
+            lyr = QgsRasterLayer(path, name, "gdal", layer_opts) if has_raster_signature(path) else None
+            if lyr is not None and lyr.isValid():
+                layers.append(lyr)
+                loaded.append(path)
+            else:
+                feedback.reportError(f"Failed to load raster: {path}")
+
+        # One addMapLayers call -> one layersAdded / legend update instead of one per raster
+        if layers:
+            QgsProject.instance().addMapLayers(layers, addToLegend=True)
+            feedback.pushInfo("\n".join(f"Loaded raster: {path}" for path in loaded))
+
+        if not loaded:
+            feedback.pushInfo("No .tif/.tiff/.vrt files found in output folder to load.")
+        else:
+            feedback.pushInfo(f"Added {len(loaded)} raster(s) to the map.")
+
+        return {"OUTPUT": out_dir, "RASTERS": loaded}
@@ -0,0 +1,695 @@
+# virtughan_qgis/engine/engine_widget.py
+import os
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from qgis.PyQt import uic
+from qgis.PyQt.QtCore import Qt, QDate, QTimer, QVariant
+from qgis.PyQt.QtGui import QColor
+from qgis.PyQt.QtWidgets import (
+    QWidget, QDockWidget, QFileDialog, QMessageBox, QPlainTextEdit,
+    QSpinBox, QLineEdit, QDateEdit, QFormLayout, QVBoxLayout
+)
+
+from qgis.core import (
+    Qgis,
+    QgsMessageLog,
+    QgsProcessingUtils,
+    QgsGeometry,
+    QgsProject,
+    QgsRectangle,
+    QgsRasterLayer,
+    QgsApplication,
+    QgsTask,
+)
+
+from ..common.aoi import (
+    AoiManager,
+    AoiPolygonTool,
+    AoiRectTool,
+    rect_to_wgs84_bbox,
+    geom_to_wgs84_bbox,
+    geom_to_wgs84_ring,
+    lonlat_bbox,
+)
+
+from ..common.common_logic import formula_error, has_raster_signature, iter_rasters, missing_module, run_dir
+from ..common.log_queue import LogQueue
+from ..common.map_setup import setup_default_map
+from .engine_worker import (
+    DEFAULT_TILE_DEG, get_pool, merge_tile_logs, mosaic_tiles, no_pool_error, run_compute,
+    shutdown_pool, tile_jobs,
+)
+
+COMMON_IMPORT_ERROR = None
+CommonParamsWidget = None
+try:
+    from ..common.common_widget import (
+        CommonParamsWidget,
+        extract_zipfiles
+    )
+    
+except Exception as _e:
+    COMMON_IMPORT_ERROR = _e
+    CommonParamsWidget = None
+
+UI_PATH = os.path.join(os.path.dirname(__file__), "engine_form.ui")
+FORM_CLASS, _ = uic.loadUiType(UI_PATH)
+
+# (key, label, widget class) for the form used when CommonParamsWidget is unavailable
+_FALLBACK_FIELDS = (
+    ("start", "Start date", QDateEdit),
+    ("end", "End date", QDateEdit),
+    ("cloud", "Max cloud cover (%)", QSpinBox),
+    ("formula", "Formula", QLineEdit),
+    ("band1", "Band 1", QLineEdit),
+    ("band2", "Band 2 (optional)", QLineEdit),
+)
+_FALLBACK_TEXT = {"formula": "(band2-band1)/(band2+band1)", "band1": "red", "band2": "nir"}
+
+
+def _log(widget, msg, level=Qgis.Info):
+    QgsMessageLog.logMessage(str(msg), "VirtuGhan", level)
+    try:
+        # coalesced into one append per tick; errors show up immediately
+        widget._log_queue.append(str(msg), urgent=level == Qgis.Critical)
+    except Exception:
+        pass
+
+
+class _VirtughanTask(QgsTask):
+    """Runs VirtughanProcessor.compute() off the UI thread and writes to runtime.log.
+
+    The compute itself runs in the engine dock's worker pool (engine_worker);
+    this task only waits on it, so cancel can terminate the job. With a tile size
+    set, the AOI is split into tiles that run in parallel; _FinalizeTask mosaics them.
+    """
+    def __init__(self, desc, params, log_path, on_done=None):
+        super().__init__(desc, QgsTask.CanCancel)
+        self.params = params
+        self.log_path = log_path
+        self.on_done = on_done
+        self.exc = None
+        self.jobs = tile_jobs(params)
+
+    def _wait(self, futs):
+        """Wait for all futures, re-raising worker errors; False if canceled."""
+        total = len(futs)
+        pending = set(futs)
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            try:
+                for fut in done:
+                    fut.result()
+            except Exception:
+                for fut in pending:
+                    fut.cancel()
+                raise
+            if total > 1:
+                self.setProgress(100.0 * (total - len(pending)) / total)
+            if pending and self.isCanceled():
+                shutdown_pool(kill=True, name="engine")
+                self.exc = RuntimeError("Canceled by user.")
+                return False
+        return True
+
+    def run(self):
+        try:
+            jobs = self.jobs
+            pool = get_pool(min(len(jobs), self.params["workers"]) if jobs else 1, name="engine")
+            if pool is None:
+                self.jobs = []
+                raise no_pool_error(self.log_path)
+            if not jobs:
+                return self._wait([pool.submit(run_compute, self.params, self.log_path)])
+            # one tile per worker, scheduled as workers free up; each logs to its own file
+            with open(self.log_path, "a", encoding="utf-8") as logf:
+                logf.write(f"Running {len(jobs)} tiles; their output follows once they finish.\n")
+            try:
+                return self._wait([pool.submit(run_compute, p, p["log_path"]) for p in jobs])
+            finally:
+                merge_tile_logs(jobs, self.log_path)
+        except BrokenProcessPool as e:
+            shutdown_pool(name="engine")
+            self.exc = e
+            try:
+                with open(self.log_path, "a", encoding="utf-8", buffering=1) as logf:
+                    logf.write(f"[exception] engine worker process died: {e}\n")
+            except Exception:
+                pass
+            return False
+        except Exception as e:
+            # run_compute (or no_pool_error) already wrote the error to runtime.log
+            self.exc = e
+            return False
+
+    def finished(self, ok):
+        if self.on_done:
+            try:
+                self.on_done(ok, self.exc)
+            except Exception:
+                pass
+
+
+class _FinalizeTask(QgsTask):
+    """Post-processing of an engine run (tile mosaic, zip extraction) off the UI thread.
+
+    The compute task is attached as a ParentDependsOnSubTask subtask, so the task
+    manager starts this only after compute succeeded; a failed or canceled compute
+    terminates it as well. on_done is left with just the layer adds.
+    """
+    def __init__(self, desc, compute, on_done=None):
+        super().__init__(desc, QgsTask.CanCancel)
+        self.compute = compute
+        self.on_done = on_done
+        self.exc = None
+        self.addSubTask(compute, [], QgsTask.ParentDependsOnSubTask)
+
+    def run(self):
+        params, log_path = self.compute.params, self.compute.log_path
+        out_dir = params["output_dir"]
+        try:
+            with open(log_path, "a", encoding="utf-8", buffering=1) as logf:
+                def _logger(msg, level=Qgis.Info):
+                    QgsMessageLog.logMessage(str(msg), "VirtuGhan", level)
+                    logf.write(f"{msg}\n")
+
+                jobs = self.compute.jobs
+                if jobs:
+                    written = mosaic_tiles([p["output_dir"] for p in jobs], out_dir,
+                                           params.get("quantize", False))
+                    _logger(f"Mosaicked {len(jobs)} tiles into {len(written)} raster(s).")
+                if self.isCanceled():
+                    return False
+                extract_zipfiles(out_dir, logger=_logger, delete_archives=True)
+            return True
+        except Exception as e:
+            self.exc = e
+            return False
+
+    def finished(self, ok):
+        if self.on_done:
+            try:
+                self.on_done(ok, self.exc or self.compute.exc)
+            except Exception:
+                pass
+
+
+class _UiLogTailer:
+    """Polls a text file and appends new content to a QPlainTextEdit without blocking UI."""
+    def __init__(self, log_path: str, log_widget: QPlainTextEdit, interval_ms: int = 400):
+        self._path = log_path
+        self._widget = log_widget
+        self._pos = 0
+        self._timer = QTimer()
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._poll_once)
+
+    def start(self):
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            open(self._path, "a", encoding="utf-8").close()
+        except Exception:
+            pass
+        self._pos = 0
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def _poll_once(self):
+        try:
+            if not os.path.exists(self._path):
+                return
+            with open(self._path, "r", encoding="utf-8", errors="replace") as f:
+                f.seek(self._pos)
+                chunk = f.read()
+                if chunk:
+                    self._widget.appendPlainText(chunk.rstrip("\n"))
+                    self._pos = f.tell()
+        except Exception:
+            pass
+
+
+class EngineDockWidget(QDockWidget):
+    def __init__(self, iface):
+        super().__init__("VirtuGhan • Engine", iface.mainWindow())
+        self.iface = iface
+        self.setObjectName("VirtuGhanEngineDock")
+
+        self.ui_root = QWidget(self)
+        self._form_owner = FORM_CLASS()
+        self._form_owner.setupUi(self.ui_root)
+        self.setWidget(self.ui_root)
+
+        # setupUi binds every named widget on the form owner; no tree walk needed
+        ui = self._form_owner
+        f = lambda name: getattr(ui, name, None)
+
+        self.progressBar        = f("progressBar")
+        self.runButton          = f("runButton")
+        self.resetButton        = f("resetButton")
+        self.helpButton         = f("helpButton")
+        self.logText            = f("logText")
+
+        self.commonHost         = f("commonParamsContainer")
+
+        self.aoiModeCombo       = f("aoiModeCombo")
+        self.aoiUseCanvasButton = f("aoiUseCanvasButton")
+        self.aoiStartDrawButton = f("aoiStartDrawButton")  
+        self.aoiClearButton     = f("aoiClearButton")
+        self.aoiPreviewLabel    = f("aoiPreviewLabel")
+
+        self.opCombo            = f("opCombo")
+        self.timeseriesCheck    = f("timeseriesCheck")
+        self.smartFilterCheck   = f("smartFilterCheck")
+        self.workersSpin        = f("workersSpin")
+        self.outputPathEdit     = f("outputPathEdit")
+        self.outputBrowseButton = f("outputBrowseButton")
+        self.tileSizeSpin       = f("tileSizeSpin")
+        self.tileOverlapSpin    = f("tileOverlapSpin")
+        self.int16CopyCheck     = f("int16CopyCheck")
+        self._log_queue         = LogQueue(self.logText) if self.logText is not None else None
+
+        critical = {
+            "progressBar": self.progressBar, "runButton": self.runButton,
+            "resetButton": self.resetButton, "helpButton": self.helpButton,
+            "logText": self.logText, "commonParamsContainer": self.commonHost,
+            "aoiModeCombo": self.aoiModeCombo, "aoiUseCanvasButton": self.aoiUseCanvasButton,
+            "aoiStartDrawButton": self.aoiStartDrawButton, "aoiClearButton": self.aoiClearButton,
+            "aoiPreviewLabel": self.aoiPreviewLabel, "opCombo": self.opCombo,
+            "timeseriesCheck": self.timeseriesCheck, "smartFilterCheck": self.smartFilterCheck,
+            "workersSpin": self.workersSpin, "outputPathEdit": self.outputPathEdit,
+            "outputBrowseButton": self.outputBrowseButton,
+            "tileSizeSpin": self.tileSizeSpin, "tileOverlapSpin": self.tileOverlapSpin,
+            "int16CopyCheck": self.int16CopyCheck,
+        }
+        missing = [name for name, ref in critical.items() if ref is None]
+        if missing:
+            raise RuntimeError(
+                f"Engine UI missing widgets: {', '.join(missing)}. "
+                f"Make sure engine_form.ui names match the code."
+            )
+
+        self._init_common_widget()
+
+        self.progressBar.setVisible(False)
+        self.workersSpin.setMinimum(1)
+        if self.workersSpin.value() < 1:
+            self.workersSpin.setValue(1)
+
+        self._aoi_bbox = None
+        self._aoi_polygon_wgs84 = None
+        self._aoi = AoiManager(self.iface)   
+        self._prev_tool = None               
+
+        # Convert dropdown to 3 options at runtime (no .ui change required)
+        self.aoiModeCombo.clear()
+        self.aoiModeCombo.addItems(["Map extent", "Draw rectangle", "Draw polygon"])
+
+        # Use a single action button; hide the separate 'Use Canvas Extent' button
+        self.aoiUseCanvasButton.setVisible(False)
+
+        self.aoiStartDrawButton.clicked.connect(self._aoi_action_clicked)
+        self.aoiClearButton.clicked.connect(self._clear_aoi)
+        self.aoiModeCombo.currentTextChanged.connect(self._aoi_mode_changed)
+
+        self.outputBrowseButton.clicked.connect(self._browse_output)
+        self.resetButton.clicked.connect(self._reset_form)
+        self.runButton.clicked.connect(self._run_clicked)
+        self.helpButton.clicked.connect(self._open_help)
+
+        # Initialize AOI preview and action button label
+        self._update_aoi_preview()
+        self._aoi_mode_changed(self.aoiModeCombo.currentText())
+
+        self._tailer = None
+        self._current_task = None
+        self._current_log_path = None
+
+    def _init_common_widget(self):
+        host = self.commonHost
+        v = QVBoxLayout(host); v.setContentsMargins(0, 0, 0, 0)
+
+        if CommonParamsWidget is not None:
+            self._common = CommonParamsWidget(host)
+            try:
+                self._common.set_defaults(
+                    start_date=QDate.currentDate().addMonths(-1),
+                    end_date=QDate.currentDate(),
+                    cloud=80,
+                    band1="red",
+                    band2="nir",
+                    formula="(band2-band1)/(band2+band1)",
+                )
+            except Exception:
+                pass
+            # message bar rather than a modal box: this fires on every band combo change
+            self._common.warn_resolution_if_needed(
+                lambda msg: self.iface.messageBar().pushMessage("VirtuGhan", msg, level=Qgis.Warning, duration=5)
+            )
+            v.addWidget(self._common)
+            _log(self, "Using CommonParamsWidget.", Qgis.Info)
+        else:
+            fb = QWidget(host)
+            form = QFormLayout(fb)
+            self._fb_fields = {}
+            for key, label, cls in _FALLBACK_FIELDS:
+                self._fb_fields[key] = w = cls(fb)
+                form.addRow(label, w)
+            self._fb_fields["start"].setCalendarPopup(True)
+            self._fb_fields["end"].setCalendarPopup(True)
+            self._fb_fields["cloud"].setRange(0, 100)
+            self._reset_fallback()
+            v.addWidget(fb)
+            self._common = None
+            _log(self, f"CommonParamsWidget not available: {COMMON_IMPORT_ERROR}", Qgis.Warning)
+
+    def _get_common_params(self):
+        if self._common is not None:
+            return self._common.get_params()
+        f = self._fb_fields
+        return {
+            "start_date": f["start"].date().toString("yyyy-MM-dd"),
+            "end_date": f["end"].date().toString("yyyy-MM-dd"),
+            "cloud_cover": int(f["cloud"].value()),
+            "band1": f["band1"].text().strip(),
+            "band2": (f["band2"].text().strip() or None),
+            "formula": f["formula"].text().strip(),
+        }
+
+    def _reset_fallback(self):
+        f = self._fb_fields
+        today = QDate.currentDate()
+        f["start"].setDate(today.addMonths(-1))
+        f["end"].setDate(today)
+        f["cloud"].setValue(30)
+        for key, text in _FALLBACK_TEXT.items():
+            f[key].setText(text)
+
+    def _aoi_mode_changed(self, text: str):
+        """Update the single action button text based on the selected mode."""
+        t = (text or "").lower()
+        if "extent" in t:
+            self.aoiStartDrawButton.setText("Use Canvas Extent")
+            self.aoiStartDrawButton.setToolTip("Capture current map canvas extent")
+        elif "rectangle" in t:
+            self.aoiStartDrawButton.setText("Draw Rectangle")
+            self.aoiStartDrawButton.setToolTip("Press, drag, release to draw a rectangle")
+        else:
+            self.aoiStartDrawButton.setText("Draw Polygon")
+            self.aoiStartDrawButton.setToolTip("Left-click to add vertices, right-click/Enter/double-click to finish")
+
+    def _aoi_action_clicked(self):
+        """Single action button handler; dispatch by dropdown mode."""
+        mode = (self.aoiModeCombo.currentText() or "").lower()
+        if "extent" in mode:
+            self._use_canvas_extent()
+        elif "rectangle" in mode:
+            self._start_draw_rectangle()
+        else:
+            self._start_draw_polygon()
+
+    def _use_canvas_extent(self):
+        canvas = self.iface.mapCanvas()
+        if not canvas or not canvas.extent():
+            QMessageBox.warning(self, "VirtuGhan", "No map canvas extent available.")
+            return
+
+        rect = canvas.extent()
+        # visible AOI (map CRS)
+        rect_geom = QgsGeometry.fromRect(rect)
+        self._aoi.replace_geometry(rect_geom)
+
+        # processing bbox (WGS84)
+        self._aoi_bbox = rect_to_wgs84_bbox(rect, QgsProject.instance())
+        self._aoi_polygon_wgs84 = None
+        self._update_aoi_preview()
+
+    def _start_draw_rectangle(self):
+        """Use common AoiRectTool; press-drag-release to finish."""
+        canvas = self.iface.mapCanvas()
+        if not canvas:
+            QMessageBox.warning(self, "VirtuGhan", "Map canvas not available.")
+            return
+
+        self._prev_tool = canvas.mapTool()
+
+        def _finish(rect: QgsRectangle | None):
+            try:
+                canvas.setMapTool(self._prev_tool)
+            except Exception:
+                pass
+            if not rect or rect.isEmpty():
+                _log(self, "AOI rectangle drawing canceled.")
+                return
+
+            # visible AOI (map CRS)
+            self._aoi.replace_geometry(QgsGeometry.fromRect(rect))
+
+            # processing bbox (WGS84)
+            self._aoi_bbox = rect_to_wgs84_bbox(rect, QgsProject.instance())
+            self._aoi_polygon_wgs84 = None
+            self._update_aoi_preview()
+
+        tool = AoiRectTool(canvas, _finish)
+        canvas.setMapTool(tool)
+        _log(self, "Draw rectangle: press, drag, release to finish. Esc to cancel.")
+
+    def _start_draw_polygon(self):
+        canvas = self.iface.mapCanvas()
+        if not canvas:
+            QMessageBox.warning(self, "VirtuGhan", "Map canvas not available.")
+            return
+
+        self._prev_tool = canvas.mapTool()
+
+        def _done(geom_map: QgsGeometry | None):
+            try:
+                canvas.setMapTool(self._prev_tool)
+            except Exception:
+                pass
+
+            if geom_map is None or geom_map.isEmpty():
+                _log(self, "AOI polygon drawing canceled.")
+                return
+
+            # visible AOI (map CRS)
+            self._aoi.replace_geometry(geom_map)
+
+            # processing bbox (WGS84), taken from the ring so the geometry is transformed once
+            ring = geom_to_wgs84_ring(geom_map, QgsProject.instance())
+            self._aoi_polygon_wgs84 = ring
+            if ring:
+                lons = [c[0] for c in ring]
+                lats = [c[1] for c in ring]
+                self._aoi_bbox = (min(lons), min(lats), max(lons), max(lats))
+            else:
+                self._aoi_bbox = geom_to_wgs84_bbox(geom_map, QgsProject.instance())
+            self._update_aoi_preview()
+
+        tool = AoiPolygonTool(canvas, _done)
+        canvas.setMapTool(tool)
+        _log(self, "Draw polygon: left-click to add, right-click/Enter/double-click to finish, Esc to cancel.")
+
+    def _clear_aoi(self):
+        self._aoi_bbox = None
+        self._aoi_polygon_wgs84 = None
+        self._update_aoi_preview()
+        self._aoi.clear()
+
+    def _update_aoi_preview(self):
+        if self._aoi_bbox:
+            x1, y1, x2, y2 = self._aoi_bbox
+            self.aoiPreviewLabel.setText(f"AOI (EPSG:4326): ({x1:.6f}, {y1:.6f}, {x2:.6f}, {y2:.6f})")
+        else:
+            self.aoiPreviewLabel.setText("<i>AOI: not set yet</i>")
+
+
+
+    def _open_help(self):
+        try:
+            self.iface.openURL("https://example.com/virtughan-docs")
+        except Exception:
+            QMessageBox.information(self, "VirtuGhan", "Documentation URL not configured yet.")
+
+    def _browse_output(self):
+        path = QFileDialog.getExistingDirectory(self, "Select output folder")
+        if path:
+            self.outputPathEdit.setText(path)
+
+    def _reset_form(self):
+        # Reset common params to defaults
+        if self._common is not None:
+            try:
+                self._common.set_defaults(
+                    start_date=QDate.currentDate().addMonths(-1),
+                    end_date=QDate.currentDate(),
+                    cloud=30,
+                    band1="red",
+                    band2="nir",
+                    formula="(band2-band1)/(band2+band1)",
+                )
+            except Exception:
+                pass
+        else:
+            self._reset_fallback()
+
+        # Reset AOI + UI 
+        self._aoi_bbox = None
+        self._aoi_polygon_wgs84 = None
+        self._update_aoi_preview()
+        self._aoi.clear()
+
+        self.opCombo.setCurrentIndex(7)
+        self.timeseriesCheck.setChecked(False)
+        self.smartFilterCheck.setChecked(False)
+        self.workersSpin.setMinimum(1)
+        if self.workersSpin.value() < 1:
+            self.workersSpin.setValue(1)
+        self.tileSizeSpin.setValue(DEFAULT_TILE_DEG)
+        self.tileOverlapSpin.setValue(0.0)
+        self.int16CopyCheck.setChecked(False)
+        self.outputPathEdit.clear()
+        self._log_queue.clear()
+        self.logText.clear()
+
+  
+    # Collect params / run task
+    def _collect_params(self):
+        # virtughan itself is only imported in the worker process
+        err = missing_module("virtughan")
+        if err:
+            raise RuntimeError(f"VirtughanProcessor import failed: {err}")
+        if not self._aoi_bbox:
+            raise RuntimeError("Please set AOI (Map extent / Draw rectangle / Draw polygon) before running.")
+
+        bbox = lonlat_bbox(self._aoi_bbox)
+        if bbox is None:
+            raise RuntimeError(f"AOI bbox does not look like EPSG:4326: {self._aoi_bbox}")
+
+        p = self._get_common_params()
+
+        sdt = QDate.fromString(p["start_date"], "yyyy-MM-dd")
+        edt = QDate.fromString(p["end_date"], "yyyy-MM-dd")
+        if not sdt.isValid() or not edt.isValid():
+            raise RuntimeError("Please pick valid start/end dates.")
+        if sdt > edt:
+            raise RuntimeError("Start date must be before end date.")
+        if not p.get("formula"):
+            raise RuntimeError("Formula is required.")
+        if not p.get("band1"):
+            raise RuntimeError("Band 1 is required.")
+        err = formula_error(p["formula"], p.get("band2"))
+        if err:
+            raise RuntimeError(err)
+
+        op_txt = (self.opCombo.currentText() or "").strip()
+        operation = None if op_txt == "none" else op_txt
+
+        if (not self.timeseriesCheck.isChecked()) and (operation is None):
+            raise RuntimeError("Operation is required when 'Generate timeseries' is disabled.")
+
+        workers = max(1, int(self.workersSpin.value()))
+        out_base = (self.outputPathEdit.text() or "").strip() or QgsProcessingUtils.tempFolder()
+        out_dir = run_dir(out_base, "virtughan_engine")
+
+        params = dict(
+            bbox=bbox,
+            start_date=p["start_date"],
+            end_date=p["end_date"],
+            cloud_cover=int(p["cloud_cover"]),
+            formula=p["formula"],
+            band1=p["band1"],
+            band2=p.get("band2") or None,
+            operation=operation,
+            timeseries=self.timeseriesCheck.isChecked(),
+            smart_filter=self.smartFilterCheck.isChecked(),
+            workers=workers,
+            tile_deg=float(self.tileSizeSpin.value()),
+            tile_overlap=float(self.tileOverlapSpin.value()),
+            quantize=self.int16CopyCheck.isChecked(),
+            output_dir=out_dir,
+            log_path=str(Path(out_dir, "runtime.log")),
+        )
+        if self._aoi_polygon_wgs84:
+            params["polygon_wgs84"] = self._aoi_polygon_wgs84
+        return params
+
+    def _start_tailing(self, log_path: str):
+        self._current_log_path = log_path
+        self._tailer = _UiLogTailer(log_path, self.logText, interval_ms=400)
+        self._tailer.start()
+
+    def _stop_tailing(self):
+        if self._tailer:
+            self._tailer.stop()
+            self._tailer = None
+        self._current_log_path = None
+
+    def _run_clicked(self):
+        try:
+            params = self._collect_params()
+        except Exception as e:
+            QMessageBox.warning(self, "VirtuGhan", str(e))
+            return
+
+        out_dir = params["output_dir"]
+        try:
+            Path(out_dir).mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            QMessageBox.critical(self, "VirtuGhan", f"Cannot create output folder:\n{out_dir}\n\n{e}")
+            return
+
+        log_path = params["log_path"]
+        _log(self, f"Output: {out_dir}")
+        _log(self, f"Log file: {log_path}")
+
+        try:
+            open(log_path, "a", encoding="utf-8").close()
+        except Exception:
+            pass
+
+        self._set_running(True)
+        self._start_tailing(log_path)
+
+        def _on_done(ok, exc):
+            self._stop_tailing()
+            self._set_running(False)
+            if not ok or exc:
+                _log(self, f"Engine failed: {exc}", Qgis.Critical)
+                QMessageBox.critical(self, "VirtuGhan", f"Engine failed:\n{exc}\n\nSee runtime.log for details.")
+            else:
+                layers = []
+                for entry in iter_rasters(out_dir):
+                    lyr = (QgsRasterLayer(entry.path, entry.name.rpartition(".")[0], "gdal")
+                           if has_raster_signature(entry.path) else None)
+                    if lyr is not None and lyr.isValid():
+                        layers.append(lyr)
+                    else:
+                        _log(self, f"Failed to load raster: {entry.path}", Qgis.Warning)
+                if layers:
+                    # one layersAdded / legend refresh for the whole batch
+                    QgsProject.instance().addMapLayers(layers)
+                    _log(self, "\n".join(f"Loaded raster: {l.source()}" for l in layers))
+                else:
+                    _log(self, "No .tif/.tiff/.vrt files found to load.")
+                QMessageBox.information(self, "VirtuGhan", f"Engine finished.\nOutput: {out_dir}")
+
+        # compute -> finalize (mosaic, unzip); only the layer adds run on the UI thread
+        compute = _VirtughanTask("VirtuGhan Engine: compute", params, log_path)
+        self._current_task = _FinalizeTask("VirtuGhan Engine", compute, on_done=_on_done)
+        QgsApplication.taskManager().addTask(self._current_task)
+
+    def _set_running(self, running: bool):
+        self.progressBar.setVisible(running)
+        self.progressBar.setRange(0, 0 if running else 1)
+        self.runButton.setEnabled(not running)
+        self.resetButton.setEnabled(not running)
+        for w in (self.aoiStartDrawButton, self.aoiClearButton,
+                  self.aoiModeCombo, self.outputBrowseButton):
+            try:
+                w.setEnabled(not running)
+            except Exception:
+                pass
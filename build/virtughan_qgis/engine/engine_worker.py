@@ -0,0 +1,589 @@
+# virtughan_qgis/engine/engine_worker.py
+"""
+Out-of-process execution of VirtughanProcessor.compute().
+
+Kept free of qgis imports so spawned workers can unpickle run_compute()
+without loading QGIS. Each dock keeps its own long-lived pool across runs, so
+the interpreter start-up and virtughan import are paid once, and cancelling
+one dock's job never touches another's workers. Large AOIs are
+split into a tile grid, computed one tile per worker and mosaicked back.
+"""
+import copy
+import functools
+import hashlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from osgeo import gdal
+except Exception:
+    gdal = None
+
+_pools = {}  # name -> (ProcessPoolExecutor, max_workers)
+_pool_lock = threading.Lock()
+
+# side of an AOI tile in degrees; 0 runs the AOI as one job. Tiling is opt-in:
+# every tile repeats the STAC search and scene reads, which only pays off for big AOIs
+DEFAULT_TILE_DEG = 0.0
+
+# STAC search results, keyed by the query; kept in memory per worker and on disk across restarts
+_SCENE_CACHE_DIR = os.path.join(tempfile.gettempdir(), "virtughan_cache")
+_SCENE_CACHE_MAX_AGE_S = 3600
+_scene_memo = {}
+
+# Coalesce the many small HTTP range reads made against remote Sentinel-2 COGs
+REMOTE_READ_OPTIONS = {
+    "GDAL_HTTP_MULTIRANGE": "YES",
+    "GDAL_HTTP_MERGE_CONSECUTIVE_RANGES": "YES",
+    "CPL_VSIL_CURL_CHUNK_SIZE": "1048576",
+    "VSI_CACHE": "TRUE",
+}
+
+_LOG_BUFFER_BYTES = 1 << 20
+_LOG_FLUSH_INTERVAL_S = 0.5
+
+
+@contextmanager
+def gdal_config(**options):
+    """Set GDAL config options for the duration of the block, restoring the previous values.
+
+    Scoped via gdal.SetConfigOption rather than os.environ, so e.g. CPL_DEBUG
+    doesn't stay on for the rest of the session. No-op without osgeo.
+    """
+    if gdal is None:
+        yield
+        return
+    previous = {k: gdal.GetConfigOption(k) for k in options}
+    for k, v in options.items():
+        gdal.SetConfigOption(k, v)
+    try:
+        yield
+    finally:
+        for k, v in previous.items():
+            gdal.SetConfigOption(k, v)
+
+
+@contextmanager
+def open_log(log_path: str):
+    """Append-mode text log behind a 1 MiB buffer.
+
+    Small per-line writes are batched into large write() calls; a background
+    thread flushes twice a second so the dock's log tail stays live.
+    write_through keeps text going straight into the (locked) binary buffer,
+    which makes that cross-thread flush safe.
+    """
+    raw = open(log_path, "ab", buffering=_LOG_BUFFER_BYTES)
+    logf = io.TextIOWrapper(raw, encoding="utf-8", write_through=True)
+    stop = threading.Event()
+
+    def _flusher():
+        while not stop.wait(_LOG_FLUSH_INTERVAL_S):
+            try:
+                raw.flush()
+            except ValueError:  # closed underneath us
+                return
+
+    t = threading.Thread(target=_flusher, name="virtughan-log-flush", daemon=True)
+    t.start()
+    try:
+        yield logf
+    finally:
+        stop.set()
+        t.join()
+        logf.close()
+
+
+def run_compute(params: dict, log_path: str) -> bool:
+    """Run one engine job, appending all output to log_path. Raises on failure."""
+    from virtughan.engine import VirtughanProcessor
+
+    install_scene_cache()
+    Path(params["output_dir"]).mkdir(parents=True, exist_ok=True)
+    debug = "ON" if params.get("gdal_debug") else None
+
+    with open_log(log_path) as logf, \
+            gdal_config(CPL_LOG=log_path, GDAL_HTTP_TIMEOUT="30", CPL_DEBUG=debug,
+                        GDAL_NUM_THREADS=str(params["workers"]), **REMOTE_READ_OPTIONS):
+        logf.write(f"[{datetime.now().isoformat(timespec='seconds')}] Starting VirtughanProcessor\nParams: {params}\n")
+        try:
+            with redirect_stdout(logf), redirect_stderr(logf):
+                proc = VirtughanProcessor(
+                    bbox=params["bbox"],
+                    start_date=params["start_date"],
+                    end_date=params["end_date"],
+                    cloud_cover=params["cloud_cover"],
+                    formula=params["formula"],
+                    band1=params["band1"],
+                    band2=params["band2"],
+                    operation=params["operation"],
+                    timeseries=params["timeseries"],
+                    output_dir=params["output_dir"],
+                    log_file=logf,
+                    cmap="RdYlGn",
+                    workers=params["workers"],
+                    smart_filter=params["smart_filter"],
+                )
+                proc.compute()
+        except Exception:
+            logf.write("[exception]\n" + traceback.format_exc())
+            logf.flush()
+            raise
+        logf.write("compute() finished.\n")
+        if params.get("polygon_wgs84"):
+            masked = mask_outputs(params["output_dir"], params["polygon_wgs84"])
+            logf.write(f"Masked {len(masked)} raster(s) to the AOI polygon\n")
+        if not params.get("is_tile"):
+            # tiles are converted once, when they are mosaicked
+            logf.write("".join(f"Wrote COG: {path}\n" for path in cogify_outputs(params["output_dir"], params.get("quantize", False))))
+    return True
+
+
+def _cached_search(search):
+    """Wrap a STAC search function so repeated identical queries reuse the scene list."""
+    @functools.wraps(search)
+    def wrapper(*args, **kwargs):
+        try:
+            query = json.dumps([args, kwargs], sort_keys=True, default=list)
+        except TypeError:
+            return search(*args, **kwargs)
+        key = hashlib.sha1(query.encode("utf-8")).hexdigest()
+        now = time.time()
+
+        hit = _scene_memo.get(key)
+        if hit is not None and now - hit[0] < _SCENE_CACHE_MAX_AGE_S:
+            return copy.deepcopy(hit[1])
+
+        path = os.path.join(_SCENE_CACHE_DIR, key + ".json")
+        try:
+            mtime = os.path.getmtime(path)
+            if now - mtime < _SCENE_CACHE_MAX_AGE_S:
+                with open(path, "rb") as f:
+                    items = json.load(f)
+                _scene_memo[key] = (mtime, items)
+                return copy.deepcopy(items)
+        except (OSError, ValueError):
+            pass
+
+        items = search(*args, **kwargs)
+        _scene_memo[key] = (now, items)
+        try:
+            os.makedirs(_SCENE_CACHE_DIR, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(items, f)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError):
+            pass
+        return copy.deepcopy(items)
+
+    wrapper._virtughan_cached = True
+    return wrapper
+
+
+def install_scene_cache():
+    """Route virtughan.engine's STAC search through _cached_search (idempotent).
+
+    Runs that only change the operation, formula or timeseries flag then skip the
+    catalog query. No-op if this virtughan version doesn't expose search_stac_api.
+    """
+    try:
+        import virtughan.engine as engine
+    except Exception:
+        return
+    search = getattr(engine, "search_stac_api", None)
+    if search is None or getattr(search, "_virtughan_cached", False):
+        return
+    engine.search_stac_api = _cached_search(search)
+
+
+def _init_worker():
+    """Pool initializer: pay the heavy imports once per worker, not once per job."""
+    # workers are our own processes, so a bigger block cache doesn't affect the QGIS session
+    os.environ.setdefault("GDAL_CACHEMAX", "512")
+    for name in ("numpy", "rasterio", "pyproj", "virtughan.engine"):
+        try:
+            __import__(name)
+        except Exception:
+            pass
+    install_scene_cache()
+
+
+def _python_executable():
+    """Interpreter for spawned workers (inside QGIS sys.executable may be the QGIS binary)."""
+    exe = sys.executable or ""
+    if os.path.basename(exe).lower().startswith("python"):
+        return exe
+    names = ("python.exe",) if os.name == "nt" else ("bin/python3", "bin/python")
+    for name in names:
+        cand = os.path.join(sys.exec_prefix, name)
+        if os.path.isfile(cand):
+            return cand
+    return None
+
+
+def get_pool(max_workers: int = 1, name: str = "engine"):
+    """Return the named worker pool, creating it on first use; None if workers can't be spawned.
+
+    Pools are kept per caller (the engine and extractor docks each run one job at a
+    time), so killing one on cancel leaves the other's jobs alone. A pool is
+    recreated when more workers are asked for than it currently has.
+    """
+    with _pool_lock:
+        pool, size = _pools.get(name, (None, 0))
+        if pool is not None and size < max_workers:
+            pool.shutdown(wait=False)
+            pool = None
+        if pool is None:
+            exe = _python_executable()
+            if exe is None:
+                return None
+            # never fork the QGIS process; spawn a clean interpreter instead
+            ctx = multiprocessing.get_context("spawn")
+            ctx.set_executable(exe)
+            size = max(1, max_workers)
+            pool = ProcessPoolExecutor(max_workers=size, mp_context=ctx,
+                                       initializer=_init_worker)
+            _pools[name] = (pool, size)
+        return pool
+
+
+def no_pool_error(log_path: str) -> RuntimeError:
+    """Error for when get_pool() returned None, also appended to log_path.
+
+    Jobs are never run inside QGIS as a fallback: run_compute/run_extract redirect
+    stdout/stderr and set GDAL config options, all of which are process-wide.
+    """
+    msg = ("No standalone Python interpreter was found next to QGIS to run VirtuGhan "
+           f"worker processes (looked in {sys.exec_prefix}).")
+    try:
+        with open(log_path, "a", encoding="utf-8") as logf:
+            logf.write(f"[exception] {msg}\n")
+    except OSError:
+        pass
+    return RuntimeError(msg)
+
+
+def shutdown_pool(kill: bool = False, name: str | None = None):
+    """Drop the named pool, or every pool when name is None (plugin unload).
+
+    kill=True terminates running jobs (used for cancel/unload).
+    """
+    with _pool_lock:
+        names = list(_pools) if name is None else [name]
+        pools = [_pools.pop(n)[0] for n in names if n in _pools]
+    for pool in pools:
+        if kill:
+            for p in list(getattr(pool, "_processes", {}).values()):
+                try:
+                    p.terminate()
+                except Exception:
+                    pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def tile_bbox(bbox, tile_deg: float, overlap: float = 0.0):
+    """Split a lon/lat bbox into a row-major grid of equal sub-bboxes no larger than tile_deg.
+
+    overlap pads every tile on each side (clipped to bbox) so edge pixels see their neighbours.
+    """
+    x0, y0, x1, y1 = bbox
+    if tile_deg <= 0:
+        return [(x0, y0, x1, y1)]
+    nx = max(1, math.ceil((x1 - x0) / tile_deg))
+    ny = max(1, math.ceil((y1 - y0) / tile_deg))
+    dx, dy = (x1 - x0) / nx, (y1 - y0) / ny
+    return [
+        (max(x0, x0 + i * dx - overlap), max(y0, y0 + j * dy - overlap),
+         x1 if i == nx - 1 else min(x1, x0 + (i + 1) * dx + overlap),
+         y1 if j == ny - 1 else min(y1, y0 + (j + 1) * dy + overlap))
+        for j in range(ny) for i in range(nx)
+    ]
+
+
+def tile_jobs(params: dict):
+    """Per-tile copies of params, or [] when the job should run as one piece.
+
+    Timeseries runs are not tiled (their GIF/PNG frames can't be mosaicked),
+    nor is anything without osgeo available for the mosaic step.
+    """
+    if params.get("timeseries") or gdal is None:
+        return []
+    tiles = tile_bbox(params["bbox"], params.get("tile_deg", DEFAULT_TILE_DEG),
+                      params.get("tile_overlap", 0.0))
+    if len(tiles) < 2:
+        return []
+    jobs = []
+    for i, sub in enumerate(tiles):
+        tile_dir = Path(params["output_dir"], f"tile_{i}")
+        jobs.append(dict(params, bbox=list(sub), workers=1, is_tile=True,
+                         output_dir=str(tile_dir), log_path=str(tile_dir / "runtime.log")))
+    return jobs
+
+
+def merge_tile_logs(jobs, log_path: str):
+    """Append each tile's runtime.log to log_path in tile order, removing the tile logs.
+
+    Tiles run concurrently, so each writes its own log; merging them afterwards keeps
+    the main log readable instead of interleaving lines from several workers.
+    """
+    with open(log_path, "ab") as out:
+        for i, p in enumerate(jobs):
+            tile_log = p["log_path"]
+            try:
+                with open(tile_log, "rb") as f:
+                    out.write(f"--- tile {i + 1}/{len(jobs)} ---\n".encode())
+                    shutil.copyfileobj(f, out)
+            except FileNotFoundError:
+                continue
+            try:
+                os.remove(tile_log)
+            except OSError:
+                pass
+
+
+def _srs_groups(paths):
+    """Split rasters by CRS, largest group first; a VRT can only mosaic one CRS."""
+    groups = {}
+    for p in paths:
+        ds = gdal.Open(p)
+        if ds is None:
+            continue
+        groups.setdefault(ds.GetProjection(), []).append(p)
+        ds = None
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+def mosaic_tiles(tile_dirs, out_dir: str, quantize: bool = False):
+    """Merge same-named GeoTIFFs from tile_dirs into out_dir; returns the mosaics written.
+
+    Tiles in a CRS other than the majority (e.g. across a UTM zone boundary) get a
+    separate "<name>_crs<k>" mosaic. Only sources that made it into a written mosaic
+    are deleted; anything BuildVRT skipped stays in its tile folder. With quantize,
+    eligible mosaics also get an Int16 sibling (see write_int16_copy).
+    """
+    by_name = {}
+    for d in tile_dirs:
+        try:
+            it = os.scandir(d)
+        except FileNotFoundError:
+            continue
+        with it:
+            for e in it:
+                if e.is_file() and e.name.lower().endswith((".tif", ".tiff")):
+                    by_name.setdefault(e.name, []).append(e.path)
+
+    written = []
+    for name, all_paths in by_name.items():
+        stem, ext = os.path.splitext(name)
+        for k, paths in enumerate(_srs_groups(all_paths)):
+            dst = os.path.join(out_dir, name if k == 0 else f"{stem}_crs{k}{ext}")
+            vrt_path = f"/vsimem/virtughan_{os.getpid()}_{k}_{name}.vrt"
+            vrt = gdal.BuildVRT(vrt_path, paths)
+            if vrt is None:
+                continue
+            try:
+                # non-strict BuildVRT drops sources it can't use with only a warning
+                used = set(vrt.GetFileList() or ()) & set(paths)
+                ok = _write_cog(dst, vrt)
+            finally:
+                vrt = None
+                gdal.Unlink(vrt_path)
+            if not ok:
+                continue
+            _write_stats(dst)
+            written.append(dst)
+            copy = write_int16_copy(dst) if quantize else None
+            if copy:
+                written.append(copy)
+            for src in used:
+                try:
+                    os.remove(src)
+                except OSError:
+                    pass
+    return written
+
+
+_OVERVIEW_LEVELS = [2, 4, 8, 16, 32]
+
+# Opt-in compact copies of Float32 index rasters (NDVI etc.): Int16 * 1e-4, written
+# next to the Float32 original as "<name>_int16.tif" when every value fits
+INT16_SUFFIX = "_int16"
+_INT16_SCALE = 1e-4
+_INT16_LIMIT = 32767 * _INT16_SCALE
+_INT16_NODATA = -32768
+
+
+def _int16_vrt(src_ds):
+    """In-memory VRT of a Float32 raster quantized to Int16 with scale 1e-4, or None.
+
+    Only used when every band declares nodata (so it maps onto _INT16_NODATA) and
+    all values lie within +/-3.2767; anything else, e.g. raw reflectance, gets no copy.
+    """
+    bands = [src_ds.GetRasterBand(i) for i in range(1, src_ds.RasterCount + 1)]
+    if not bands or any(b.DataType != gdal.GDT_Float32 or b.GetNoDataValue() is None for b in bands):
+        return None
+    try:
+        for b in bands:
+            lo, hi = b.ComputeRasterMinMax(False)
+            if lo < -_INT16_LIMIT or hi > _INT16_LIMIT:
+                return None
+    except (RuntimeError, TypeError):  # all-nodata band
+        return None
+    vrt = gdal.Translate("", src_ds, format="VRT", outputType=gdal.GDT_Int16,
+                         scaleParams=[[-_INT16_LIMIT, _INT16_LIMIT, -32767, 32767]],
+                         noData=_INT16_NODATA)
+    if vrt is None:
+        return None
+    for i in range(1, vrt.RasterCount + 1):
+        band = vrt.GetRasterBand(i)
+        band.SetScale(_INT16_SCALE)
+        band.SetOffset(0.0)
+    return vrt
+
+
+def write_int16_copy(path: str) -> str | None:
+    """Write "<stem>_int16.tif" next to a Float32 raster, scaled as in _int16_vrt.
+
+    The copy halves the bytes QGIS reads while rendering but is lossy (1e-4 steps),
+    so the Float32 original is always kept. Returns the copy's path, or None when
+    the raster is not eligible.
+    """
+    src_ds = gdal.Open(path)
+    if src_ds is None:
+        return None
+    vrt = _int16_vrt(src_ds)
+    if vrt is None:
+        return None
+    stem, _ = os.path.splitext(path)
+    dst = f"{stem}{INT16_SUFFIX}.tif"
+    try:
+        ok = _write_cog(dst, vrt)
+    finally:
+        vrt = src_ds = None
+    if not ok:
+        return None
+    _write_stats(dst)
+    return dst
+
+
+def _write_cog(dst: str, src) -> bool:
+    """Write src (path or dataset) to dst as a Cloud-Optimized GeoTIFF with overviews.
+
+    Falls back to a tiled GeoTIFF plus BuildOverviews on GDAL builds without the
+    COG driver.
+    """
+    if gdal.GetDriverByName("COG") is not None:
+        ds = gdal.Translate(dst, src, format="COG", creationOptions=[
+            "COMPRESS=DEFLATE", "PREDICTOR=YES", "BLOCKSIZE=512",
+            "BIGTIFF=IF_SAFER", "OVERVIEWS=IGNORE_EXISTING", "NUM_THREADS=ALL_CPUS",
+        ])
+        ok = ds is not None
+        ds = None
+        return ok
+    ds = gdal.Translate(dst, src, format="GTiff", creationOptions=[
+        "TILED=YES", "BLOCKXSIZE=512", "BLOCKYSIZE=512",
+        "COMPRESS=DEFLATE", "BIGTIFF=IF_SAFER",
+    ])
+    if ds is None:
+        return False
+    ds.BuildOverviews("AVERAGE", _OVERVIEW_LEVELS)
+    ds = None
+    return True
+
+
+def _write_stats(path: str):
+    """Store approximate per-band statistics in the .aux.xml sidecar (GDAL PAM).
+
+    QGIS's GDAL provider picks these up when styling the layer, so adding it
+    doesn't trigger a statistics scan on the UI thread. Overviews make the
+    approximate pass cheap.
+    """
+    ds = gdal.Open(path)
+    if ds is None:
+        return
+    try:
+        for i in range(1, ds.RasterCount + 1):
+            ds.GetRasterBand(i).ComputeStatistics(True)
+    except RuntimeError:
+        pass
+    ds = None  # closing flushes the PAM sidecar
+
+
+def mask_outputs(out_dir: str, ring) -> list:
+    """Set pixels outside the AOI polygon (a WGS84 [[lon, lat], ...] ring) to nodata.
+
+    The polygon is rasterized once per GeoTIFF by GDAL's scanline filler (reprojected
+    to the raster's CRS on the fly), instead of a point-in-polygon test per pixel.
+    Rasters without nodata are only masked when they are floating point (NaN).
+    """
+    if gdal is None or len(ring) < 4:
+        return []
+    vec_path = f"/vsimem/virtughan_aoi_{os.getpid()}_{threading.get_ident()}.geojson"
+    gdal.FileFromMemBuffer(vec_path, json.dumps({"type": "Polygon", "coordinates": [ring]}))
+    done = []
+    try:
+        vec = gdal.OpenEx(vec_path, gdal.OF_VECTOR)
+        if vec is None:
+            return []
+        with os.scandir(out_dir) as it:
+            tifs = [e.path for e in it if e.is_file() and e.name.lower().endswith((".tif", ".tiff"))]
+        for path in tifs:
+            ds = gdal.Open(path, gdal.GA_Update)
+            if ds is None or ds.RasterCount == 0:
+                continue
+            bands = [ds.GetRasterBand(i) for i in range(1, ds.RasterCount + 1)]
+            nodata = bands[0].GetNoDataValue()
+            if nodata is None:
+                if bands[0].DataType not in (gdal.GDT_Float32, gdal.GDT_Float64):
+                    continue
+                nodata = float("nan")
+                for b in bands:
+                    b.SetNoDataValue(nodata)
+            if gdal.Rasterize(ds, vec, bands=list(range(1, ds.RasterCount + 1)),
+                              burnValues=[nodata] * ds.RasterCount, inverse=True):
+                done.append(path)
+            ds = None
+    finally:
+        vec = None
+        gdal.Unlink(vec_path)
+    return done
+
+
+def cogify_outputs(out_dir: str, quantize: bool = False):
+    """Rewrite the GeoTIFFs directly in out_dir as COGs in place; returns the paths written.
+
+    With quantize, eligible rasters also get an Int16 sibling (see write_int16_copy).
+    """
+    if gdal is None:
+        return []
+    done = []
+    with os.scandir(out_dir) as it:
+        tifs = [e.path for e in it if e.is_file() and e.name.lower().endswith((".tif", ".tiff"))
+                and not os.path.splitext(e.name)[0].endswith(INT16_SUFFIX)]
+    for path in tifs:
+        tmp = path + ".cog.tmp"
+        try:
+            if _write_cog(tmp, path):
+                os.replace(tmp, path)
+                _write_stats(path)
+                done.append(path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        copy = write_int16_copy(path) if quantize else None
+        if copy:
+            done.append(copy)
+    return done
@@ -0,0 +1,468 @@
+# virtughan_qgis/extractor/extractor_widget.py
+import os
+from pathlib import Path
+from concurrent.futures import TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from qgis.core import (
+    Qgis,
+    QgsApplication,
+    QgsGeometry,
+    QgsMessageLog,
+    QgsProcessingUtils,
+    QgsProject,
+    QgsRasterLayer,
+    QgsRectangle,
+    QgsTask,
+)
+from qgis.gui import QgsMapCanvas
+from qgis.PyQt import uic
+from qgis.PyQt.QtCore import QDate
+from qgis.PyQt.QtWidgets import (
+    QDockWidget,
+    QFileDialog,
+    QMessageBox,
+    QVBoxLayout,
+    QWidget,
+)
+
+from ..common.aoi import (
+    AoiManager,
+    AoiRectTool,
+    AoiPolygonTool,
+    rect_to_wgs84_bbox,
+    geom_to_wgs84_bbox,
+    geom_to_wgs84_ring,
+    lonlat_bbox,
+)
+from ..common.common_logic import has_raster_signature, iter_rasters, missing_module, run_dir
+from ..common.log_queue import LogQueue
+from ..engine.engine_worker import get_pool, no_pool_error, shutdown_pool
+from .extractor_worker import run_extract
+
+COMMON_IMPORT_ERROR = None
+CommonParamsWidget = None
+try:
+    from ..common.common_widget import CommonParamsWidget
+except Exception as _e:
+    COMMON_IMPORT_ERROR = _e
+    CommonParamsWidget = None
+
+UI_PATH = os.path.join(os.path.dirname(__file__), "extractor_form.ui")
+FORM_CLASS, _ = uic.loadUiType(UI_PATH)
+
+
+def _log(widget, msg, level=Qgis.Info):
+    QgsMessageLog.logMessage(str(msg), "VirtuGhan", level)
+    try:
+        # coalesced into one append per tick; errors show up immediately
+        widget._log_queue.append(str(msg), urgent=level == Qgis.Critical)
+    except Exception:
+        pass
+
+
+class _ExtractorTask(QgsTask):
+    """Runs ExtractProcessor.extract() in the extractor's own worker pool; cancel terminates the job."""
+    def __init__(self, desc, params, log_path, on_done=None):
+        super().__init__(desc, QgsTask.CanCancel)
+        self.params = params
+        self.log_path = log_path
+        self.on_done = on_done
+        self.exc = None
+
+    def run(self):
+        try:
+            pool = get_pool(name="extractor")
+            if pool is None:
+                raise no_pool_error(self.log_path)
+            fut = pool.submit(run_extract, self.params, self.log_path)
+            while True:
+                try:
+                    return fut.result(timeout=0.5)
+                except FuturesTimeout:
+                    if self.isCanceled():
+                        shutdown_pool(kill=True, name="extractor")
+                        self.exc = RuntimeError("Canceled by user.")
+                        return False
+        except BrokenProcessPool as e:
+            shutdown_pool(name="extractor")
+            self.exc = e
+            try:
+                with open(self.log_path, "a", encoding="utf-8", buffering=1) as logf:
+                    logf.write(f"[exception] extractor worker process died: {e}\n")
+            except Exception:
+                pass
+            return False
+        except Exception as e:
+            # run_extract (or no_pool_error) already wrote the error to runtime.log
+            self.exc = e
+            return False
+
+    def finished(self, ok):
+        if self.on_done:
+            try:
+                self.on_done(ok, self.exc)
+            except Exception:
+                pass
+
+
+class ExtractorDockWidget(QDockWidget):
+    def __init__(self, iface):
+        super().__init__("VirtuGhan • Extractor", iface.mainWindow())
+        self.iface = iface
+        self.setObjectName("VirtuGhanExtractorDock")
+
+        self.ui_root = QWidget(self)
+        self._form_owner = FORM_CLASS()
+        self._form_owner.setupUi(self.ui_root)
+        self.setWidget(self.ui_root)
+
+        # setupUi binds every named widget on the form owner; no tree walk needed
+        ui = self._form_owner
+        f = lambda name: getattr(ui, name, None)
+        self.progressBar = f("progressBar")
+        self.runButton = f("runButton")
+        self.resetButton = f("resetButton")
+        self.helpButton = f("helpButton")
+        self.logText = f("logText")
+        self._log_queue = LogQueue(self.logText) if self.logText is not None else None
+        self.commonHost = f("commonParamsContainer")
+
+        self.aoiModeCombo = f("aoiModeCombo")
+        self.aoiUseCanvasButton = f("aoiUseCanvasButton")
+        self.aoiStartDrawButton = f("aoiStartDrawButton")
+        self.aoiClearButton = f("aoiClearButton")
+        self.aoiPreviewLabel = f("aoiPreviewLabel")
+
+        self.workersSpin = f("workersSpin")
+        self.outputPathEdit = f("outputPathEdit")
+        self.outputBrowseButton = f("outputBrowseButton")
+
+        self.bandsListWidget = f("bandsListWidget")
+        self.zipOutputCheck = f("zipOutputCheck")
+        self.smartFilterCheck = f("smartFilterCheck")
+
+        # AOI state
+        self._aoi_bbox = None               # (lonmin, latmin, lonmax, latmax) (WGS84), hashable
+        self._aoi_polygon_wgs84 = None      # optional [[lon,lat], ...]
+        self._aoi = AoiManager(self.iface)  # shared AOI memory layer manager
+        self._prev_tool = None
+
+        self._init_common_widget()
+        self.progressBar.setVisible(False)
+        if self.workersSpin.value() < 1:
+            self.workersSpin.setValue(1)
+
+        # AOI: unifying to 3 options, single action button
+        self.aoiModeCombo.clear()
+        self.aoiModeCombo.addItems(["Map extent", "Draw rectangle", "Draw polygon"])
+        self.aoiUseCanvasButton.setVisible(False)  # hide legacy button
+
+        self.aoiStartDrawButton.clicked.connect(self._aoi_action_clicked)
+        self.aoiClearButton.clicked.connect(self._clear_aoi)
+        self.aoiModeCombo.currentTextChanged.connect(self._aoi_mode_changed)
+
+        self.outputBrowseButton.clicked.connect(self._browse_output)
+        self.resetButton.clicked.connect(self._reset_form)
+        self.runButton.clicked.connect(self._run_clicked)
+        self.helpButton.clicked.connect(self._open_help)
+
+        self._update_aoi_preview()
+        self._aoi_mode_changed(self.aoiModeCombo.currentText())
+
+        self._current_task = None
+        self._current_log_path = None
+
+    def _init_common_widget(self):
+        if CommonParamsWidget:
+            self.commonWidget = CommonParamsWidget(parent=self.commonHost)
+            layout = self.commonHost.layout() or QVBoxLayout(self.commonHost)
+            layout.setContentsMargins(0, 0, 0, 0)
+            layout.addWidget(self.commonWidget)
+
+            # Hide fields that don't apply to Extractor
+            self._hide_bands_and_formula()
+        else:
+            self.commonWidget = None
+            _log(self, f"CommonParamsWidget failed: {COMMON_IMPORT_ERROR}", Qgis.Warning)
+
+
+    def _hide_bands_and_formula(self):
+        """Hide Band 1, Band 2, and Formula widgets from CommonParamsWidget."""
+        w = getattr(self, "commonWidget", None)
+        if not w:
+            return
+
+        # These names must match the name in .ui:
+        names = ("labelBand1", "band1Combo",
+                "labelBand2", "band2Combo",
+                "labelFormula", "formulaEdit",
+                "hintLabel")
+
+        for name in names:
+            child = getattr(w, name, None)
+            if child:
+                child.hide()
+
+        # Optional: nudge layouts to recompute sizes
+        try:
+            w.updateGeometry()
+            self.ui_root.adjustSize()
+        except Exception:
+            pass
+
+
+
+    def _get_common_params(self):
+        if self.commonWidget:
+            return self.commonWidget.get_params()
+        return {}
+
+    def _aoi_mode_changed(self, text):
+        t = (text or "").lower()
+        if "extent" in t:
+            self.aoiStartDrawButton.setText("Use Canvas Extent")
+            self.aoiStartDrawButton.setToolTip("Capture current map canvas extent")
+        elif "rectangle" in t:
+            self.aoiStartDrawButton.setText("Draw Rectangle")
+            self.aoiStartDrawButton.setToolTip("Press, drag, release to draw a rectangle")
+        else:
+            self.aoiStartDrawButton.setText("Draw Polygon")
+            self.aoiStartDrawButton.setToolTip("Left-click to add vertices; right-click/Enter/double-click to finish")
+
+    def _aoi_action_clicked(self):
+        mode = (self.aoiModeCombo.currentText() or "").lower()
+        if "extent" in mode:
+            self._use_canvas_extent()
+        elif "rectangle" in mode:
+            self._start_draw_rectangle()
+        else:
+            self._start_draw_polygon()
+
+    def _use_canvas_extent(self):
+        canvas: QgsMapCanvas = self.iface.mapCanvas()
+        if not canvas or not canvas.extent():
+            QMessageBox.warning(self, "VirtuGhan", "No map canvas extent available.")
+            return
+
+        rect = canvas.extent()
+        # visible AOI (map CRS)
+        self._aoi.replace_geometry(QgsGeometry.fromRect(rect))
+        # processing bbox (WGS84)
+        self._aoi_bbox = rect_to_wgs84_bbox(rect, QgsProject.instance())
+        self._aoi_polygon_wgs84 = None
+        self._update_aoi_preview()
+
+    def _start_draw_rectangle(self):
+        canvas: QgsMapCanvas = self.iface.mapCanvas()
+        if not canvas:
+            QMessageBox.warning(self, "VirtuGhan", "Map canvas not available.")
+            return
+
+        self._prev_tool = canvas.mapTool()
+
+        def _finish(rect: QgsRectangle | None):
+            try:
+                canvas.setMapTool(self._prev_tool)
+            except Exception:
+                pass
+            if not rect or rect.isEmpty():
+                _log(self, "AOI rectangle drawing canceled.")
+                return
+
+            self._aoi.replace_geometry(QgsGeometry.fromRect(rect))
+            self._aoi_bbox = rect_to_wgs84_bbox(rect, QgsProject.instance())
+            self._aoi_polygon_wgs84 = None
+            self._update_aoi_preview()
+
+        tool = AoiRectTool(canvas, _finish)
+        canvas.setMapTool(tool)
+        _log(self, "Draw rectangle: press, drag, release to finish. Esc to cancel.")
+
+    def _start_draw_polygon(self):
+        canvas: QgsMapCanvas = self.iface.mapCanvas()
+        if not canvas:
+            QMessageBox.warning(self, "VirtuGhan", "Map canvas not available.")
+            return
+
+        self._prev_tool = canvas.mapTool()
+
+        def _done(geom_map: QgsGeometry | None):
+            try:
+                canvas.setMapTool(self._prev_tool)
+            except Exception:
+                pass
+            if geom_map is None or geom_map.isEmpty():
+                _log(self, "AOI polygon drawing canceled.")
+                return
+
+            self._aoi.replace_geometry(geom_map)
+            coords = geom_to_wgs84_ring(geom_map, QgsProject.instance())
+            self._aoi_polygon_wgs84 = coords
+            if coords:
+                # bbox straight from the already-transformed ring; no second geometry transform
+                lons = [c[0] for c in coords]
+                lats = [c[1] for c in coords]
+                self._aoi_bbox = (min(lons), min(lats), max(lons), max(lats))
+            else:
+                self._aoi_bbox = geom_to_wgs84_bbox(geom_map, QgsProject.instance())
+            self._update_aoi_preview()
+
+        tool = AoiPolygonTool(canvas, _done)
+        canvas.setMapTool(tool)
+        _log(self, "Draw polygon: left-click to add, right-click/Enter/double-click to finish, Esc to cancel.")
+
+    def _clear_aoi(self):
+        self._aoi_bbox = None
+        self._aoi_polygon_wgs84 = None
+        self._update_aoi_preview("AOI: not set yet")
+        try:
+            self._aoi.clear()
+        except Exception:
+            pass
+
+    def _update_aoi_preview(self, text=None):
+        if text:
+            self.aoiPreviewLabel.setText(text)
+            return
+        if self._aoi_bbox:
+            x1, y1, x2, y2 = self._aoi_bbox
+            self.aoiPreviewLabel.setText(
+                f"AOI (EPSG:4326): ({x1:.6f}, {y1:.6f}, {x2:.6f}, {y2:.6f})"
+            )
+        else:
+            self.aoiPreviewLabel.setText("<i>AOI: not set yet</i>")
+
+    def _open_help(self):
+        QMessageBox.information(self, "Help", "VirtuGhan Extractor Help coming soon.")
+
+    def _browse_output(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Output Folder")
+        if folder:
+            self.outputPathEdit.setText(folder)
+
+    def _reset_form(self):
+        self._aoi_bbox = None
+        self._aoi_polygon_wgs84 = None
+        self._update_aoi_preview("AOI: not set yet")
+        try:
+            self._aoi.clear()
+        except Exception:
+            pass
+        if self.commonWidget and hasattr(self.commonWidget, "reset"):
+            try:
+                self.commonWidget.reset()
+            except Exception:
+                pass
+
+    def _collect_params(self):
+        # virtughan itself is only imported in the worker process
+        err = missing_module("virtughan")
+        if err:
+            raise RuntimeError(f"Extractor backend import failed: {err}")
+        if not self._aoi_bbox:
+            raise RuntimeError("Please set AOI before running.")
+
+        b = self._aoi_bbox
+        try:
+            bbox = lonlat_bbox(tuple(map(float, b)))
+        except Exception:
+            raise RuntimeError(f"AOI bbox must be four numbers: {b}")
+        if bbox is None:
+            raise RuntimeError(f"Invalid AOI bbox (WGS84): {b}")
+
+        p = self._get_common_params()
+        sdt = QDate.fromString(p["start_date"], "yyyy-MM-dd")
+        edt = QDate.fromString(p["end_date"], "yyyy-MM-dd")
+        if not sdt.isValid() or not edt.isValid():
+            raise RuntimeError("Please pick valid start/end dates.")
+        if sdt > edt:
+            raise RuntimeError("Start date must be before end date.")
+
+        selected_items = self.bandsListWidget.selectedItems()
+        bands_list = [i.text().strip() for i in selected_items if i.text().strip()]
+        if not bands_list:
+            raise RuntimeError("Please select at least one band to extract.")
+
+        zip_out = self.zipOutputCheck.isChecked()
+        smart = self.smartFilterCheck.isChecked()
+
+        workers = max(1, int(self.workersSpin.value()))
+        out_base = (
+            self.outputPathEdit.text() or ""
+        ).strip() or QgsProcessingUtils.tempFolder()
+        out_dir = run_dir(out_base, "virtughan_extractor")
+
+        params = dict(
+            bbox=bbox,
+            start_date=p["start_date"],
+            end_date=p["end_date"],
+            cloud_cover=int(p["cloud_cover"]),
+            bands_list=bands_list,
+            zip_output=zip_out,
+            smart_filter=smart,
+            workers=workers,
+            output_dir=out_dir,
+            log_path=str(Path(out_dir, "runtime.log")),
+        )
+
+        if self._aoi_polygon_wgs84:
+            params["polygon_wgs84"] = self._aoi_polygon_wgs84
+
+        return params
+
+    def _run_clicked(self):
+        try:
+            params = self._collect_params()
+        except Exception as e:
+            QMessageBox.warning(self, "VirtuGhan", str(e))
+            return
+
+        out_dir = params["output_dir"]
+        try:
+            Path(out_dir).mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            QMessageBox.critical(
+                self, "VirtuGhan", f"Cannot create output folder:\n{out_dir}\n\n{e}"
+            )
+            return
+
+        log_path = params["log_path"]
+        _log(self, f"Output: {out_dir}")
+        _log(self, f"Log file: {log_path}")
+        try:
+            open(log_path, "a", encoding="utf-8").close()
+        except Exception:
+            pass
+
+        def _on_done(ok, exc):
+            if not ok or exc:
+                _log(self, f"Extractor failed: {exc}", Qgis.Critical)
+                QMessageBox.critical(
+                    self,
+                    "VirtuGhan",
+                    f"Extractor failed:\n{exc}\n\nSee runtime.log for details.",
+                )
+            else:
+                layers = []
+                for entry in iter_rasters(out_dir):
+                    lyr = (QgsRasterLayer(entry.path, entry.name.rpartition(".")[0], "gdal")
+                           if has_raster_signature(entry.path) else None)
+                    if lyr is not None and lyr.isValid():
+                        layers.append(lyr)
+                    else:
+                        _log(self, f"Failed to load raster: {entry.path}", Qgis.Warning)
+                if layers:
+                    # one layersAdded / legend refresh for the whole batch
+                    QgsProject.instance().addMapLayers(layers)
+                    _log(self, "\n".join(f"Loaded raster: {l.source()}" for l in layers))
+                else:
+                    _log(self, "No raster files found to load.")
+                QMessageBox.information(
+                    self, "VirtuGhan", f"Extractor finished.\nOutput: {out_dir}"
+                )
+
+        self._current_task = _ExtractorTask(
+            "VirtuGhan Extractor", params, log_path, on_done=_on_done
+        )
+        QgsApplication.taskManager().addTask(self._current_task)
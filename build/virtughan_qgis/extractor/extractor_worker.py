@@ -0,0 +1,46 @@
+# virtughan_qgis/extractor/extractor_worker.py
+"""
+Out-of-process execution of ExtractProcessor.extract().
+
+Like engine_worker, kept free of qgis imports so it can run in its own
+spawn-based worker pool (engine_worker.get_pool(name="extractor")) instead of a
+QGIS thread.
+"""
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+from ..engine.engine_worker import REMOTE_READ_OPTIONS, gdal_config, open_log
+
+
+def run_extract(params: dict, log_path: str) -> bool:
+    """Run one extractor job, appending all output to log_path. Raises on failure."""
+    from virtughan.extract import ExtractProcessor
+
+    Path(params["output_dir"]).mkdir(parents=True, exist_ok=True)
+
+    with open_log(log_path) as logf, \
+            gdal_config(GDAL_HTTP_TIMEOUT="30", **REMOTE_READ_OPTIONS):
+        logf.write(f"[{datetime.now().isoformat(timespec='seconds')}] Starting Extractor\nParams: {params}\n")
+        try:
+            with redirect_stdout(logf), redirect_stderr(logf):
+                extr = ExtractProcessor(
+                    bbox=params["bbox"],
+                    start_date=params["start_date"],
+                    end_date=params["end_date"],
+                    cloud_cover=params["cloud_cover"],
+                    bands_list=params["bands_list"],
+                    output_dir=params["output_dir"],
+                    log_file=logf,
+                    workers=params["workers"],
+                    zip_output=params["zip_output"],
+                    smart_filter=params["smart_filter"],
+                )
+                extr.extract()
+        except Exception:
+            logf.write("[exception]\n" + traceback.format_exc())
+            logf.flush()
+            raise
+        logf.write("Extractor finished.\n")
+    return True
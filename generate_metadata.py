@@ -1,37 +1,173 @@
 #!/usr/bin/env python3
 
-import tomllib
+import functools
+import re
+import sys
 from pathlib import Path
 
-def generate_metadata():
-    """Generate QGIS metadata.txt from pyproject.toml"""
-    
-    with open("pyproject.toml", "rb") as f:
-        config = tomllib.load(f)
-    
+_SCANNED_TABLES = {
+    "project": ("project",),
+    "project.urls": ("project", "urls"),
+    "tool.qgis-plugin": ("tool", "qgis-plugin"),
+}
+_INLINE_TABLE = re.compile(r"\{([^}]*)\}")
+_INLINE_PAIR = re.compile(r'([A-Za-z0-9_-]+)\s*=\s*"([^"\\]*)"')
+
+TEMPLATE = (
+    "[general]\n"
+    "name={name}\n"
+    "description={description}\n"
+    "about={about}\n"
+    "version={version}\n"
+    "qgisMinimumVersion={qgis_minimum_version}\n"
+    "author={author}\n"
+    "email={email}\n"
+    "category={category}\n"
+    "icon={icon}\n"
+    "homepage={homepage}\n"
+    "tracker={tracker}\n"
+    "repository={repository}\n"
+    "experimental={experimental}\n"
+    "deprecated={deprecated}\n"
+)
+
+
+def _scalar(raw):
+    if raw in ("true", "false"):
+        return raw == "true"
+    if len(raw) >= 2 and raw[0] == raw[-1] == '"' and '"' not in raw[1:-1] and "\\" not in raw:
+        return raw[1:-1]
+    raise ValueError(f"Unsupported TOML value: {raw}")
+
+
+def _parse_authors(text):
+    return [dict(_INLINE_PAIR.findall(body)) for body in _INLINE_TABLE.findall(text)]
+
+
+def _scan_pyproject(path):
+    """Read only the pyproject.toml keys metadata.txt needs, without a full TOML parse.
+
+    Raises ValueError on anything outside that subset so the caller can fall back to tomllib.
+    """
+    config = {}
+    table = None
+    pending = None  # (key, lines) while inside a multi-line array
+
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if pending is not None:
+            if line.startswith("]"):
+                key, lines = pending
+                if table is not None and key == "authors":
+                    table["authors"] = _parse_authors(" ".join(lines))
+                pending = None
+            else:
+                pending[1].append(line)
+            continue
+        if not line or line.startswith("#"):
+            continue
+
+        if line.startswith("[["):
+            table = None
+            if line.strip("[]").strip() == "project.authors":
+                table = {}
+                config.setdefault("project", {}).setdefault("authors", []).append(table)
+            continue
+        if line.startswith("["):
+            table = None
+            parts = _SCANNED_TABLES.get(line.strip("[]").strip())
+            if parts:
+                table = config
+                for part in parts:
+                    table = table.setdefault(part, {})
+            continue
+
+        key, sep, raw = line.partition("=")
+        if not sep:
+            raise ValueError(f"Unsupported TOML line: {line}")
+        key, raw = key.strip(), raw.strip()
+        if raw.startswith("[") and not raw.endswith("]"):
+            pending = (key, [raw[1:]])
+            continue
+        if table is None:
+            continue
+        if raw.startswith("["):
+            if key == "authors":
+                table["authors"] = _parse_authors(raw)
+            continue
+        if raw.startswith("{"):
+            continue
+        table[key] = _scalar(raw)
+
+    if pending is not None or "version" not in config.get("project", {}):
+        raise ValueError("pyproject.toml is missing [project] version")
+    return config
+
+
+@functools.lru_cache(maxsize=4)
+def _load_cfg(path_stat_key):
+    """Parse pyproject.toml once per (path, mtime_ns, size) key"""
+    path = path_stat_key[0]
+    try:
+        return _scan_pyproject(path)
+    except ValueError:
+        import tomllib
+
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+
+
+def _read_pyproject(path="pyproject.toml"):
+    p = Path(path)
+    st = p.stat()
+    return _load_cfg((p.resolve(), st.st_mtime_ns, st.st_size))
+
+
+def generate_metadata(check=False):
+    """Generate QGIS metadata.txt from pyproject.toml
+
+    Returns True when metadata.txt is (or, with check=True, would be) rewritten.
+    """
+
+    config = _read_pyproject()
+
     project = config["project"]
     qgis_config = config.get("tool", {}).get("qgis-plugin", {})
-    
-    metadata_content = f"""[general]
-name={qgis_config.get("name", project["name"])}
-description={qgis_config.get("description", project["description"])}
-about={qgis_config.get("about", project["description"])}
-version={project["version"]}
-qgisMinimumVersion={qgis_config.get("qgis_minimum_version", "3.22")}
-author={"; ".join([author.get("name", "") for author in project.get("authors", [])])}
-email={project.get("authors", [{}])[0].get("email", "")}
-category={qgis_config.get("category", "Analysis")}
-icon={qgis_config.get("icon", "")}
-homepage={project.get("urls", {}).get("Homepage", "")}
-tracker={project.get("urls", {}).get("Issues", "")}
-repository={project.get("urls", {}).get("Repository", "")}
-experimental={str(qgis_config.get("experimental", False))}
-deprecated={str(qgis_config.get("deprecated", False))}
-"""
-    
+    urls = project.get("urls", {})
+
+    authors = project.get("authors", ())
+    fields = {
+        "name": qgis_config.get("name", project["name"]),
+        "description": qgis_config.get("description", project["description"]),
+        "about": qgis_config.get("about", project["description"]),
+        "version": project["version"],
+        "qgis_minimum_version": qgis_config.get("qgis_minimum_version", "3.22"),
+        "author": "; ".join(a.get("name", "") for a in authors),
+        "email": authors[0].get("email", "") if authors else "",
+        "category": qgis_config.get("category", "Analysis"),
+        "icon": qgis_config.get("icon", ""),
+        "homepage": urls.get("Homepage", ""),
+        "tracker": urls.get("Issues", ""),
+        "repository": urls.get("Repository", ""),
+        "experimental": qgis_config.get("experimental", False),
+        "deprecated": qgis_config.get("deprecated", False),
+    }
+    metadata_content = TEMPLATE.format_map(fields).encode("utf-8")
+
     output_path = Path("virtughan_qgis/metadata.txt")
-    output_path.write_text(metadata_content)
+    if output_path.exists() and output_path.read_bytes() == metadata_content:
+        print(f"{output_path} is up to date")
+        return False
+
+    if check:
+        print(f"{output_path} is out of date")
+        return True
+
+    output_path.write_bytes(metadata_content)
     print(f"Generated {output_path}")
+    return True
 
 if __name__ == "__main__":
+    if "--check" in sys.argv[1:]:
+        sys.exit(1 if generate_metadata(check=True) else 0)
     generate_metadata()
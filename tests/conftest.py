@@ -0,0 +1,52 @@
+import importlib
+import os
+import subprocess
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _add_project_root():
+    root = str(PROJECT_ROOT)
+    if root not in sys.path:
+        sys.path.insert(0, root)
+        importlib.invalidate_caches()
+
+
+@pytest.fixture(scope="session")
+def built_zip():
+    if os.environ.get("SKIP_BUILD"):
+        pytest.skip("SKIP_BUILD is set")
+
+    result = subprocess.run([
+        "./build.sh"
+    ], cwd=str(PROJECT_ROOT), capture_output=True, text=True)
+
+    if result.returncode != 0:
+        pytest.fail(f"Build script failed: {result.stderr}")
+
+    zip_file = PROJECT_ROOT / "dist" / "virtughan-qgis-plugin.zip"
+    if not zip_file.exists():
+        pytest.fail("Plugin ZIP file was not created")
+    return zip_file
+
+
+@pytest.fixture(scope="session")
+def zip_names(built_zip):
+    with zipfile.ZipFile(built_zip, 'r') as zf:
+        return frozenset(zf.namelist())
+
+
+@pytest.fixture(scope="session")
+def zip_dirs(zip_names):
+    return frozenset(n.rsplit("/", 1)[0] + "/" for n in zip_names if "/" in n)
+
+
+@pytest.fixture(scope="session")
+def zip_ui_files(zip_names):
+    return frozenset(n for n in zip_names if n.endswith(".ui"))
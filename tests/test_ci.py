@@ -1,8 +1,11 @@
+import hashlib
 import os
 import subprocess
 import sys
 from pathlib import Path
 
+import pytest
+
 
 def test_ci_workflow_basic():
     project_root = Path(__file__).parent.parent
@@ -13,12 +16,18 @@ def test_ci_workflow_basic():
 
 def test_uv_sync_works():
     project_root = Path(__file__).parent.parent
+    inputs = (project_root / "pyproject.toml").read_bytes() + (project_root / "uv.lock").read_bytes()
+    marker = Path.home() / ".cache" / "virtughan-uv-sync" / hashlib.sha256(inputs).hexdigest()
+    if marker.exists():
+        pytest.skip("uv already synced for this lockfile")
     
     result = subprocess.run([
         "uv", "sync", "--group", "test"
     ], cwd=str(project_root), capture_output=True, text=True)
     
     assert result.returncode == 0, f"uv sync failed: {result.stderr}"
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    marker.touch()
 
 
 def test_metadata_generation_works():
@@ -31,15 +40,21 @@ def test_metadata_generation_works():
     assert result.returncode == 0, f"Metadata generation failed: {result.stderr}"
 
 
-def test_build_produces_zip():
+@pytest.mark.slow
+def test_build_produces_zip(built_zip):
+    assert built_zip.stat().st_size > 1000, "ZIP file is too small"
+
+
+def test_metadata_check_is_clean_after_generation():
     project_root = Path(__file__).parent.parent
-    
+
+    subprocess.run([
+        sys.executable, "generate_metadata.py"
+    ], cwd=str(project_root), capture_output=True, text=True)
+
     result = subprocess.run([
-        "./build.sh"
+        sys.executable, "generate_metadata.py", "--check"
     ], cwd=str(project_root), capture_output=True, text=True)
-    
-    assert result.returncode == 0, f"Build failed: {result.stderr}"
-    
-    zip_file = project_root / "dist" / "virtughan-qgis-plugin.zip"
-    assert zip_file.exists(), "ZIP file not produced by build"
-    assert zip_file.stat().st_size > 1000, "ZIP file is too small"
+
+    assert result.returncode == 0, f"metadata.txt is stale after generation: {result.stdout}"
+    assert "up to date" in result.stdout
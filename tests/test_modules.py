@@ -1,13 +1,9 @@
 import os
-import sys
-from pathlib import Path
+
 import pytest
 
 
 def test_logic_modules_importable():
-    project_root = Path(__file__).parent.parent
-    sys.path.insert(0, str(project_root))
-    
     try:
         from virtughan_qgis.common.common_logic import CommonLogic
         from virtughan_qgis.engine.engine_logic import EngineLogic
@@ -42,9 +38,6 @@ def test_logic_modules_importable():
 
 
 def test_processing_provider_import():
-    project_root = Path(__file__).parent.parent
-    sys.path.insert(0, str(project_root))
-    
     try:
         from virtughan_qgis.processing_provider import VirtuGhanProvider
         
@@ -60,9 +53,6 @@ def test_processing_provider_import():
 
 
 def test_main_plugin_class():
-    project_root = Path(__file__).parent.parent
-    sys.path.insert(0, str(project_root))
-    
     try:
         from virtughan_qgis.main_plugin import VirtuGhanPlugin
         
@@ -78,17 +68,169 @@ def test_main_plugin_class():
 
 
 def test_bootstrap_functions():
-    project_root = Path(__file__).parent.parent
-    sys.path.insert(0, str(project_root))
-    
     try:
-        from virtughan_qgis.bootstrap import install_dependencies, check_dependencies
+        from virtughan_qgis.bootstrap import (
+            check_dependencies,
+            ensure_virtughan,
+            ensure_virtughan_installed,
+            install_dependencies,
+        )
         
         assert callable(install_dependencies)
         assert callable(check_dependencies)
+        assert callable(ensure_virtughan_installed)
+        assert ensure_virtughan is ensure_virtughan_installed
         
     except ImportError as e:
         if 'qgis' in str(e).lower():
             pytest.skip("QGIS not available in test environment")
         else:
             assert False, f"Bootstrap functions import failed: {e}"
+
+
+def test_engine_worker_pool_is_shared():
+    from virtughan_qgis.engine.engine_worker import get_pool, shutdown_pool
+
+    pool = get_pool()
+    if pool is None:
+        pytest.skip("No standalone Python interpreter to spawn workers")
+    try:
+        assert get_pool() is pool
+        shutdown_pool()
+        assert get_pool() is not pool
+    finally:
+        shutdown_pool()
+
+
+def test_engine_tile_bbox_covers_aoi():
+    from virtughan_qgis.engine.engine_worker import tile_bbox
+
+    bbox = (85.0, 27.0, 86.2, 27.4)
+    tiles = tile_bbox(bbox, 0.5)
+    assert len(tiles) == 3
+    assert tiles[0][:2] == bbox[:2] and tiles[-1][2:] == bbox[2:]
+    assert all(t[2] - t[0] <= 0.5 and t[3] - t[1] <= 0.5 for t in tiles)
+    assert tile_bbox(bbox, 0) == [bbox]
+    overlapped = tile_bbox(bbox, 0.5, overlap=0.01)
+    assert overlapped[0][2] > tiles[0][2] and overlapped[1][0] < tiles[1][0]
+    assert overlapped[0][:2] == bbox[:2] and overlapped[-1][2:] == bbox[2:]
+
+
+def test_engine_merge_tile_logs_keeps_tile_order(tmp_path):
+    from virtughan_qgis.engine.engine_worker import merge_tile_logs
+
+    jobs = [{"log_path": str(tmp_path / f"tile_{i}.log")} for i in range(3)]
+    (tmp_path / "tile_1.log").write_text("second\n")
+    (tmp_path / "tile_0.log").write_text("first\n")
+    main = tmp_path / "runtime.log"
+    main.write_text("header\n")
+    merge_tile_logs(jobs, str(main))
+    assert main.read_text() == "header\n--- tile 1/3 ---\nfirst\n--- tile 2/3 ---\nsecond\n"
+    assert not (tmp_path / "tile_0.log").exists()
+
+
+def test_engine_scene_cache_reuses_results(tmp_path, monkeypatch):
+    from virtughan_qgis.engine import engine_worker
+
+    monkeypatch.setattr(engine_worker, "_SCENE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(engine_worker, "_scene_memo", {})
+    calls = []
+
+    def search(bbox, start, end, cloud):
+        calls.append(bbox)
+        return [{"id": "S2A_1"}]
+
+    cached = engine_worker._cached_search(search)
+    assert cached([1, 2, 3, 4], "2024-01-01", "2024-02-01", 30) == [{"id": "S2A_1"}]
+    engine_worker._scene_memo.clear()  # second hit comes from disk
+    assert cached([1, 2, 3, 4], "2024-01-01", "2024-02-01", 30) == [{"id": "S2A_1"}]
+    assert len(calls) == 1
+
+
+def test_engine_mask_outputs_blanks_outside_polygon(tmp_path):
+    gdal = pytest.importorskip("osgeo.gdal")
+    from virtughan_qgis.engine.engine_worker import mask_outputs
+
+    path = str(tmp_path / "ndvi.tif")
+    ds = gdal.GetDriverByName("GTiff").Create(path, 10, 10, 1, gdal.GDT_Float32)
+    ds.SetGeoTransform((85.0, 0.1, 0, 28.0, 0, -0.1))
+    ds.SetProjection('GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563]],PRIMEM["Greenwich",0],UNIT["degree",0.0174532925199433]]')
+    ds.GetRasterBand(1).Fill(1.0)
+    ds = None
+
+    # triangle over the left half: the top-right corner pixel lies outside it
+    assert mask_outputs(str(tmp_path), [[85.0, 28.0], [85.5, 28.0], [85.0, 27.0], [85.0, 28.0]]) == [path]
+    data = gdal.Open(path).ReadAsArray()
+    assert data[0, 0] == 1.0
+    assert data[0, 9] != data[0, 9]  # NaN
+
+
+def test_engine_mosaic_keeps_tiles_in_other_crs(tmp_path):
+    gdal = pytest.importorskip("osgeo.gdal")
+    osr = pytest.importorskip("osgeo.osr")
+    from virtughan_qgis.engine.engine_worker import mosaic_tiles
+
+    tile_dirs = []
+    for i, (epsg, x0) in enumerate(((32644, 800000.0), (32645, 200000.0))):
+        d = tmp_path / f"tile_{i}"
+        d.mkdir()
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(epsg)
+        ds = gdal.GetDriverByName("GTiff").Create(str(d / "ndvi.tif"), 8, 8, 1, gdal.GDT_Float32)
+        ds.SetGeoTransform((x0, 10.0, 0, 3000000.0, 0, -10.0))
+        ds.SetProjection(srs.ExportToWkt())
+        ds.GetRasterBand(1).Fill(0.5)
+        ds = None
+        tile_dirs.append(str(d))
+
+    written = mosaic_tiles(tile_dirs, str(tmp_path), quantize=False)
+    assert sorted(os.path.basename(p) for p in written) == ["ndvi.tif", "ndvi_crs1.tif"]
+    srs_of = {gdal.Open(p).GetProjection() for p in written}
+    assert len(srs_of) == 2
+
+
+def test_engine_int16_copy_is_opt_in_and_keeps_float(tmp_path):
+    gdal = pytest.importorskip("osgeo.gdal")
+    np = pytest.importorskip("numpy")
+    from virtughan_qgis.engine.engine_worker import cogify_outputs
+
+    values = {"ndvi": [[0.5, -0.1234], [3.2767, -9999.0]],
+              "refl": [[0.5, 5.0], [-4.0, -9999.0]]}  # out of Int16 * 1e-4 range
+    for name, rows in values.items():
+        ds = gdal.GetDriverByName("GTiff").Create(str(tmp_path / f"{name}.tif"), 2, 2, 1, gdal.GDT_Float32)
+        ds.SetGeoTransform((85.0, 0.1, 0, 28.0, 0, -0.1))
+        ds.GetRasterBand(1).SetNoDataValue(-9999.0)
+        ds.GetRasterBand(1).WriteArray(np.array(rows, dtype=np.float32))
+        ds = None
+
+    assert len(cogify_outputs(str(tmp_path))) == 2
+    assert not (tmp_path / "ndvi_int16.tif").exists()
+
+    written = cogify_outputs(str(tmp_path), quantize=True)
+    assert sorted(os.path.basename(p) for p in written) == ["ndvi.tif", "ndvi_int16.tif", "refl.tif"]
+    orig = gdal.Open(str(tmp_path / "ndvi.tif")).GetRasterBand(1)
+    assert orig.DataType == gdal.GDT_Float32
+    assert orig.ReadAsArray().tolist() == np.array(values["ndvi"], dtype=np.float32).tolist()
+
+    band = gdal.Open(str(tmp_path / "ndvi_int16.tif")).GetRasterBand(1)
+    assert band.DataType == gdal.GDT_Int16
+    assert band.GetScale() == pytest.approx(1e-4) and band.GetOffset() == 0.0
+    assert band.GetNoDataValue() == -32768
+    assert band.ReadAsArray().tolist() == [[5000, -1234], [32767, -32768]]
+    # rasters outside the range are never clipped into Int16: they get no copy at all
+    assert not (tmp_path / "refl_int16.tif").exists()
+
+
+def test_engine_worker_pools_are_per_dock():
+    from virtughan_qgis.engine.engine_worker import get_pool, shutdown_pool
+
+    engine = get_pool(name="engine")
+    if engine is None:
+        pytest.skip("No standalone Python interpreter to spawn workers")
+    try:
+        extractor = get_pool(name="extractor")
+        assert extractor is not engine
+        shutdown_pool(kill=True, name="extractor")
+        assert get_pool(name="engine") is engine
+    finally:
+        shutdown_pool()
@@ -4,9 +4,13 @@ Reusable AOI (Area of Interest) helpers:
 - AoiPolygonTool: freehand polygon draw tool (left-click add, right/double/Enter finish)
 - AoiRectTool: press-drag-release rectangle tool
 - rect_to_wgs84_bbox / geom_to_wgs84_bbox: utilities to get WGS84 bbox
+- geom_to_wgs84_ring: outer ring of a drawn polygon as [[lon, lat], ...]
+- lonlat_bbox: range check + clamp for a WGS84 bbox
 """
 
-from qgis.PyQt.QtCore import Qt, QVariant
+from functools import lru_cache
+
+from qgis.PyQt.QtCore import Qt, QTimer, QVariant
 from qgis.PyQt.QtGui import QColor
 from qgis.core import (
     QgsProject,
@@ -18,42 +22,125 @@ from qgis.core import (
     QgsPointXY,
     QgsVectorLayer,
     QgsFeature,
+    QgsFeatureSink,
     QgsField,
 )
 from qgis.gui import QgsMapCanvas, QgsMapTool, QgsRubberBand
 
 
-def rect_to_wgs84_bbox(rect: QgsRectangle, project: QgsProject) -> list[float]:
-    src = project.crs()
-    dst = QgsCoordinateReferenceSystem("EPSG:4326")
-    xf = QgsCoordinateTransform(src, dst, project)
+WGS84 = QgsCoordinateReferenceSystem("EPSG:4326")
+
+# AOI style: blue outline, light blue fill
+_OUTLINE = QColor(0, 102, 255, 200)
+_FILL = QColor(0, 102, 255, 60)
+
+if hasattr(QgsRubberBand, "setFillColor"):
+    def _apply_style(rb: QgsRubberBand):
+        rb.setWidth(2)
+        rb.setColor(_OUTLINE)
+        rb.setFillColor(_FILL)
+else:
+    def _apply_style(rb: QgsRubberBand):
+        rb.setWidth(2)
+        rb.setStrokeColor(_OUTLINE)
+
+
+@lru_cache(maxsize=32)
+def _get_xform(src_authid: str, dst_authid: str) -> QgsCoordinateTransform:
+    return QgsCoordinateTransform(
+        QgsCoordinateReferenceSystem(src_authid),
+        QgsCoordinateReferenceSystem(dst_authid),
+        QgsProject.instance(),
+    )
+
+
+def _to_wgs84_xform(project: QgsProject) -> QgsCoordinateTransform:
+    authid = project.crs().authid()
+    if not authid:  # custom CRS without an authority id cannot be cached
+        return QgsCoordinateTransform(project.crs(), WGS84, project)
+    return _get_xform(authid, "EPSG:4326")
+
+
+# Above this span (degrees) edge curvature matters, so densify via transformBoundingBox
+_CORNER_FAST_PATH_DEG = 1.0
+
+
+def rect_to_wgs84_bbox(rect: QgsRectangle, project: QgsProject) -> tuple[float, float, float, float]:
+    xf = _to_wgs84_xform(project)
+    try:
+        corners = [
+            xf.transform(QgsPointXY(x, y))
+            for x in (rect.xMinimum(), rect.xMaximum())
+            for y in (rect.yMinimum(), rect.yMaximum())
+        ]
+        xs = [p.x() for p in corners]
+        ys = [p.y() for p in corners]
+        if max(xs) - min(xs) < _CORNER_FAST_PATH_DEG and max(ys) - min(ys) < _CORNER_FAST_PATH_DEG:
+            return (min(xs), min(ys), max(xs), max(ys))
+    except Exception:
+        pass
     r = xf.transformBoundingBox(rect)
-    return [r.xMinimum(), r.yMinimum(), r.xMaximum(), r.yMaximum()]
+    return (r.xMinimum(), r.yMinimum(), r.xMaximum(), r.yMaximum())
 
 
-def geom_to_wgs84_bbox(geom: QgsGeometry, project: QgsProject) -> list[float]:
+def geom_to_wgs84_bbox(geom: QgsGeometry, project: QgsProject) -> tuple[float, float, float, float]:
     g = QgsGeometry(geom)  # clone
-    g.transform(QgsCoordinateTransform(project.crs(), QgsCoordinateReferenceSystem("EPSG:4326"), project))
+    g.transform(_to_wgs84_xform(project))
     r = g.boundingBox()
-    return [r.xMinimum(), r.yMinimum(), r.xMaximum(), r.yMaximum()]
+    return (r.xMinimum(), r.yMinimum(), r.xMaximum(), r.yMaximum())
 
 
 
+def geom_to_wgs84_ring(geom: QgsGeometry, project: QgsProject) -> list[list[float]] | None:
+    """Outer ring of a map-CRS polygon as [[lon, lat], ...] in WGS84, or None."""
+    try:
+        g = QgsGeometry(geom)  # clone
+        g.transform(_to_wgs84_xform(project))
+        poly = g.asPolygon()
+        if not poly:
+            mp = g.asMultiPolygon()
+            ring = mp[0][0] if mp else []
+        else:
+            ring = poly[0]
+        return [[float(p.x()), float(p.y())] for p in ring] or None
+    except Exception:
+        return None
+
+
+# Reprojected global extents overshoot ±180/±90 by round-off; tolerate that, then clamp
+_LONLAT_SLACK = 0.5
+
+
+def lonlat_bbox(b) -> list[float] | None:
+    """Clamp a WGS84 bbox into range, or None if it does not look like lon/lat at all."""
+    if len(b) != 4 or not (b[0] < b[2] and b[1] < b[3]):  # also rejects NaN
+        return None
+    if (b[0] < -180 - _LONLAT_SLACK or b[2] > 180 + _LONLAT_SLACK
+            or b[1] < -90 - _LONLAT_SLACK or b[3] > 90 + _LONLAT_SLACK):
+        return None
+    return [max(b[0], -180.0), max(b[1], -90.0), min(b[2], 180.0), min(b[3], 90.0)]
+
+
 class AoiManager:
     """
     Keeps exactly one AOI feature in a temporary memory layer.
     Use replace_geometry() on every draw. Use clear() to remove the layer.
     """
+    __slots__ = ("iface", "layer", "layer_name", "_fid", "_repaint_pending")
+
     def __init__(self, iface, layer_name: str = "AOI (drawn)"):
         self.iface = iface
         self.layer = None
         self.layer_name = layer_name
+        self._fid = None
+        self._repaint_pending = False
 
     def ensure_layer(self):
         if self.layer and self.layer.isValid():
             return self.layer
         crs = self.iface.mapCanvas().mapSettings().destinationCrs()
         self.layer = QgsVectorLayer(f"Polygon?crs={crs.authid()}", self.layer_name, "memory")
+        self._fid = None
         prov = self.layer.dataProvider()
         prov.addAttributes([QgsField("id", QVariant.Int), QgsField("label", QVariant.String)])
         self.layer.updateFields()
@@ -61,8 +148,8 @@ class AoiManager:
         # Style: blue outline, light blue fill
         try:
             sym = self.layer.renderer().symbol()
-            sym.setColor(QColor(0, 102, 255, 60))                   # fill
-            sym.symbolLayer(0).setStrokeColor(QColor(0, 102, 255, 200))  # stroke
+            sym.setColor(_FILL)
+            sym.symbolLayer(0).setStrokeColor(_OUTLINE)
             self.layer.triggerRepaint()
         except Exception:
             pass
@@ -71,15 +158,44 @@ class AoiManager:
     def replace_geometry(self, geom_map: QgsGeometry):
         lyr = self.ensure_layer()
         prov = lyr.dataProvider()
-        ids = [f.id() for f in lyr.getFeatures()]
-        if ids:
-            prov.deleteFeatures(ids)
-        feat = QgsFeature(lyr.fields())
-        feat.setGeometry(geom_map)
-        feat.setAttributes([1, "AOI"])
-        prov.addFeatures([feat])
-        lyr.updateExtents()
-        lyr.triggerRepaint()
+        # Swap the feature quietly; listeners get a single layerModified below
+        lyr.blockSignals(True)
+        prov.blockSignals(True)
+        try:
+            if self._fid is not None:
+                prov.deleteFeatures([self._fid])
+            elif prov.featureCount():
+                # id not known (provider did not write it back) -> fall back to a scan
+                prov.deleteFeatures([f.id() for f in lyr.getFeatures()])
+            self._fid = None
+            feat = QgsFeature(lyr.fields())
+            feat.setGeometry(geom_map)
+            feat.setAttributes([1, "AOI"])
+            ok, added = prov.addFeatures([feat], QgsFeatureSink.FastInsert)
+            if ok and added and added[0].id() >= 0:
+                self._fid = added[0].id()
+        finally:
+            prov.blockSignals(False)
+            lyr.blockSignals(False)
+        # Exactly one feature, so its bbox is the layer extent; no rescan needed
+        try:
+            lyr.setExtent(geom_map.boundingBox())
+        except Exception:
+            lyr.updateExtents()
+        lyr.layerModified.emit()
+        self._schedule_repaint()
+
+    def _schedule_repaint(self):
+        # collapse bursts of replace_geometry() calls into one repaint
+        if self._repaint_pending:
+            return
+        self._repaint_pending = True
+        QTimer.singleShot(0, self._do_repaint)
+
+    def _do_repaint(self):
+        self._repaint_pending = False
+        if self.layer and self.layer.isValid():
+            self.layer.triggerRepaint()
 
     def clear(self):
         if self.layer and self.layer.isValid():
@@ -88,6 +204,7 @@ class AoiManager:
             except Exception:
                 pass
         self.layer = None
+        self._fid = None
 
 
 class AoiPolygonTool(QgsMapTool):
@@ -98,28 +215,24 @@ class AoiPolygonTool(QgsMapTool):
         self.on_done = on_done
         self.points = []
         self.rb = QgsRubberBand(canvas, QgsWkbTypes.PolygonGeometry)
-        self.rb.setWidth(2)
-        try:
-            self.rb.setColor(QColor(0, 102, 255, 200))
-            self.rb.setFillColor(QColor(0, 102, 255, 60))
-        except Exception:
-            try:
-                self.rb.setStrokeColor(QColor(0, 102, 255, 200))
-            except Exception:
-                pass
+        _apply_style(self.rb)
 
     def canvasPressEvent(self, e):
         if e.button() == Qt.LeftButton:
-            self.points.append(self.toMapCoordinates(e.pos()))
+            pt = self.toMapCoordinates(e.pos())
+            if not self.points:
+                # seed the trailing vertex that follows the cursor
+                self.rb.addPoint(pt, False)
+            self.rb.movePoint(pt)
+            self.rb.addPoint(pt)
+            self.points.append(pt)
         elif e.button() == Qt.RightButton:
             self._finish()
 
     def canvasMoveEvent(self, e):
         if not self.points:
             return
-        temp = self.points + [self.toMapCoordinates(e.pos())]
-        geom = QgsGeometry.fromPolygonXY([list(map(QgsPointXY, temp))])
-        self.rb.setToGeometry(geom, None)
+        self.rb.movePoint(self.toMapCoordinates(e.pos()))
 
     def canvasDoubleClickEvent(self, e):
         self._finish()
@@ -134,7 +247,8 @@ class AoiPolygonTool(QgsMapTool):
     def _finish(self):
         poly = None
         if len(self.points) >= 3:
-            ring = list(map(QgsPointXY, self.points + [self.points[0]]))
+            # toMapCoordinates already yields QgsPointXY; close the ring without copying them
+            ring = self.points + [self.points[0]]
             poly = QgsGeometry.fromPolygonXY([ring])
         self._cleanup()
         self.on_done(poly)
@@ -152,22 +266,18 @@ class AoiPolygonTool(QgsMapTool):
 
 
 class AoiRectTool(QgsMapTool):
-    """Press-drag-release rectangle tool."""
+    """Press-drag-release rectangle tool.
+
+    The drag is drawn with the same styled QgsRubberBand as the polygon tool;
+    the rubber band is removed from the canvas when the tool is deactivated.
+    """
     def __init__(self, canvas: QgsMapCanvas, on_done):
         super().__init__(canvas)
         self.canvas = canvas
         self.on_done = on_done
-        self.start_pt = None
+        self.start_pt = None  # QgsPointXY, map units
         self.rb = QgsRubberBand(canvas, QgsWkbTypes.PolygonGeometry)
-        self.rb.setWidth(2)
-        try:
-            self.rb.setColor(QColor(0, 102, 255, 200))
-            self.rb.setFillColor(QColor(0, 102, 255, 60))
-        except Exception:
-            try:
-                self.rb.setStrokeColor(QColor(0, 102, 255, 200))
-            except Exception:
-                pass
+        _apply_style(self.rb)
 
     def canvasPressEvent(self, e):
         if e.button() == Qt.LeftButton:
@@ -176,25 +286,12 @@ class AoiRectTool(QgsMapTool):
     def canvasMoveEvent(self, e):
         if self.start_pt is None:
             return
-        cur = self.toMapCoordinates(e.pos())
-        xmin = min(self.start_pt.x(), cur.x()); xmax = max(self.start_pt.x(), cur.x())
-        ymin = min(self.start_pt.y(), cur.y()); ymax = max(self.start_pt.y(), cur.y())
-        rect = QgsRectangle(xmin, ymin, xmax, ymax)
-        ring = [
-            QgsPointXY(rect.xMinimum(), rect.yMinimum()),
-            QgsPointXY(rect.xMinimum(), rect.yMaximum()),
-            QgsPointXY(rect.xMaximum(), rect.yMaximum()),
-            QgsPointXY(rect.xMaximum(), rect.yMinimum()),
-            QgsPointXY(rect.xMinimum(), rect.yMinimum()),
-        ]
-        self.rb.setToGeometry(QgsGeometry.fromPolygonXY([ring]), None)
+        rect = QgsRectangle(self.start_pt, self.toMapCoordinates(e.pos()))
+        self.rb.setToGeometry(QgsGeometry.fromRect(rect), None)
 
     def canvasReleaseEvent(self, e):
         if e.button() == Qt.LeftButton and self.start_pt is not None:
-            cur = self.toMapCoordinates(e.pos())
-            xmin = min(self.start_pt.x(), cur.x()); xmax = max(self.start_pt.x(), cur.x())
-            ymin = min(self.start_pt.y(), cur.y()); ymax = max(self.start_pt.y(), cur.y())
-            rect = QgsRectangle(xmin, ymin, xmax, ymax)
+            rect = QgsRectangle(self.start_pt, self.toMapCoordinates(e.pos()))  # normalizes min/max
             self._finish(None if rect.isEmpty() else rect)
 
     def keyPressEvent(self, e):
@@ -202,6 +299,7 @@ class AoiRectTool(QgsMapTool):
             self._finish(None)
 
     def _finish(self, rect: QgsRectangle | None):
+        self.start_pt = None
         try:
             self.rb.reset(QgsWkbTypes.PolygonGeometry)
         except Exception:
@@ -211,3 +309,13 @@ class AoiRectTool(QgsMapTool):
         except Exception:
             pass
         self.on_done(rect)
+
+    def deactivate(self):
+        self.start_pt = None
+        if self.rb is not None:
+            try:
+                self.canvas.scene().removeItem(self.rb)
+            except Exception:
+                pass
+            self.rb = None
+        super().deactivate()
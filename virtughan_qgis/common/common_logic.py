@@ -1,29 +1,60 @@
-import os, json
+import ast, os, json, secrets, time
+import importlib.util
+from functools import lru_cache
+from pathlib import Path
 
+from qgis.PyQt.QtCore import Qt
 from qgis.core import Qgis, QgsMessageLog
 
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+def _installed_bands_json():
+    """Locate virtughan/data/sentinel-2-bands.json via the import spec, without importing virtughan."""
+    try:
+        spec = importlib.util.find_spec("virtughan")
+    except (ImportError, ValueError):
+        return None
+    for loc in (spec.submodule_search_locations or ()) if spec else ():
+        p = Path(loc, "data", "sentinel-2-bands.json")
+        if p.is_file():
+            return p
+    return None
+
+
+def missing_module(name):
+    """Error message if `name` is not importable, found via its spec without importing it."""
+    try:
+        if importlib.util.find_spec(name) is not None:
+            return None
+    except (ImportError, ValueError) as e:
+        return str(e)
+    return f"No module named '{name}'"
+
+
+@lru_cache(maxsize=1)
 def load_bands_meta():
     """
-    Try vendored JSON first, else package resource via importlib.resources.
-    Returns dict or None.
+    Try vendored JSON first, else the installed virtughan package's data file.
+    Returns dict or None. Parsed once per session; treat the result as read-only.
     """
     
     here = os.path.dirname(__file__)
     vendored = os.path.join(os.path.dirname(here), "libs", "virtughan", "data", "sentinel-2-bands.json")
     if os.path.exists(vendored):
         try:
-            with open(vendored, "r") as f:
-                return json.load(f)
+            return _json_loads(Path(vendored).read_bytes())
         except Exception:
             pass
 
     
     try:
-        import importlib.resources as resources
-        with resources.as_file(resources.files("virtughan").joinpath("data/sentinel-2-bands.json")) as p:
-            if p.exists():
-                with open(p, "r") as f:
-                    return json.load(f)
+        p = _installed_bands_json()
+        if p is not None:
+            return _json_loads(p.read_bytes())
     except Exception:
         pass
 
@@ -35,28 +66,131 @@ def default_band_list():
 
 def populate_band_combos(band1_combo, band2_combo, bands_meta=None):
     bands = list(bands_meta.keys()) if bands_meta else default_band_list()
-    band1_combo.clear(); band2_combo.clear()
-    band1_combo.addItems(bands)
-    band2_combo.addItems([""] + bands)  
+    # Bulk refill: don't fire currentTextChanged for every intermediate item
+    old1 = band1_combo.blockSignals(True); old2 = band2_combo.blockSignals(True)
+    try:
+        band1_combo.clear(); band2_combo.clear()
+        band1_combo.addItems(bands)
+        band2_combo.addItems([""] + bands)
+    finally:
+        band1_combo.blockSignals(old1); band2_combo.blockSignals(old2)
 
-def check_resolution_warning(bands_meta, band1, band2):
-    """
-    Return a warning string if GSD differs, else None.
-    """
-    if not bands_meta or not band1 or not band2 or band1 == band2:
+def band_gsd_map(bands_meta):
+    """Flatten bands_meta to {band: gsd} for bands that declare a GSD."""
+    return {
+        name: meta["gsd"]
+        for name, meta in (bands_meta or {}).items()
+        if isinstance(meta, dict) and meta.get("gsd")
+    }
+
+def gsd_mismatch_warning(band_gsd, band1, band2):
+    """Return a warning string if the GSDs in a band_gsd_map() differ, else None."""
+    if not band1 or not band2 or band1 == band2:
         return None
-    g1 = bands_meta.get(band1, {}).get("gsd")
-    g2 = bands_meta.get(band2, {}).get("gsd")
+    g1 = band_gsd.get(band1)
+    g2 = band_gsd.get(band2)
     if g1 and g2 and g1 != g2:
         return f"Band resolution mismatch: {band1}={g1}m, {band2}={g2}m."
     return None
 
-def auto_workers():
+def check_resolution_warning(bands_meta, band1, band2):
+    """One-off gsd_mismatch_warning() straight from bands_meta."""
+    return gsd_mismatch_warning(band_gsd_map(bands_meta), band1, band2)
+
+# rough peak memory of one engine/extractor worker (scene stack + output block)
+EST_PER_WORKER_BYTES = 1 << 30
+
+
+def _usable_cpus():
+    """CPUs this process may actually run on: affinity mask, then cgroup v2 cpu.max quota."""
+    try:
+        n = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        n = os.cpu_count() or 1
     try:
-        import multiprocessing
-        return max(1, multiprocessing.cpu_count() - 1)
+        with open("/sys/fs/cgroup/cpu.max", encoding="ascii") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            n = min(n, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return n
+
+
+def _available_memory():
+    try:
+        import psutil
+        return psutil.virtual_memory().available
     except Exception:
-        return 1
+        pass
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def auto_workers():
+    """Default worker count: usable CPUs minus one for the UI, capped by available memory."""
+    workers = max(1, _usable_cpus() - 1)
+    mem = _available_memory()
+    if mem is not None:
+        workers = min(workers, max(1, mem // EST_PER_WORKER_BYTES))
+    return workers
+
+RASTER_EXTS = frozenset(("tif", "tiff", "vrt"))
+
+def iter_rasters(path):
+    """Yield DirEntry objects for rasters under path, skipping hidden files/dirs."""
+    try:
+        it = os.scandir(path)
+    except OSError:
+        return
+    with it:
+        for entry in it:
+            if entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from iter_rasters(entry.path)
+                elif entry.name.rpartition(".")[2].lower() in RASTER_EXTS and entry.is_file():
+                    yield entry
+            except OSError:
+                continue
+
+_TIFF_MAGIC = (b"II*\x00", b"MM\x00*", b"II+\x00", b"MM\x00+")  # classic and BigTIFF, LE/BE
+
+
+def has_raster_signature(path):
+    """Cheap header sniff before handing a file to GDAL: TIFF magic bytes or a VRT root tag."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(16)
+    except OSError:
+        return False
+    if path.lower().endswith(".vrt"):
+        return head.lstrip().startswith(b"<VRTDataset")
+    return head[:4] in _TIFF_MAGIC
+
+def formula_error(formula, band2=None):
+    """Syntax-check a band formula up front; returns a message, or None if it parses."""
+    try:
+        tree = ast.parse(formula, mode="eval")
+    except SyntaxError as e:
+        return f"Invalid formula: {e.msg} (column {e.offset})"
+    if not band2 and any(isinstance(n, ast.Name) and n.id == "band2" for n in ast.walk(tree)):
+        return "Formula uses band2 but Band 2 is not set."
+    return None
+
+
+def run_dir(out_base, prefix):
+    """Per-run output folder; the timestamp keeps runs sorted chronologically."""
+    return str(Path(out_base) / f"{prefix}_{time.strftime('%Y%m%d-%H%M%S')}_{secrets.token_hex(2)}")
+
 
 def qdate_to_iso(qdate):
-    return qdate.toString("yyyy-MM-dd")
+    # Qt.ISODate takes Qt's enum fast path instead of parsing a format string
+    return qdate.toString(Qt.ISODate)
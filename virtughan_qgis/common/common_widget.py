@@ -3,15 +3,18 @@ from qgis.PyQt import uic, QtWidgets
 from qgis.PyQt.QtCore import QDate
 from qgis.core import Qgis, QgsMessageLog
 import zipfile
+from functools import lru_cache, partial
+from pathlib import PurePosixPath
 
 from .common_logic import (
-    load_bands_meta, populate_band_combos, check_resolution_warning,
+    load_bands_meta, populate_band_combos, band_gsd_map, gsd_mismatch_warning,
     auto_workers, qdate_to_iso
 )
 
 FORM_PATH = os.path.join(os.path.dirname(__file__), "common_form.ui")
+FORM_CLASS, _ = uic.loadUiType(FORM_PATH)
 
-class CommonParamsWidget(QtWidgets.QWidget):
+class CommonParamsWidget(QtWidgets.QWidget, FORM_CLASS):
     """
     Reusable panel: startDate, endDate, cloudSpin, band1Combo, band2Combo, formulaEdit.
     API:
@@ -21,8 +24,12 @@ class CommonParamsWidget(QtWidgets.QWidget):
     """
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.ui = uic.loadUi(FORM_PATH, self)
+        self.setupUi(self)
+        self.ui = self
         self._bands_meta = load_bands_meta()
+        self._band_gsd = band_gsd_map(self._bands_meta)
+        # Fires on every combo change; memoize per (band1, band2) pair
+        self._resolution_warning = lru_cache(maxsize=128)(partial(gsd_mismatch_warning, self._band_gsd))
 
         
         self.startDate.setDate(QDate.currentDate().addMonths(-1))
@@ -44,7 +51,7 @@ class CommonParamsWidget(QtWidgets.QWidget):
             return
         b1 = self.band1Combo.currentText().strip()
         b2 = self.band2Combo.currentText().strip()
-        msg = check_resolution_warning(self._bands_meta, b1, b2)
+        msg = self._resolution_warning(b1, b2)
         if msg:
             try:
                 self._warn_callback(msg)
@@ -74,6 +81,29 @@ class CommonParamsWidget(QtWidgets.QWidget):
         if formula: self.formulaEdit.setText(formula)
 
 
+def _unsafe_member(name: str) -> bool:
+    """True if a zip member name is absolute or climbs out of the extraction dir."""
+    parts = PurePosixPath(name.replace("\\", "/")).parts
+    return bool(parts) and (parts[0] == "/" or ":" in parts[0] or ".." in parts)
+
+
+def _iter_zips(root: str):
+    """Yield DirEntry objects for *.zip files under root (recursive)."""
+    try:
+        it = os.scandir(root)
+    except OSError:
+        return
+    with it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _iter_zips(entry.path)
+                elif entry.name.lower().endswith(".zip") and entry.is_file():
+                    yield entry
+            except OSError:
+                continue
+
+
 def extract_zipfiles(out_dir: str, logger=None, delete_archives: bool = False) -> list[str]:
     """
     Find and extract all .zip files under `out_dir` into sibling folders named
@@ -92,32 +122,28 @@ def extract_zipfiles(out_dir: str, logger=None, delete_archives: bool = False) -
                 pass
 
     try:
-        for root, _dirs, files in os.walk(out_dir):
-            for fn in files:
-                if not fn.lower().endswith(".zip"):
-                    continue
-                zpath = os.path.join(root, fn)
-                dest = os.path.join(root, os.path.splitext(fn)[0])
-                os.makedirs(dest, exist_ok=True)
-                try:
-                    with zipfile.ZipFile(zpath) as zf:
-                        # Zip-slip protection
-                        dest_abs = os.path.abspath(dest)
-                        for zi in zf.infolist():
-                            target = os.path.abspath(os.path.join(dest_abs, zi.filename))
-                            if not (target == dest_abs or target.startswith(dest_abs + os.sep)):
-                                raise RuntimeError(f"Unsafe member path in zip: {zi.filename}")
-                        zf.extractall(dest_abs)
-                    extracted_dirs.append(dest)
-                    _log(f"Extracted zip: {zpath} -> {dest}")
-                    if delete_archives:
-                        try:
-                            os.remove(zpath)
-                            _log(f"Deleted archive: {zpath}")
-                        except Exception as e:
-                            _log(f"Could not delete archive {zpath}: {e}", Qgis.Warning)
-                except Exception as e:
-                    _log(f"Failed to extract {zpath}: {e}", Qgis.Warning)
+        # Collect first so folders created by extraction are not rescanned
+        for entry in list(_iter_zips(out_dir)):
+            zpath = entry.path
+            dest = os.path.splitext(zpath)[0]
+            os.makedirs(dest, exist_ok=True)
+            try:
+                with zipfile.ZipFile(zpath) as zf:
+                    # Zip-slip protection
+                    bad = next((n for n in zf.namelist() if _unsafe_member(n)), None)
+                    if bad is not None:
+                        raise RuntimeError(f"Unsafe member path in zip: {bad}")
+                    zf.extractall(dest)
+                extracted_dirs.append(dest)
+                _log(f"Extracted zip: {zpath} -> {dest}")
+                if delete_archives:
+                    try:
+                        os.remove(zpath)
+                        _log(f"Deleted archive: {zpath}")
+                    except Exception as e:
+                        _log(f"Could not delete archive {zpath}: {e}", Qgis.Warning)
+            except Exception as e:
+                _log(f"Failed to extract {zpath}: {e}", Qgis.Warning)
     except Exception as e:
         _log(f"Zip extraction step failed: {e}", Qgis.Warning)
 
@@ -1,17 +1,14 @@
 import os
+from functools import lru_cache
 from qgis.PyQt.QtCore import Qt, QSize
 from qgis.PyQt.QtWidgets import (
     QDialog, QListWidget, QListWidgetItem, QStackedWidget,
     QHBoxLayout, QVBoxLayout, QWidget, QDockWidget,
     QFrame, QAbstractItemView, QApplication, QStyle
 )
-from qgis.PyQt.QtGui import QIcon
+from qgis.PyQt.QtGui import QIcon, QPixmap
 from qgis.core import QgsApplication, Qgis, QgsMessageLog
 
-from ..engine.engine_widget import EngineDockWidget
-from ..extractor.extractor_widget import ExtractorDockWidget
-from ..tiler.tiler_widget import TilerDockWidget  # adjust if needed
-
 
 PLUGIN_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -22,11 +19,15 @@ def load_icon(rel_path: str, fallback: QStyle.StandardPixmap = QStyle.SP_FileDia
         if not ic.isNull():
             return ic
 
-    abs_path = os.path.normpath(os.path.join(PLUGIN_ROOT, rel_path))
-    if os.path.exists(abs_path):
-        ic = QIcon(abs_path)
-        if not ic.isNull():
-            return ic
+    return _icon_from_file(os.path.normpath(os.path.join(PLUGIN_ROOT, rel_path)), fallback)
+
+
+@lru_cache(maxsize=32)
+def _icon_from_file(abs_path: str, fallback: QStyle.StandardPixmap) -> QIcon:
+    # Decode each image once; QIcon is implicitly shared so handing out the same one is cheap
+    pix = QPixmap(abs_path)
+    if not pix.isNull():
+        return QIcon(pix)
 
     # fallback
     QgsMessageLog.logMessage(f"[VirtuGhan] Icon not found, using fallback: {abs_path}", "VirtuGhan", Qgis.Warning)
@@ -61,15 +62,18 @@ class VirtughanHubDialog(QDialog):
         root.addWidget(self.nav)
         root.addWidget(self.pages, 1)
 
-        self._add_page("Engine",    EngineDockWidget(self.iface),    load_icon("../static/images/virtughan-logo.png"))
-        self._add_page("Extractor", ExtractorDockWidget(self.iface), load_icon("../static/images/virtughan-logo.png"))
-        self._add_page("Tiler",     TilerDockWidget(self.iface),     load_icon("../static/images/virtughan-logo.png"))
+        # Pages are built on first visit; only the start page is constructed up front
+        self._factories = []
+        self._add_page_lazy("Engine",    _engine_page,    load_icon("../static/images/virtughan-logo.png"))
+        self._add_page_lazy("Extractor", _extractor_page, load_icon("../static/images/virtughan-logo.png"))
+        self._add_page_lazy("Tiler",     _tiler_page,     load_icon("../static/images/virtughan-logo.png"))
 
-        self.nav.currentRowChanged.connect(self.pages.setCurrentIndex)
+        self.nav.currentRowChanged.connect(self._on_row_changed)
 
         # select initial page
         start_index = {"engine": 0, "extractor": 1, "tiler": 2}.get(start_page.lower(), 0)
         self.nav.setCurrentRow(start_index)
+        self._on_row_changed(self.nav.currentRow())
 
         # Styling 
         self.setStyleSheet("""
@@ -102,20 +106,49 @@ class VirtughanHubDialog(QDialog):
             }
         """)
 
-    def _add_page(self, title: str, dock: QDockWidget, icon: QIcon):
-        # Strip dock chrome so it looks like a plain page
-        dock.setFeatures(QDockWidget.NoDockWidgetFeatures)
-        dock.setAllowedAreas(Qt.NoDockWidgetArea)
-        dock.setTitleBarWidget(QWidget(dock)) 
-
-        # Wrap the dock in a plain QWidget page
+    def _add_page_lazy(self, title: str, factory, icon: QIcon):
+        # Empty placeholder page; the dock is created by _ensure_page()
         page = QWidget()
         lay = QVBoxLayout(page)
         lay.setContentsMargins(8, 8, 8, 8)
-        lay.addWidget(dock)
         self.pages.addWidget(page)
+        self._factories.append(factory)
 
         # Sidebar item with enforced height
         item = QListWidgetItem(icon, title)
         item.setSizeHint(QSize(200, 32))  
         self.nav.addItem(item)
+
+    def _ensure_page(self, index: int):
+        if not 0 <= index < len(self._factories):
+            return
+        factory = self._factories[index]
+        if factory is None:
+            return
+        self._factories[index] = None
+        dock = factory(self.iface)
+
+        # Strip dock chrome so it looks like a plain page
+        dock.setFeatures(QDockWidget.NoDockWidgetFeatures)
+        dock.setAllowedAreas(Qt.NoDockWidgetArea)
+        dock.setTitleBarWidget(QWidget(dock))
+        self.pages.widget(index).layout().addWidget(dock)
+
+    def _on_row_changed(self, index: int):
+        self._ensure_page(index)
+        self.pages.setCurrentIndex(index)
+
+
+def _engine_page(iface):
+    from ..engine.engine_widget import EngineDockWidget
+    return EngineDockWidget(iface)
+
+
+def _extractor_page(iface):
+    from ..extractor.extractor_widget import ExtractorDockWidget
+    return ExtractorDockWidget(iface)
+
+
+def _tiler_page(iface):
+    from ..tiler.tiler_widget import TilerDockWidget
+    return TilerDockWidget(iface)
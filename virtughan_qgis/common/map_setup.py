@@ -1,3 +1,6 @@
+import re
+from collections import OrderedDict
+
 from qgis.core import (
     QgsProject, QgsRasterLayer, QgsCoordinateReferenceSystem,
     QgsCoordinateTransform, QgsRectangle
@@ -8,12 +11,132 @@ from qgis.PyQt.QtCore import QTimer
 _OSM_URL = "type=xyz&url=https://tile.openstreetmap.org/{z}/{x}/{y}.png"
 _OSM_NAME = "OpenStreetMap"
 
+_CRS_4326 = QgsCoordinateReferenceSystem.fromEpsgId(4326)
+_CRS_3857 = QgsCoordinateReferenceSystem.fromEpsgId(3857)
+
+
+# Id of the tracked OSM layer, kept current from project signals so lookups
+# don't walk every layer. _osm_rescan forces one full scan (first use, or after
+# the tracked layer is removed while another OSM layer may still exist).
+_osm_layer_id = None
+_osm_rescan = True
+_osm_hooked = False
+
+
+_PROVIDERS = frozenset(("wms", "wmsc", "xyz"))
+_OSM_HOST_RE = re.compile(r"tile\.openstreetmap\.org", re.I)
+
+
+def _is_osm_layer(lyr) -> bool:
+    if not isinstance(lyr, QgsRasterLayer):
+        return False
+    pt = lyr.providerType()
+    if not pt or pt.lower() not in _PROVIDERS:
+        return False
+    src = lyr.source()
+    return bool(src and _OSM_HOST_RE.search(src))
+
+
+def _on_layers_added(layers):
+    global _osm_layer_id
+    if _osm_layer_id is not None or _osm_rescan:
+        return
+    for lyr in layers:
+        if _is_osm_layer(lyr):
+            _osm_layer_id = lyr.id()
+            return
+
+
+def _on_layers_removed(layer_ids):
+    global _osm_layer_id, _osm_rescan
+    if _osm_layer_id is not None and _osm_layer_id in layer_ids:
+        _osm_layer_id = None
+        _osm_rescan = True
+
+
+def _on_project_cleared():
+    global _osm_layer_id, _osm_rescan
+    _osm_layer_id = None
+    _osm_rescan = False  # an empty project has no OSM layer
+
+
+_XFORM_CACHE_SIZE = 64
+_xform_cache: "OrderedDict[tuple[str, str], QgsCoordinateTransform]" = OrderedDict()
+
+
+def _get_xform(src: QgsCoordinateReferenceSystem,
+               dst: QgsCoordinateReferenceSystem,
+               ctx) -> QgsCoordinateTransform:
+    """LRU of transforms keyed by (src authid, dst authid)."""
+    _hook_project_signals()
+    key = (src.authid(), dst.authid())
+    if not all(key):  # custom CRS without authid: build uncached
+        return QgsCoordinateTransform(src, dst, ctx)
+    xf = _xform_cache.get(key)
+    if xf is not None:
+        _xform_cache.move_to_end(key)
+        return xf
+    xf = QgsCoordinateTransform(src, dst, ctx)
+    _xform_cache[key] = xf
+    if len(_xform_cache) > _XFORM_CACHE_SIZE:
+        _xform_cache.popitem(last=False)
+    return xf
+
+
+def _clear_xform_cache(*_):
+    _xform_cache.clear()
+
+
+def _hook_project_signals():
+    global _osm_hooked
+    if _osm_hooked:
+        return
+    prj = QgsProject.instance()
+    prj.layersAdded.connect(_on_layers_added)
+    prj.layersWillBeRemoved.connect(_on_layers_removed)
+    prj.cleared.connect(_on_project_cleared)
+    prj.crsChanged.connect(_clear_xform_cache)
+    prj.transformContextChanged.connect(_clear_xform_cache)
+    _osm_hooked = True
+
+
+def unhook_project_signals():
+    """Disconnect the OSM/transform cache slots (call from plugin unload)."""
+    global _osm_hooked, _osm_layer_id, _osm_rescan
+    if not _osm_hooked:
+        return
+    prj = QgsProject.instance()
+    for sig, slot in ((prj.layersAdded, _on_layers_added),
+                      (prj.layersWillBeRemoved, _on_layers_removed),
+                      (prj.cleared, _on_project_cleared),
+                      (prj.crsChanged, _clear_xform_cache),
+                      (prj.transformContextChanged, _clear_xform_cache)):
+        try:
+            sig.disconnect(slot)
+        except (TypeError, RuntimeError):
+            pass
+    _osm_hooked = False
+    _xform_cache.clear()
+    _osm_layer_id = None
+    _osm_rescan = True
+
 
 def _find_osm_layer():
     """Return the existing OSM XYZ layer if present, else None."""
-    for lyr in QgsProject.instance().mapLayers().values():
-        if isinstance(lyr, QgsRasterLayer) and lyr.providerType().lower() in ("wms", "wmsc", "xyz"):
-            if "tile.openstreetmap.org" in (lyr.source() or "").lower():
+    global _osm_layer_id, _osm_rescan
+    _hook_project_signals()
+    prj = QgsProject.instance()
+    if _osm_layer_id is not None:
+        lyr = prj.mapLayer(_osm_layer_id)
+        if lyr is not None:
+            return lyr
+        _osm_layer_id = None
+        _osm_rescan = True
+    if _osm_rescan:
+        _osm_rescan = False
+        for lyr in prj.mapLayers().values():
+            if _is_osm_layer(lyr):
+                _osm_layer_id = lyr.id()
                 return lyr
     return None
 
@@ -22,15 +145,10 @@ def has_osm_basemap() -> bool:
     return _find_osm_layer() is not None
 
 
-def ensure_osm_basemap(name: str = _OSM_NAME,
+def _get_or_create_osm(name: str = _OSM_NAME,
                        as_bottom: bool = True,
-                       set_project_crs: bool = True) -> QgsRasterLayer | None:
-    """
-    Ensure an OSM XYZ basemap exists in the project.
-    - Adds it if missing.
-    - Moves to bottom of layer tree if as_bottom=True.
-    - Optionally sets project CRS to EPSG:3857 (good for web tiles).
-    """
+                       reorder_existing: bool = True) -> tuple[QgsRasterLayer | None, bool]:
+    """Return (osm_layer, was_created); layer is None if a new one could not be created."""
     prj = QgsProject.instance()
     root = prj.layerTreeRoot()
 
@@ -38,33 +156,80 @@ def ensure_osm_basemap(name: str = _OSM_NAME,
     if lyr is None:
         lyr = QgsRasterLayer(_OSM_URL, name, "wms")  # QGIS handles 'type=xyz' via WMS provider
         if not lyr.isValid():
-            return None
+            return None, False
         prj.addMapLayer(lyr, False)
         # insert at bottom
         try:
             root.insertLayer(len(root.children()), lyr) if as_bottom else root.insertLayer(0, lyr)
         except Exception:
             root.addLayer(lyr)  # fallback (usually adds at top)
-    else:
-        if as_bottom:
-            node = root.findLayer(lyr.id())
-            if node:
-                parent = node.parent() or root
-                parent.removeChildNode(node)
-                try:
-                    root.insertLayer(len(root.children()), lyr)
-                except Exception:
-                    root.addLayer(lyr)
+        return lyr, True
+
+    if as_bottom and reorder_existing:
+        order = root.layerOrder()
+        if order and order[-1] != lyr:
+            if root.hasCustomLayerOrder():
+                # project already draws by a custom order: adjust it, leave the tree alone
+                root.setCustomLayerOrder([l for l in order if l != lyr] + [lyr])
+            else:
+                # don't switch the project to a custom order; later layers would then
+                # be appended below the opaque basemap
+                node = root.findLayer(lyr.id())
+                if node:
+                    (node.parent() or root).removeChildNode(node)
+                    try:
+                        root.insertLayer(len(root.children()), lyr)
+                    except Exception:
+                        root.addLayer(lyr)
+    return lyr, False
+
+
+def _set_web_mercator():
+    try:
+        QgsProject.instance().setCrs(_CRS_3857)
+    except Exception:
+        pass
+
+
+def ensure_osm_basemap(name: str = _OSM_NAME,
+                       as_bottom: bool = True,
+                       set_project_crs: bool = True) -> QgsRasterLayer | None:
+    """
+    Ensure an OSM XYZ basemap exists in the project.
+    - Adds it if missing.
+    - Draws it below all other layers if as_bottom=True (new layers are inserted
+      at the bottom of the tree; an existing one is moved there, or to the end
+      of the custom layer order if the project already uses one).
+    - Optionally sets project CRS to EPSG:3857 (good for web tiles).
+    """
+    lyr, _created = _get_or_create_osm(name, as_bottom)
+    if lyr is None:
+        return None
 
     if set_project_crs:
-        try:
-            prj.setCrs(QgsCoordinateReferenceSystem("EPSG:3857"))
-        except Exception:
-            pass
+        _set_web_mercator()
 
     return lyr
 
 
+# Latest pending zoom per canvas; a burst of zoom_to_* calls runs only the last one
+_pending_zooms: dict[int, callable] = {}
+
+
+def _run_pending_zoom(key: int):
+    apply = _pending_zooms.pop(key, None)
+    if apply is not None:
+        apply()
+
+
+def _schedule_zoom(canvas: QgsMapCanvas, apply, delay_ms: int):
+    key = id(canvas)
+    scheduled = key in _pending_zooms
+    _pending_zooms[key] = apply
+    if not scheduled:
+        QTimer.singleShot(max(0, delay_ms), lambda: _run_pending_zoom(key))
+
+
 def zoom_to_lonlat(iface,
                    lon: float,
                    lat: float,
@@ -80,24 +245,26 @@ def zoom_to_lonlat(iface,
         return
 
     prj = QgsProject.instance()
-    xform = QgsCoordinateTransform(
-        QgsCoordinateReferenceSystem("EPSG:4326"),
-        prj.crs(),
-        prj.transformContext(),
-    )
+    xform = _get_xform(_CRS_4326, prj.crs(), prj.transformContext())
     pt = xform.transform(lon, lat)
 
     def _apply():
-        canvas.setCenter(pt)
+        # Suspend rendering so center + scale produce one render instead of several;
+        # if the user has rendering switched off, leave it off
+        was = canvas.renderFlag()
+        if was:
+            canvas.setRenderFlag(False)
         try:
-            canvas.zoomScale(scale_m)
-        except Exception:
-            pass
-        # recenter again after zoom to keep the target pinned
-        canvas.setCenter(pt)
-        canvas.refresh()
+            canvas.setCenter(pt)
+            try:
+                canvas.zoomScale(scale_m)
+            except Exception:
+                pass
+        finally:
+            if was:
+                canvas.setRenderFlag(True)  # re-enabling triggers the single refresh
 
-    QTimer.singleShot(max(0, delay_ms), _apply)
+    _schedule_zoom(canvas, _apply, delay_ms)
 
 
 def zoom_to_wgs84_bbox(iface,
@@ -112,18 +279,14 @@ def zoom_to_wgs84_bbox(iface,
         return
 
     prj = QgsProject.instance()
-    xform = QgsCoordinateTransform(
-        QgsCoordinateReferenceSystem("EPSG:4326"),
-        prj.crs(),
-        prj.transformContext(),
-    )
+    xform = _get_xform(_CRS_4326, prj.crs(), prj.transformContext())
     rect = xform.transformBoundingBox(QgsRectangle(xmin, ymin, xmax, ymax))
 
     def _apply():
         canvas.setExtent(rect)
         canvas.refresh()
 
-    QTimer.singleShot(max(0, delay_ms), _apply)
+    _schedule_zoom(canvas, _apply, delay_ms)
 
 
 def setup_default_map(
@@ -144,11 +307,14 @@ def setup_default_map(
       - skip adding when skip_if_present=True,
       - skip zoom when skip_zoom_if_present=True.
     """
-    exists = has_osm_basemap()
+    # One lookup decides everything; an existing layer is left untouched when skip_if_present
+    lyr, created = _get_or_create_osm(name, as_bottom=True, reorder_existing=not skip_if_present)
+    exists = lyr is not None and not created
     if exists and skip_if_present:
         return
 
-    ensure_osm_basemap(name=name, as_bottom=True, set_project_crs=set_project_crs)
+    if set_project_crs and lyr is not None:
+        _set_web_mercator()
 
     if exists and skip_zoom_if_present:
         return
@@ -1,5 +1,6 @@
-import os, uuid, io, traceback
-from contextlib import redirect_stdout, redirect_stderr
+import os, io, time, traceback
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
+from pathlib import Path
 
 from qgis.PyQt.QtCore import QDate, Qt
 from qgis.core import (
@@ -7,9 +8,13 @@ from qgis.core import (
     QgsProcessingParameterNumber, QgsProcessingParameterString, QgsProcessingParameterBoolean,
     QgsProcessingParameterEnum, QgsProcessingParameterFolderDestination, QgsProcessingUtils,
     QgsProcessingException, QgsProject, QgsCoordinateReferenceSystem, QgsCoordinateTransform,
-    QgsRasterLayer,
+    QgsRasterLayer, QgsProcessingParameterDefinition,
 )
 
+from ..common.aoi import _get_xform, lonlat_bbox
+from ..common.common_logic import auto_workers, formula_error, has_raster_signature, iter_rasters, run_dir
+from .engine_worker import REMOTE_READ_OPTIONS, cogify_outputs, gdal_config, install_scene_cache
+
 try:
     from qgis.core import QgsProcessingParameterDate
     HAVE_DATE_PARAM = True
@@ -17,13 +22,6 @@ except Exception:
     QgsProcessingParameterDate = None
     HAVE_DATE_PARAM = False
 
-VIRTUGHAN_IMPORT_ERROR = None
-try:
-    from virtughan.engine import VirtughanProcessor
-except Exception as e:
-    VirtughanProcessor = None
-    VIRTUGHAN_IMPORT_ERROR = e
-
 
 def _coerce_to_qdate(val) -> QDate:
     if isinstance(val, QDate):
@@ -34,46 +32,97 @@ def _coerce_to_qdate(val) -> QDate:
     return QDate.fromString(s, Qt.ISODate)
 
 
+_WGS84 = QgsCoordinateReferenceSystem.fromEpsgId(4326)
+
+
+def _check_lonlat(bbox):
+    checked = lonlat_bbox(bbox)
+    if checked is None:
+        raise QgsProcessingException(f"Converted bbox is not valid lon/lat: {bbox}")
+    return checked
+
+
 def _extent_to_wgs84_bbox(extent, src_crs):
-    wgs84 = QgsCoordinateReferenceSystem("EPSG:4326")
-    if not src_crs or not src_crs.isValid() or src_crs == wgs84:
-        bbox = [extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()]
+    auth = src_crs.authid() if src_crs else ""
+    if auth.upper() == "EPSG:4326" or not src_crs or not src_crs.isValid():
+        # Already lon/lat (or unknown): no transform object is built at all
+        return _check_lonlat([extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()])
+
+    if auth:
+        xform = _get_xform(auth, "EPSG:4326")
     else:
-        xform = QgsCoordinateTransform(src_crs, wgs84, QgsProject.instance())
-        ll = xform.transform(extent.xMinimum(), extent.yMinimum())
-        ur = xform.transform(extent.xMaximum(), extent.yMaximum())
-        bbox = [min(ll.x(), ur.x()), min(ll.y(), ur.y()), max(ll.x(), ur.x()), max(ll.y(), ur.y())]
-    if (abs(bbox[0]) > 180 or abs(bbox[2]) > 180 or abs(bbox[1]) > 90 or abs(bbox[3]) > 90):
-        raise QgsProcessingException(f"Converted bbox is not valid lon/lat: {bbox}")
-    return bbox
+        xform = QgsCoordinateTransform(src_crs, _WGS84, QgsProject.instance())
+    # transformBoundingBox densifies the edges; two corners can miss curved bounds
+    r = xform.transformBoundingBox(extent, QgsCoordinateTransform.ForwardTransform, True)
+    bbox = [r.xMinimum(), r.yMinimum(), r.xMaximum(), r.yMaximum()]
+    if bbox[0] > bbox[2]:
+        # with 180° crossover handling, xmin > xmax means the AOI spans the antimeridian
+        raise QgsProcessingException(f"AOI crosses the antimeridian; split it at 180°: {bbox}")
+    return _check_lonlat(bbox)
+
+
+_OPS = ("mean", "median", "max", "min", "std", "sum", "var", "none")
+# enum index -> value passed to the engine ("none" maps straight to None)
+_OP_BY_IDX = tuple(None if op == "none" else op for op in _OPS)
+
+_PUSH_INTERVAL_S = 0.05
+_PUSH_MAX_LINES = 32
 
 
 class _FeedbackTee(io.TextIOBase):
     def __init__(self, file_obj, feedback):
         self.file = file_obj
         self.feedback = feedback
-        self._buf = ""
+        self._buf = []  # pieces of the current, not yet newline-terminated line
+        # UI side is rate-limited: lines are batched into one pushInfo per interval
+        self._pending_lines = []
+        self._last_push = 0.0
 
     def write(self, s):
         if not s:
             return 0
         self.file.write(s)
-        self.file.flush()
-        self._buf += s
-        while "\n" in self._buf:
-            line, self._buf = self._buf.split("\n", 1)
-            if line.strip():
-                try:
-                    self.feedback.pushInfo(line)
-                except Exception:
-                    pass
+        self._buf.append(s)
+        if "\n" in s:
+            joined = "".join(self._buf)
+            lines = joined.splitlines()
+            if joined.endswith(("\n", "\r")):
+                self._buf = []
+            else:
+                self._buf = [lines.pop()]
+            self._pending_lines.extend(line for line in lines if line.strip())
+        if self._pending_lines and (len(self._pending_lines) >= _PUSH_MAX_LINES
+                                    or time.monotonic() - self._last_push > _PUSH_INTERVAL_S):
+            # any write past the interval pushes, so a burst followed by silence isn't held back
+            self._push_pending()
         return len(s)
 
+    def _push_pending(self):
+        batch, self._pending_lines = self._pending_lines, []
+        self._last_push = time.monotonic()
+        if batch:
+            try:
+                self.feedback.pushInfo("\n".join(batch))
+            except Exception:
+                pass
+
     def flush(self):
+        # print(..., flush=True) lands here; the UI push still honours the throttle
         try:
             self.file.flush()
         except Exception:
             pass
+        if self._pending_lines and time.monotonic() - self._last_push > _PUSH_INTERVAL_S:
+            self._push_pending()
+
+
+@contextmanager
+def _drained(tee):
+    """Push whatever the throttled tee still holds when the block exits."""
+    try:
+        yield tee
+    finally:
+        tee._push_pending()
 
 
 class VirtuGhanEngineAlgorithm(QgsProcessingAlgorithm):
@@ -107,7 +156,7 @@ class VirtuGhanEngineAlgorithm(QgsProcessingAlgorithm):
             defaultValue="nir", optional=True))
         self.addParameter(QgsProcessingParameterEnum(
             "OPERATION", "Aggregation",
-            options=["mean","median","max","min","std","sum","var","none"], defaultValue=7))
+            options=list(_OPS), defaultValue=_OPS.index("none")))
         self.addParameter(QgsProcessingParameterBoolean(
             "TIMESERIES", "Generate timeseries (GIF)", defaultValue=False))
         self.addParameter(QgsProcessingParameterBoolean(
@@ -118,6 +167,17 @@ class VirtuGhanEngineAlgorithm(QgsProcessingAlgorithm):
         self.addParameter(QgsProcessingParameterFolderDestination(
             "OUTPUT_FOLDER", "Output folder (blank = temp)", optional=True))
 
+        int16_copy = QgsProcessingParameterBoolean(
+            "INT16_COPY", "Also write compact Int16 copies of index rasters (lossy, scale 0.0001)",
+            defaultValue=False)
+        int16_copy.setFlags(int16_copy.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(int16_copy)
+
+        gdal_debug = QgsProcessingParameterBoolean(
+            "GDAL_DEBUG", "Write GDAL debug output (CPL_DEBUG) to runtime.log", defaultValue=False)
+        gdal_debug.setFlags(gdal_debug.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+        self.addParameter(gdal_debug)
+
     def name(self): return "virtughan_engine"
     def displayName(self): return "VirtuGhan Engine"
     def group(self): return "VirtuGhan"
@@ -126,8 +186,11 @@ class VirtuGhanEngineAlgorithm(QgsProcessingAlgorithm):
     def createInstance(self): return VirtuGhanEngineAlgorithm()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if VIRTUGHAN_IMPORT_ERROR:
-            raise QgsProcessingException(f"VirtughanProcessor import failed: {VIRTUGHAN_IMPORT_ERROR}")
+        # imported here so loading the provider doesn't pull in numpy/rasterio
+        try:
+            from virtughan.engine import VirtughanProcessor
+        except Exception as e:
+            raise QgsProcessingException(f"VirtughanProcessor import failed: {e}")
 
         extent = self.parameterAsExtent(parameters, "EXTENT", context)
         try:
@@ -154,14 +217,15 @@ class VirtuGhanEngineAlgorithm(QgsProcessingAlgorithm):
         cloud = max(0, min(100, int(self.parameterAsDouble(parameters, "CLOUD_COVER", context))))
         formula = (self.parameterAsString(parameters, "FORMULA", context) or "").strip()
         band1 = (self.parameterAsString(parameters, "BAND1", context) or "").strip()
-        band2 = (self.parameterAsString(parameters, "BAND2", context) or "").strip() or None
+        b2 = (self.parameterAsString(parameters, "BAND2", context) or "").strip()
+        band2 = b2 or None
         if not formula: raise QgsProcessingException("Formula is required.")
         if not band1:   raise QgsProcessingException("Band 1 is required.")
+        err = formula_error(formula, band2)
+        if err: raise QgsProcessingException(err)
 
-        ops = ["mean","median","max","min","std","sum","var","none"]
         op_idx = self.parameterAsEnum(parameters, "OPERATION", context)
-        op_txt = ops[op_idx] if 0 <= op_idx < len(ops) else "none"
-        operation = None if op_txt == "none" else op_txt
+        operation = _OP_BY_IDX[op_idx] if 0 <= op_idx < len(_OP_BY_IDX) else None
 
         ts = self.parameterAsBool(parameters, "TIMESERIES", context)
         smart = self.parameterAsBool(parameters, "SMART_FILTER", context)
@@ -171,22 +235,17 @@ class VirtuGhanEngineAlgorithm(QgsProcessingAlgorithm):
 
         workers = int(self.parameterAsDouble(parameters, "WORKERS", context))
         if workers <= 0:
-            try:
-                import multiprocessing
-                workers = max(1, multiprocessing.cpu_count() - 1)
-            except Exception:
-                workers = 1
+            workers = auto_workers()
 
         out_base = (self.parameterAsString(parameters, "OUTPUT_FOLDER", context) or "").strip()
         if not out_base:
             out_base = getattr(context, "temporaryFolder", lambda: None)() or QgsProcessingUtils.tempFolder()
-        out_dir = os.path.join(out_base, f"virtughan_engine_{uuid.uuid4().hex[:8]}")
-        os.makedirs(out_dir, exist_ok=True)
-        log_path = os.path.join(out_dir, "runtime.log")
+        out_dir = run_dir(out_base, "virtughan_engine")
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+        log_path = str(Path(out_dir, "runtime.log"))
 
-        os.environ.setdefault("GDAL_HTTP_TIMEOUT", "30")
-        os.environ.setdefault("CPL_DEBUG", "ON")
-        os.environ["CPL_LOG"] = log_path
+        gdal_debug = self.parameterAsBool(parameters, "GDAL_DEBUG", context)
+        int16_copy = self.parameterAsBool(parameters, "INT16_COPY", context)
 
         feedback.pushInfo(f"Output: {out_dir}")
         feedback.pushInfo(f"Log file: {log_path}")
@@ -194,11 +253,17 @@ class VirtuGhanEngineAlgorithm(QgsProcessingAlgorithm):
                           f"band1={band1}, band2={band2}, op={operation}, "
                           f"timeseries={ts}, workers={workers}, smart_filter={smart}")
 
-        with open(log_path, "a", encoding="utf-8", buffering=1) as lf:
+        # Block-buffered: prints and CPL output would otherwise cost one write() per line.
+        # The file is flushed on explicit flush() calls and when it is closed.
+        # GDAL options are scoped to this run and restored afterwards (CPL_DEBUG only on request)
+        with open(log_path, "a", encoding="utf-8", buffering=65536) as lf, \
+                gdal_config(CPL_LOG=log_path, GDAL_HTTP_TIMEOUT="30",
+                            CPL_DEBUG="ON" if gdal_debug else None, **REMOTE_READ_OPTIONS):
             tee = _FeedbackTee(lf, feedback)
-            with redirect_stdout(tee), redirect_stderr(tee):
+            with redirect_stdout(tee), redirect_stderr(tee), _drained(tee):
                 try:
                     print("Starting compute() …", flush=True)
+                    install_scene_cache()
                     proc = VirtughanProcessor(
                         bbox=bbox,
                         start_date=s,
@@ -219,24 +284,33 @@ class VirtuGhanEngineAlgorithm(QgsProcessingAlgorithm):
                     proc.compute()
                     print("[checkpoint] exited VirtughanProcessor.compute()", flush=True)
                     print("compute() finished.", flush=True)
+                    cogs = cogify_outputs(out_dir, int16_copy)
+                    if cogs:
+                        print("".join(f"Wrote COG: {path}\n" for path in cogs), end="", flush=True)
                 except Exception:
                     print("[exception]", flush=True)
                     print(traceback.format_exc(), flush=True)
                     raise QgsProcessingException("VirtughanProcessor.compute() failed – see runtime.log for details.")
 
         loaded = []
-        for root, _dirs, files in os.walk(out_dir):
-            for fn in files:
-                if fn.lower().endswith((".tif", ".tiff", ".vrt")):
-                    path = os.path.normpath(os.path.join(root, fn))
-                    name = os.path.splitext(fn)[0]
-                    lyr = QgsRasterLayer(path, name, "gdal")
-                    if lyr.isValid():
-                        QgsProject.instance().addMapLayer(lyr, addToLegend=True)
-                        loaded.append(path)
-                        feedback.pushInfo(f"Loaded raster: {path}")
-                    else:
-                        feedback.reportError(f"Failed to load raster: {path}")
+        layers = []
+        # Outputs carry their own CRS and no sidecar style: skip the prompt/validation and style lookup
+        layer_opts = QgsRasterLayer.LayerOptions(False, context.transformContext())
+        layer_opts.skipCrsValidation = True
+        for entry in iter_rasters(out_dir):
+            path = os.path.normpath(entry.path)
+            name = entry.name.rpartition(".")[0]
+            lyr = QgsRasterLayer(path, name, "gdal", layer_opts) if has_raster_signature(path) else None
+            if lyr is not None and lyr.isValid():
+                layers.append(lyr)
+                loaded.append(path)
+            else:
+                feedback.reportError(f"Failed to load raster: {path}")
+
+        # One addMapLayers call -> one layersAdded / legend update instead of one per raster
+        if layers:
+            QgsProject.instance().addMapLayers(layers, addToLegend=True)
+            feedback.pushInfo("\n".join(f"Loaded raster: {path}" for path in loaded))
 
         if not loaded:
             feedback.pushInfo("No .tif/.tiff/.vrt files found in output folder to load.")
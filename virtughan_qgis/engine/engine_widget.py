@@ -1,16 +1,15 @@
 # virtughan_qgis/engine/engine_widget.py
 import os
-import uuid
-import traceback
-from datetime import datetime
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
 
 from qgis.PyQt import uic
 from qgis.PyQt.QtCore import Qt, QDate, QTimer, QVariant
 from qgis.PyQt.QtGui import QColor
 from qgis.PyQt.QtWidgets import (
-    QWidget, QDockWidget, QFileDialog, QMessageBox,
-    QProgressBar, QPlainTextEdit, QComboBox, QCheckBox, QLabel,
-    QPushButton, QSpinBox, QLineEdit, QDateEdit, QFormLayout, QVBoxLayout
+    QWidget, QDockWidget, QFileDialog, QMessageBox, QPlainTextEdit,
+    QSpinBox, QLineEdit, QDateEdit, QFormLayout, QVBoxLayout
 )
 
 from qgis.core import (
@@ -31,9 +30,17 @@ from ..common.aoi import (
     AoiRectTool,
     rect_to_wgs84_bbox,
     geom_to_wgs84_bbox,
+    geom_to_wgs84_ring,
+    lonlat_bbox,
 )
 
+from ..common.common_logic import formula_error, has_raster_signature, iter_rasters, missing_module, run_dir
+from ..common.log_queue import LogQueue
 from ..common.map_setup import setup_default_map
+from .engine_worker import (
+    DEFAULT_TILE_DEG, get_pool, merge_tile_logs, mosaic_tiles, no_pool_error, run_compute,
+    shutdown_pool, tile_jobs,
+)
 
 COMMON_IMPORT_ERROR = None
 CommonParamsWidget = None
@@ -47,75 +54,95 @@ except Exception as _e:
     COMMON_IMPORT_ERROR = _e
     CommonParamsWidget = None
 
-VIRTUGHAN_IMPORT_ERROR = None
-VirtughanProcessor = None
-try:
-    from virtughan.engine import VirtughanProcessor
-except Exception as _e:
-    VIRTUGHAN_IMPORT_ERROR = _e
-    VirtughanProcessor = None
-
 UI_PATH = os.path.join(os.path.dirname(__file__), "engine_form.ui")
 FORM_CLASS, _ = uic.loadUiType(UI_PATH)
 
+# (key, label, widget class) for the form used when CommonParamsWidget is unavailable
+_FALLBACK_FIELDS = (
+    ("start", "Start date", QDateEdit),
+    ("end", "End date", QDateEdit),
+    ("cloud", "Max cloud cover (%)", QSpinBox),
+    ("formula", "Formula", QLineEdit),
+    ("band1", "Band 1", QLineEdit),
+    ("band2", "Band 2 (optional)", QLineEdit),
+)
+_FALLBACK_TEXT = {"formula": "(band2-band1)/(band2+band1)", "band1": "red", "band2": "nir"}
+
 
 def _log(widget, msg, level=Qgis.Info):
     QgsMessageLog.logMessage(str(msg), "VirtuGhan", level)
     try:
-        widget.logText.appendPlainText(str(msg))
+        # coalesced into one append per tick; errors show up immediately
+        widget._log_queue.append(str(msg), urgent=level == Qgis.Critical)
     except Exception:
         pass
 
 
 class _VirtughanTask(QgsTask):
-    """Runs VirtughanProcessor.compute() off the UI thread and writes to runtime.log."""
+    """Runs VirtughanProcessor.compute() off the UI thread and writes to runtime.log.
+
+    The compute itself runs in the engine dock's worker pool (engine_worker);
+    this task only waits on it, so cancel can terminate the job. With a tile size
+    set, the AOI is split into tiles that run in parallel; _FinalizeTask mosaics them.
+    """
     def __init__(self, desc, params, log_path, on_done=None):
         super().__init__(desc, QgsTask.CanCancel)
         self.params = params
         self.log_path = log_path
         self.on_done = on_done
         self.exc = None
+        self.jobs = tile_jobs(params)
+
+    def _wait(self, futs):
+        """Wait for all futures, re-raising worker errors; False if canceled."""
+        total = len(futs)
+        pending = set(futs)
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            try:
+                for fut in done:
+                    fut.result()
+            except Exception:
+                for fut in pending:
+                    fut.cancel()
+                raise
+            if total > 1:
+                self.setProgress(100.0 * (total - len(pending)) / total)
+            if pending and self.isCanceled():
+                shutdown_pool(kill=True, name="engine")
+                self.exc = RuntimeError("Canceled by user.")
+                return False
+        return True
 
     def run(self):
         try:
-            os.makedirs(self.params["output_dir"], exist_ok=True)
-
-            os.environ.setdefault("GDAL_HTTP_TIMEOUT", "30")
-            os.environ.setdefault("CPL_DEBUG", "ON")
-            os.environ["CPL_LOG"] = self.log_path
-
-            with open(self.log_path, "a", encoding="utf-8", buffering=1) as logf:
-                logf.write(f"[{datetime.now().isoformat(timespec='seconds')}] Starting VirtughanProcessor\n")
-                logf.write(f"Params: {self.params}\n")
-
-                proc = VirtughanProcessor(
-                    bbox=self.params["bbox"],
-                    start_date=self.params["start_date"],
-                    end_date=self.params["end_date"],
-                    cloud_cover=self.params["cloud_cover"],
-                    formula=self.params["formula"],
-                    band1=self.params["band1"],
-                    band2=self.params["band2"],
-                    operation=self.params["operation"],
-                    timeseries=self.params["timeseries"],
-                    output_dir=self.params["output_dir"],
-                    log_file=logf,
-                    cmap="RdYlGn",
-                    workers=self.params["workers"],
-                    smart_filter=self.params["smart_filter"],
-                )
-                proc.compute()
-                logf.write("compute() finished.\n")
-            return True
-        except Exception as e:
+            jobs = self.jobs
+            pool = get_pool(min(len(jobs), self.params["workers"]) if jobs else 1, name="engine")
+            if pool is None:
+                self.jobs = []
+                raise no_pool_error(self.log_path)
+            if not jobs:
+                return self._wait([pool.submit(run_compute, self.params, self.log_path)])
+            # one tile per worker, scheduled as workers free up; each logs to its own file
+            with open(self.log_path, "a", encoding="utf-8") as logf:
+                logf.write(f"Running {len(jobs)} tiles; their output follows once they finish.\n")
+            try:
+                return self._wait([pool.submit(run_compute, p, p["log_path"]) for p in jobs])
+            finally:
+                merge_tile_logs(jobs, self.log_path)
+        except BrokenProcessPool as e:
+            shutdown_pool(name="engine")
             self.exc = e
             try:
                 with open(self.log_path, "a", encoding="utf-8", buffering=1) as logf:
-                    logf.write("[exception]\n")
-                    logf.write(traceback.format_exc())
+                    logf.write(f"[exception] engine worker process died: {e}\n")
             except Exception:
                 pass
             return False
+        except Exception as e:
+            # run_compute (or no_pool_error) already wrote the error to runtime.log
+            self.exc = e
+            return False
 
     def finished(self, ok):
         if self.on_done:
@@ -125,6 +152,50 @@ class _VirtughanTask(QgsTask):
                 pass
 
 
+class _FinalizeTask(QgsTask):
+    """Post-processing of an engine run (tile mosaic, zip extraction) off the UI thread.
+
+    The compute task is attached as a ParentDependsOnSubTask subtask, so the task
+    manager starts this only after compute succeeded; a failed or canceled compute
+    terminates it as well. on_done is left with just the layer adds.
+    """
+    def __init__(self, desc, compute, on_done=None):
+        super().__init__(desc, QgsTask.CanCancel)
+        self.compute = compute
+        self.on_done = on_done
+        self.exc = None
+        self.addSubTask(compute, [], QgsTask.ParentDependsOnSubTask)
+
+    def run(self):
+        params, log_path = self.compute.params, self.compute.log_path
+        out_dir = params["output_dir"]
+        try:
+            with open(log_path, "a", encoding="utf-8", buffering=1) as logf:
+                def _logger(msg, level=Qgis.Info):
+                    QgsMessageLog.logMessage(str(msg), "VirtuGhan", level)
+                    logf.write(f"{msg}\n")
+
+                jobs = self.compute.jobs
+                if jobs:
+                    written = mosaic_tiles([p["output_dir"] for p in jobs], out_dir,
+                                           params.get("quantize", False))
+                    _logger(f"Mosaicked {len(jobs)} tiles into {len(written)} raster(s).")
+                if self.isCanceled():
+                    return False
+                extract_zipfiles(out_dir, logger=_logger, delete_archives=True)
+            return True
+        except Exception as e:
+            self.exc = e
+            return False
+
+    def finished(self, ok):
+        if self.on_done:
+            try:
+                self.on_done(ok, self.exc or self.compute.exc)
+            except Exception:
+                pass
+
+
 class _UiLogTailer:
     """Polls a text file and appends new content to a QPlainTextEdit without blocking UI."""
     def __init__(self, log_path: str, log_widget: QPlainTextEdit, interval_ms: int = 400):
@@ -172,28 +243,34 @@ class EngineDockWidget(QDockWidget):
         self._form_owner.setupUi(self.ui_root)
         self.setWidget(self.ui_root)
 
-        f = self.ui_root.findChild
-
-        self.progressBar        = f(QProgressBar, "progressBar")
-        self.runButton          = f(QPushButton,   "runButton")
-        self.resetButton        = f(QPushButton,   "resetButton")
-        self.helpButton         = f(QPushButton,   "helpButton")
-        self.logText            = f(QPlainTextEdit,"logText")
-
-        self.commonHost         = f(QWidget,       "commonParamsContainer")
-
-        self.aoiModeCombo       = f(QComboBox,     "aoiModeCombo")
-        self.aoiUseCanvasButton = f(QPushButton,   "aoiUseCanvasButton")
-        self.aoiStartDrawButton = f(QPushButton,   "aoiStartDrawButton")  
-        self.aoiClearButton     = f(QPushButton,   "aoiClearButton")
-        self.aoiPreviewLabel    = f(QLabel,        "aoiPreviewLabel")
-
-        self.opCombo            = f(QComboBox,     "opCombo")
-        self.timeseriesCheck    = f(QCheckBox,     "timeseriesCheck")
-        self.smartFilterCheck   = f(QCheckBox,     "smartFilterCheck")
-        self.workersSpin        = f(QSpinBox,      "workersSpin")
-        self.outputPathEdit     = f(QLineEdit,     "outputPathEdit")
-        self.outputBrowseButton = f(QPushButton,   "outputBrowseButton")
+        # setupUi binds every named widget on the form owner; no tree walk needed
+        ui = self._form_owner
+        f = lambda name: getattr(ui, name, None)
+
+        self.progressBar        = f("progressBar")
+        self.runButton          = f("runButton")
+        self.resetButton        = f("resetButton")
+        self.helpButton         = f("helpButton")
+        self.logText            = f("logText")
+
+        self.commonHost         = f("commonParamsContainer")
+
+        self.aoiModeCombo       = f("aoiModeCombo")
+        self.aoiUseCanvasButton = f("aoiUseCanvasButton")
+        self.aoiStartDrawButton = f("aoiStartDrawButton")  
+        self.aoiClearButton     = f("aoiClearButton")
+        self.aoiPreviewLabel    = f("aoiPreviewLabel")
+
+        self.opCombo            = f("opCombo")
+        self.timeseriesCheck    = f("timeseriesCheck")
+        self.smartFilterCheck   = f("smartFilterCheck")
+        self.workersSpin        = f("workersSpin")
+        self.outputPathEdit     = f("outputPathEdit")
+        self.outputBrowseButton = f("outputBrowseButton")
+        self.tileSizeSpin       = f("tileSizeSpin")
+        self.tileOverlapSpin    = f("tileOverlapSpin")
+        self.int16CopyCheck     = f("int16CopyCheck")
+        self._log_queue         = LogQueue(self.logText) if self.logText is not None else None
 
         critical = {
             "progressBar": self.progressBar, "runButton": self.runButton,
@@ -205,6 +282,8 @@ class EngineDockWidget(QDockWidget):
             "timeseriesCheck": self.timeseriesCheck, "smartFilterCheck": self.smartFilterCheck,
             "workersSpin": self.workersSpin, "outputPathEdit": self.outputPathEdit,
             "outputBrowseButton": self.outputBrowseButton,
+            "tileSizeSpin": self.tileSizeSpin, "tileOverlapSpin": self.tileOverlapSpin,
+            "int16CopyCheck": self.int16CopyCheck,
         }
         missing = [name for name, ref in critical.items() if ref is None]
         if missing:
@@ -221,6 +300,7 @@ class EngineDockWidget(QDockWidget):
             self.workersSpin.setValue(1)
 
         self._aoi_bbox = None
+        self._aoi_polygon_wgs84 = None
         self._aoi = AoiManager(self.iface)   
         self._prev_tool = None               
 
@@ -265,23 +345,23 @@ class EngineDockWidget(QDockWidget):
                 )
             except Exception:
                 pass
+            # message bar rather than a modal box: this fires on every band combo change
+            self._common.warn_resolution_if_needed(
+                lambda msg: self.iface.messageBar().pushMessage("VirtuGhan", msg, level=Qgis.Warning, duration=5)
+            )
             v.addWidget(self._common)
             _log(self, "Using CommonParamsWidget.", Qgis.Info)
         else:
             fb = QWidget(host)
             form = QFormLayout(fb)
-            self.fb_start = QDateEdit(fb); self.fb_start.setCalendarPopup(True); self.fb_start.setDate(QDate.currentDate().addMonths(-1))
-            self.fb_end   = QDateEdit(fb); self.fb_end.setCalendarPopup(True);   self.fb_end.setDate(QDate.currentDate())
-            self.fb_cloud = QSpinBox(fb);  self.fb_cloud.setRange(0,100); self.fb_cloud.setValue(30)
-            self.fb_formula = QLineEdit("(band2-band1)/(band2+band1)", fb)
-            self.fb_band1 = QLineEdit("red", fb)
-            self.fb_band2 = QLineEdit("nir", fb)
-            form.addRow("Start date", self.fb_start)
-            form.addRow("End date", self.fb_end)
-            form.addRow("Max cloud cover (%)", self.fb_cloud)
-            form.addRow("Formula", self.fb_formula)
-            form.addRow("Band 1", self.fb_band1)
-            form.addRow("Band 2 (optional)", self.fb_band2)
+            self._fb_fields = {}
+            for key, label, cls in _FALLBACK_FIELDS:
+                self._fb_fields[key] = w = cls(fb)
+                form.addRow(label, w)
+            self._fb_fields["start"].setCalendarPopup(True)
+            self._fb_fields["end"].setCalendarPopup(True)
+            self._fb_fields["cloud"].setRange(0, 100)
+            self._reset_fallback()
             v.addWidget(fb)
             self._common = None
             _log(self, f"CommonParamsWidget not available: {COMMON_IMPORT_ERROR}", Qgis.Warning)
@@ -289,15 +369,25 @@ class EngineDockWidget(QDockWidget):
     def _get_common_params(self):
         if self._common is not None:
             return self._common.get_params()
+        f = self._fb_fields
         return {
-            "start_date": self.fb_start.date().toString("yyyy-MM-dd"),
-            "end_date": self.fb_end.date().toString("yyyy-MM-dd"),
-            "cloud_cover": int(self.fb_cloud.value()),
-            "band1": self.fb_band1.text().strip(),
-            "band2": (self.fb_band2.text().strip() or None),
-            "formula": self.fb_formula.text().strip(),
+            "start_date": f["start"].date().toString("yyyy-MM-dd"),
+            "end_date": f["end"].date().toString("yyyy-MM-dd"),
+            "cloud_cover": int(f["cloud"].value()),
+            "band1": f["band1"].text().strip(),
+            "band2": (f["band2"].text().strip() or None),
+            "formula": f["formula"].text().strip(),
         }
 
+    def _reset_fallback(self):
+        f = self._fb_fields
+        today = QDate.currentDate()
+        f["start"].setDate(today.addMonths(-1))
+        f["end"].setDate(today)
+        f["cloud"].setValue(30)
+        for key, text in _FALLBACK_TEXT.items():
+            f[key].setText(text)
+
     def _aoi_mode_changed(self, text: str):
         """Update the single action button text based on the selected mode."""
         t = (text or "").lower()
@@ -334,6 +424,7 @@ class EngineDockWidget(QDockWidget):
 
         # processing bbox (WGS84)
         self._aoi_bbox = rect_to_wgs84_bbox(rect, QgsProject.instance())
+        self._aoi_polygon_wgs84 = None
         self._update_aoi_preview()
 
     def _start_draw_rectangle(self):
@@ -359,6 +450,7 @@ class EngineDockWidget(QDockWidget):
 
             # processing bbox (WGS84)
             self._aoi_bbox = rect_to_wgs84_bbox(rect, QgsProject.instance())
+            self._aoi_polygon_wgs84 = None
             self._update_aoi_preview()
 
         tool = AoiRectTool(canvas, _finish)
@@ -386,8 +478,15 @@ class EngineDockWidget(QDockWidget):
             # visible AOI (map CRS)
             self._aoi.replace_geometry(geom_map)
 
-            # processing bbox (WGS84)
-            self._aoi_bbox = geom_to_wgs84_bbox(geom_map, QgsProject.instance())
+            # processing bbox (WGS84), taken from the ring so the geometry is transformed once
+            ring = geom_to_wgs84_ring(geom_map, QgsProject.instance())
+            self._aoi_polygon_wgs84 = ring
+            if ring:
+                lons = [c[0] for c in ring]
+                lats = [c[1] for c in ring]
+                self._aoi_bbox = (min(lons), min(lats), max(lons), max(lats))
+            else:
+                self._aoi_bbox = geom_to_wgs84_bbox(geom_map, QgsProject.instance())
             self._update_aoi_preview()
 
         tool = AoiPolygonTool(canvas, _done)
@@ -396,6 +495,7 @@ class EngineDockWidget(QDockWidget):
 
     def _clear_aoi(self):
         self._aoi_bbox = None
+        self._aoi_polygon_wgs84 = None
         self._update_aoi_preview()
         self._aoi.clear()
 
@@ -434,18 +534,11 @@ class EngineDockWidget(QDockWidget):
             except Exception:
                 pass
         else:
-            try:
-                self.fb_start.setDate(QDate.currentDate().addMonths(-1))
-                self.fb_end.setDate(QDate.currentDate())
-                self.fb_cloud.setValue(30)
-                self.fb_formula.setText("(band2-band1)/(band2+band1)")
-                self.fb_band1.setText("red")
-                self.fb_band2.setText("nir")
-            except Exception:
-                pass
+            self._reset_fallback()
 
         # Reset AOI + UI 
         self._aoi_bbox = None
+        self._aoi_polygon_wgs84 = None
         self._update_aoi_preview()
         self._aoi.clear()
 
@@ -455,20 +548,25 @@ class EngineDockWidget(QDockWidget):
         self.workersSpin.setMinimum(1)
         if self.workersSpin.value() < 1:
             self.workersSpin.setValue(1)
+        self.tileSizeSpin.setValue(DEFAULT_TILE_DEG)
+        self.tileOverlapSpin.setValue(0.0)
+        self.int16CopyCheck.setChecked(False)
         self.outputPathEdit.clear()
+        self._log_queue.clear()
         self.logText.clear()
 
   
     # Collect params / run task
     def _collect_params(self):
-        if VirtughanProcessor is None:
-            raise RuntimeError(f"VirtughanProcessor import failed: {VIRTUGHAN_IMPORT_ERROR}")
+        # virtughan itself is only imported in the worker process
+        err = missing_module("virtughan")
+        if err:
+            raise RuntimeError(f"VirtughanProcessor import failed: {err}")
         if not self._aoi_bbox:
             raise RuntimeError("Please set AOI (Map extent / Draw rectangle / Draw polygon) before running.")
 
-        # quick check for WGS84-like bbox
-        b = self._aoi_bbox
-        if not (len(b) == 4 and -180 <= b[0] < b[2] <= 180 and -90 <= b[1] < b[3] <= 90):
+        bbox = lonlat_bbox(self._aoi_bbox)
+        if bbox is None:
             raise RuntimeError(f"AOI bbox does not look like EPSG:4326: {self._aoi_bbox}")
 
         p = self._get_common_params()
@@ -483,6 +581,9 @@ class EngineDockWidget(QDockWidget):
             raise RuntimeError("Formula is required.")
         if not p.get("band1"):
             raise RuntimeError("Band 1 is required.")
+        err = formula_error(p["formula"], p.get("band2"))
+        if err:
+            raise RuntimeError(err)
 
         op_txt = (self.opCombo.currentText() or "").strip()
         operation = None if op_txt == "none" else op_txt
@@ -492,10 +593,10 @@ class EngineDockWidget(QDockWidget):
 
         workers = max(1, int(self.workersSpin.value()))
         out_base = (self.outputPathEdit.text() or "").strip() or QgsProcessingUtils.tempFolder()
-        out_dir = os.path.join(out_base, f"virtughan_engine_{uuid.uuid4().hex[:8]}")
+        out_dir = run_dir(out_base, "virtughan_engine")
 
-        return dict(
-            bbox=self._aoi_bbox,
+        params = dict(
+            bbox=bbox,
             start_date=p["start_date"],
             end_date=p["end_date"],
             cloud_cover=int(p["cloud_cover"]),
@@ -506,8 +607,15 @@ class EngineDockWidget(QDockWidget):
             timeseries=self.timeseriesCheck.isChecked(),
             smart_filter=self.smartFilterCheck.isChecked(),
             workers=workers,
+            tile_deg=float(self.tileSizeSpin.value()),
+            tile_overlap=float(self.tileOverlapSpin.value()),
+            quantize=self.int16CopyCheck.isChecked(),
             output_dir=out_dir,
+            log_path=str(Path(out_dir, "runtime.log")),
         )
+        if self._aoi_polygon_wgs84:
+            params["polygon_wgs84"] = self._aoi_polygon_wgs84
+        return params
 
     def _start_tailing(self, log_path: str):
         self._current_log_path = log_path
@@ -529,12 +637,12 @@ class EngineDockWidget(QDockWidget):
 
         out_dir = params["output_dir"]
         try:
-            os.makedirs(out_dir, exist_ok=True)
+            Path(out_dir).mkdir(parents=True, exist_ok=True)
         except Exception as e:
             QMessageBox.critical(self, "VirtuGhan", f"Cannot create output folder:\n{out_dir}\n\n{e}")
             return
 
-        log_path = os.path.join(out_dir, "runtime.log")
+        log_path = params["log_path"]
         _log(self, f"Output: {out_dir}")
         _log(self, f"Log file: {log_path}")
 
@@ -553,25 +661,25 @@ class EngineDockWidget(QDockWidget):
                 _log(self, f"Engine failed: {exc}", Qgis.Critical)
                 QMessageBox.critical(self, "VirtuGhan", f"Engine failed:\n{exc}\n\nSee runtime.log for details.")
             else:
-                extract_zipfiles(out_dir, logger=lambda m, lvl=Qgis.Info: _log(self, m, lvl), delete_archives=True)
-                
-                added = 0
-                for root, _dirs, files in os.walk(out_dir):
-                    for fn in files:
-                        if fn.lower().endswith((".tif", ".tiff", ".vrt")):
-                            path = os.path.join(root, fn)
-                            lyr = QgsRasterLayer(path, os.path.splitext(fn)[0], "gdal")
-                            if lyr.isValid():
-                                QgsProject.instance().addMapLayer(lyr)
-                                _log(self, f"Loaded raster: {path}")
-                                added += 1
-                            else:
-                                _log(self, f"Failed to load raster: {path}", Qgis.Warning)
-                if added == 0:
+                layers = []
+                for entry in iter_rasters(out_dir):
+                    lyr = (QgsRasterLayer(entry.path, entry.name.rpartition(".")[0], "gdal")
+                           if has_raster_signature(entry.path) else None)
+                    if lyr is not None and lyr.isValid():
+                        layers.append(lyr)
+                    else:
+                        _log(self, f"Failed to load raster: {entry.path}", Qgis.Warning)
+                if layers:
+                    # one layersAdded / legend refresh for the whole batch
+                    QgsProject.instance().addMapLayers(layers)
+                    _log(self, "\n".join(f"Loaded raster: {l.source()}" for l in layers))
+                else:
                     _log(self, "No .tif/.tiff/.vrt files found to load.")
                 QMessageBox.information(self, "VirtuGhan", f"Engine finished.\nOutput: {out_dir}")
 
-        self._current_task = _VirtughanTask("VirtuGhan Engine", params, log_path, on_done=_on_done)
+        # compute -> finalize (mosaic, unzip); only the layer adds run on the UI thread
+        compute = _VirtughanTask("VirtuGhan Engine: compute", params, log_path)
+        self._current_task = _FinalizeTask("VirtuGhan Engine", compute, on_done=_on_done)
         QgsApplication.taskManager().addTask(self._current_task)
 
     def _set_running(self, running: bool):
@@ -1,6 +1,7 @@
 # virtughan_qgis/extractor/extractor_logic.py
-import os, uuid, io, traceback, sys
+import os, io, traceback, sys
 from contextlib import redirect_stdout, redirect_stderr
+from pathlib import Path
 
 from qgis.PyQt.QtCore import QDate, Qt
 from qgis.core import (
@@ -10,14 +11,8 @@ from qgis.core import (
     QgsProcessingException, QgsProject, QgsCoordinateReferenceSystem, QgsCoordinateTransform,
     QgsRasterLayer)
 
-from ..common.common_logic import default_band_list
-
-EXTRACTOR_IMPORT_ERROR = None
-try:
-    from virtughan.extract import ExtractProcessor
-except Exception as e:
-    ExtractProcessor = None
-    EXTRACTOR_IMPORT_ERROR = e
+from ..common.aoi import _get_xform, lonlat_bbox
+from ..common.common_logic import auto_workers, default_band_list, has_raster_signature, iter_rasters, run_dir
 
 VALID_BANDS = default_band_list()
 
@@ -29,18 +24,25 @@ def _coerce_to_qdate(val) -> QDate:
         return QDate()
     return QDate.fromString(s, Qt.ISODate)
 
+_WGS84 = QgsCoordinateReferenceSystem.fromEpsgId(4326)
+
 def _extent_to_wgs84_bbox(extent, src_crs):
-    wgs84 = QgsCoordinateReferenceSystem("EPSG:4326")
-    if not src_crs or not src_crs.isValid() or src_crs == wgs84:
+    auth = src_crs.authid() if src_crs else ""
+    if not src_crs or not src_crs.isValid() or auth.upper() == "EPSG:4326":
         bbox = [extent.xMinimum(), extent.yMinimum(), extent.xMaximum(), extent.yMaximum()]
     else:
-        xform = QgsCoordinateTransform(src_crs, wgs84, QgsProject.instance())
-        ll = xform.transform(extent.xMinimum(), extent.yMinimum())
-        ur = xform.transform(extent.xMaximum(), extent.yMaximum())
-        bbox = [min(ll.x(), ur.x()), min(ll.y(), ur.y()), max(ll.x(), ur.x()), max(ll.y(), ur.y())]
-    if (abs(bbox[0]) > 180 or abs(bbox[2]) > 180 or abs(bbox[1]) > 90 or abs(bbox[3]) > 90):
+        # cached per CRS pair; one densified C++ call instead of two corner transforms
+        xform = (_get_xform(auth, "EPSG:4326") if auth
+                 else QgsCoordinateTransform(src_crs, _WGS84, QgsProject.instance()))
+        r = xform.transformBoundingBox(extent, QgsCoordinateTransform.ForwardTransform, True)
+        bbox = [r.xMinimum(), r.yMinimum(), r.xMaximum(), r.yMaximum()]
+        if bbox[0] > bbox[2]:
+            # with 180° crossover handling, xmin > xmax means the AOI spans the antimeridian
+            raise QgsProcessingException(f"AOI crosses the antimeridian; split it at 180°: {bbox}")
+    checked = lonlat_bbox(bbox)
+    if checked is None:
         raise QgsProcessingException(f"Converted bbox is not valid lon/lat: {bbox}")
-    return bbox
+    return checked
 
 class _FeedbackTee(io.TextIOBase):
     def __init__(self, file_obj, feedback):
@@ -49,7 +51,7 @@ class _FeedbackTee(io.TextIOBase):
         self._buf = ""
     def write(self, s):
         if not s: return 0
-        self.file.write(s); self.file.flush()
+        self.file.write(s)
         self._buf += s
         while "\n" in self._buf:
             line, self._buf = self._buf.split("\n", 1)
@@ -100,8 +102,11 @@ class VirtuGhanExtractorAlgorithm(QgsProcessingAlgorithm):
     def createInstance(self): return VirtuGhanExtractorAlgorithm()
 
     def processAlgorithm(self, parameters, context, feedback):
-        if ExtractProcessor is None:
-            raise QgsProcessingException(f"ExtractProcessor import failed: {EXTRACTOR_IMPORT_ERROR}")
+        # imported here so loading the provider doesn't pull in numpy/rasterio
+        try:
+            from virtughan.extract import ExtractProcessor
+        except Exception as e:
+            raise QgsProcessingException(f"ExtractProcessor import failed: {e}")
 
         
         extent = self.parameterAsExtent(parameters, "EXTENT", context)
@@ -134,20 +139,20 @@ class VirtuGhanExtractorAlgorithm(QgsProcessingAlgorithm):
 
         workers = int(self.parameterAsDouble(parameters, "WORKERS", context))
         if workers <= 0:
-            import multiprocessing
-            workers = max(1, multiprocessing.cpu_count() - 1)
+            workers = auto_workers()
 
         out_base = (self.parameterAsString(parameters, "OUTPUT_FOLDER", context) or "").strip()
         if not out_base:
             out_base = getattr(context, "temporaryFolder", lambda: None)() or QgsProcessingUtils.tempFolder()
-        out_dir = os.path.join(out_base, f"virtughan_extractor_{uuid.uuid4().hex[:8]}")
-        os.makedirs(out_dir, exist_ok=True)
-        log_path = os.path.join(out_dir, "runtime.log")
+        out_dir = run_dir(out_base, "virtughan_extractor")
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+        log_path = str(Path(out_dir, "runtime.log"))
 
         feedback.pushInfo(f"Output: {out_dir}")
         feedback.pushInfo(f"Log file: {log_path}")
 
-        with open(log_path, "a", encoding="utf-8", buffering=1) as lf:
+        # Block-buffered; the tee no longer flushes per write, the file flushes on close
+        with open(log_path, "a", encoding="utf-8", buffering=1 << 17) as lf:
             tee = _FeedbackTee(lf, feedback)
             with redirect_stdout(tee), redirect_stderr(tee):
                 try:
@@ -173,16 +178,18 @@ class VirtuGhanExtractorAlgorithm(QgsProcessingAlgorithm):
 
         
         loaded = []
-        for root, _dirs, files in os.walk(out_dir):
-            for fn in files:
-                if fn.lower().endswith((".tif", ".tiff", ".vrt")):
-                    path = os.path.normpath(os.path.join(root, fn))
-                    lyr = QgsRasterLayer(path, os.path.splitext(fn)[0], "gdal")
-                    if lyr.isValid():
-                        QgsProject.instance().addMapLayer(lyr, addToLegend=True)
-                        loaded.append(path)
-                        feedback.pushInfo(f"Loaded raster: {path}")
-                    else:
-                        feedback.reportError(f"Failed to load raster: {path}")
+        layers = []
+        for entry in iter_rasters(out_dir):
+            path = os.path.normpath(entry.path)
+            lyr = (QgsRasterLayer(path, entry.name.rpartition(".")[0], "gdal")
+                   if has_raster_signature(path) else None)
+            if lyr is not None and lyr.isValid():
+                layers.append(lyr)
+                loaded.append(path)
+            else:
+                feedback.reportError(f"Failed to load raster: {path}")
+        if layers:
+            QgsProject.instance().addMapLayers(layers, addToLegend=True)
+            feedback.pushInfo("\n".join(f"Loaded raster: {path}" for path in loaded))
 
         return {"OUTPUT": out_dir, "RASTERS": loaded}
@@ -1,14 +1,12 @@
 # virtughan_qgis/extractor/extractor_widget.py
 import os
-import traceback
-import uuid
-from datetime import datetime
+from pathlib import Path
+from concurrent.futures import TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
 
 from qgis.core import (
     Qgis,
     QgsApplication,
-    QgsCoordinateReferenceSystem,
-    QgsCoordinateTransform,
     QgsGeometry,
     QgsMessageLog,
     QgsProcessingUtils,
@@ -21,18 +19,9 @@ from qgis.gui import QgsMapCanvas
 from qgis.PyQt import uic
 from qgis.PyQt.QtCore import QDate
 from qgis.PyQt.QtWidgets import (
-    QCheckBox,
-    QComboBox,
     QDockWidget,
     QFileDialog,
-    QLabel,
-    QLineEdit,
-    QListWidget,
     QMessageBox,
-    QPlainTextEdit,
-    QProgressBar,
-    QPushButton,
-    QSpinBox,
     QVBoxLayout,
     QWidget,
 )
@@ -43,7 +32,13 @@ from ..common.aoi import (
     AoiPolygonTool,
     rect_to_wgs84_bbox,
     geom_to_wgs84_bbox,
+    geom_to_wgs84_ring,
+    lonlat_bbox,
 )
+from ..common.common_logic import has_raster_signature, iter_rasters, missing_module, run_dir
+from ..common.log_queue import LogQueue
+from ..engine.engine_worker import get_pool, no_pool_error, shutdown_pool
+from .extractor_worker import run_extract
 
 COMMON_IMPORT_ERROR = None
 CommonParamsWidget = None
@@ -53,14 +48,6 @@ except Exception as _e:
     COMMON_IMPORT_ERROR = _e
     CommonParamsWidget = None
 
-EXTRACTOR_IMPORT_ERROR = None
-ExtractorBackend = None
-try:
-    from virtughan.extract import ExtractProcessor as ExtractorBackend
-except Exception as _e:
-    EXTRACTOR_IMPORT_ERROR = _e
-    ExtractorBackend = None
-
 UI_PATH = os.path.join(os.path.dirname(__file__), "extractor_form.ui")
 FORM_CLASS, _ = uic.loadUiType(UI_PATH)
 
@@ -68,12 +55,14 @@ FORM_CLASS, _ = uic.loadUiType(UI_PATH)
 def _log(widget, msg, level=Qgis.Info):
     QgsMessageLog.logMessage(str(msg), "VirtuGhan", level)
     try:
-        widget.logText.appendPlainText(str(msg))
+        # coalesced into one append per tick; errors show up immediately
+        widget._log_queue.append(str(msg), urgent=level == Qgis.Critical)
     except Exception:
         pass
 
 
 class _ExtractorTask(QgsTask):
+    """Runs ExtractProcessor.extract() in the extractor's own worker pool; cancel terminates the job."""
     def __init__(self, desc, params, log_path, on_done=None):
         super().__init__(desc, QgsTask.CanCancel)
         self.params = params
@@ -83,36 +72,31 @@ class _ExtractorTask(QgsTask):
 
     def run(self):
         try:
-            os.makedirs(self.params["output_dir"], exist_ok=True)
-            with open(self.log_path, "a", encoding="utf-8", buffering=1) as logf:
-                logf.write(
-                    f"[{datetime.now().isoformat(timespec='seconds')}] Starting Extractor\n"
-                )
-                logf.write(f"Params: {self.params}\n")
-                extr = ExtractorBackend(
-                    bbox=self.params["bbox"],
-                    start_date=self.params["start_date"],
-                    end_date=self.params["end_date"],
-                    cloud_cover=self.params["cloud_cover"],
-                    bands_list=self.params["bands_list"],
-                    output_dir=self.params["output_dir"],
-                    log_file=logf,
-                    workers=self.params["workers"],
-                    zip_output=self.params["zip_output"],
-                    smart_filter=self.params["smart_filter"],
-                )
-                extr.extract()
-                logf.write("Extractor finished.\n")
-            return True
-        except Exception as e:
+            pool = get_pool(name="extractor")
+            if pool is None:
+                raise no_pool_error(self.log_path)
+            fut = pool.submit(run_extract, self.params, self.log_path)
+            while True:
+                try:
+                    return fut.result(timeout=0.5)
+                except FuturesTimeout:
+                    if self.isCanceled():
+                        shutdown_pool(kill=True, name="extractor")
+                        self.exc = RuntimeError("Canceled by user.")
+                        return False
+        except BrokenProcessPool as e:
+            shutdown_pool(name="extractor")
             self.exc = e
             try:
                 with open(self.log_path, "a", encoding="utf-8", buffering=1) as logf:
-                    logf.write("[exception]\n")
-                    logf.write(traceback.format_exc())
+                    logf.write(f"[exception] extractor worker process died: {e}\n")
             except Exception:
                 pass
             return False
+        except Exception as e:
+            # run_extract (or no_pool_error) already wrote the error to runtime.log
+            self.exc = e
+            return False
 
     def finished(self, ok):
         if self.on_done:
@@ -133,30 +117,33 @@ class ExtractorDockWidget(QDockWidget):
         self._form_owner.setupUi(self.ui_root)
         self.setWidget(self.ui_root)
 
-        f = self.ui_root.findChild
-        self.progressBar = f(QProgressBar, "progressBar")
-        self.runButton = f(QPushButton, "runButton")
-        self.resetButton = f(QPushButton, "resetButton")
-        self.helpButton = f(QPushButton, "helpButton")
-        self.logText = f(QPlainTextEdit, "logText")
-        self.commonHost = f(QWidget, "commonParamsContainer")
-
-        self.aoiModeCombo = f(QComboBox, "aoiModeCombo")
-        self.aoiUseCanvasButton = f(QPushButton, "aoiUseCanvasButton")
-        self.aoiStartDrawButton = f(QPushButton, "aoiStartDrawButton")
-        self.aoiClearButton = f(QPushButton, "aoiClearButton")
-        self.aoiPreviewLabel = f(QLabel, "aoiPreviewLabel")
-
-        self.workersSpin = f(QSpinBox, "workersSpin")
-        self.outputPathEdit = f(QLineEdit, "outputPathEdit")
-        self.outputBrowseButton = f(QPushButton, "outputBrowseButton")
-
-        self.bandsListWidget = f(QListWidget, "bandsListWidget")
-        self.zipOutputCheck = f(QCheckBox, "zipOutputCheck")
-        self.smartFilterCheck = f(QCheckBox, "smartFilterCheck")
+        # setupUi binds every named widget on the form owner; no tree walk needed
+        ui = self._form_owner
+        f = lambda name: getattr(ui, name, None)
+        self.progressBar = f("progressBar")
+        self.runButton = f("runButton")
+        self.resetButton = f("resetButton")
+        self.helpButton = f("helpButton")
+        self.logText = f("logText")
+        self._log_queue = LogQueue(self.logText) if self.logText is not None else None
+        self.commonHost = f("commonParamsContainer")
+
+        self.aoiModeCombo = f("aoiModeCombo")
+        self.aoiUseCanvasButton = f("aoiUseCanvasButton")
+        self.aoiStartDrawButton = f("aoiStartDrawButton")
+        self.aoiClearButton = f("aoiClearButton")
+        self.aoiPreviewLabel = f("aoiPreviewLabel")
+
+        self.workersSpin = f("workersSpin")
+        self.outputPathEdit = f("outputPathEdit")
+        self.outputBrowseButton = f("outputBrowseButton")
+
+        self.bandsListWidget = f("bandsListWidget")
+        self.zipOutputCheck = f("zipOutputCheck")
+        self.smartFilterCheck = f("smartFilterCheck")
 
         # AOI state
-        self._aoi_bbox = None               # [lonmin, latmin, lonmax, latmax] (WGS84)
+        self._aoi_bbox = None               # (lonmin, latmin, lonmax, latmax) (WGS84), hashable
         self._aoi_polygon_wgs84 = None      # optional [[lon,lat], ...]
         self._aoi = AoiManager(self.iface)  # shared AOI memory layer manager
         self._prev_tool = None
@@ -213,7 +200,7 @@ class ExtractorDockWidget(QDockWidget):
                 "hintLabel")
 
         for name in names:
-            child = w.findChild(QWidget, name)
+            child = getattr(w, name, None)
             if child:
                 child.hide()
 
@@ -310,33 +297,21 @@ class ExtractorDockWidget(QDockWidget):
                 return
 
             self._aoi.replace_geometry(geom_map)
-            self._aoi_bbox = geom_to_wgs84_bbox(geom_map, QgsProject.instance())
-            self._aoi_polygon_wgs84 = self._compute_polygon_wgs84_coords(geom_map)
+            coords = geom_to_wgs84_ring(geom_map, QgsProject.instance())
+            self._aoi_polygon_wgs84 = coords
+            if coords:
+                # bbox straight from the already-transformed ring; no second geometry transform
+                lons = [c[0] for c in coords]
+                lats = [c[1] for c in coords]
+                self._aoi_bbox = (min(lons), min(lats), max(lons), max(lats))
+            else:
+                self._aoi_bbox = geom_to_wgs84_bbox(geom_map, QgsProject.instance())
             self._update_aoi_preview()
 
         tool = AoiPolygonTool(canvas, _done)
         canvas.setMapTool(tool)
         _log(self, "Draw polygon: left-click to add, right-click/Enter/double-click to finish, Esc to cancel.")
 
-    def _compute_polygon_wgs84_coords(self, geom_map: QgsGeometry):
-        """Return outer ring coords as [[lon, lat], ...] in WGS84 for the given map-CRS geometry."""
-        try:
-            g = QgsGeometry(geom_map)  # clone
-            g.transform(QgsCoordinateTransform(
-                QgsProject.instance().crs(),
-                QgsCoordinateReferenceSystem("EPSG:4326"),
-                QgsProject.instance()
-            ))
-            poly = g.asPolygon()
-            if not poly:
-                mp = g.asMultiPolygon()
-                ring = mp[0][0] if mp else []
-            else:
-                ring = poly[0]
-            return [[float(p.x()), float(p.y())] for p in ring]
-        except Exception:
-            return None
-
     def _clear_aoi(self):
         self._aoi_bbox = None
         self._aoi_polygon_wgs84 = None
@@ -381,20 +356,19 @@ class ExtractorDockWidget(QDockWidget):
                 pass
 
     def _collect_params(self):
-        if ExtractorBackend is None:
-            raise RuntimeError(
-                f"Extractor backend import failed: {EXTRACTOR_IMPORT_ERROR}"
-            )
+        # virtughan itself is only imported in the worker process
+        err = missing_module("virtughan")
+        if err:
+            raise RuntimeError(f"Extractor backend import failed: {err}")
         if not self._aoi_bbox:
             raise RuntimeError("Please set AOI before running.")
 
-        # Strict WGS84 bbox validation
         b = self._aoi_bbox
         try:
-            x1, y1, x2, y2 = map(float, b)
+            bbox = lonlat_bbox(tuple(map(float, b)))
         except Exception:
             raise RuntimeError(f"AOI bbox must be four numbers: {b}")
-        if not (-180.0 <= x1 < x2 <= 180.0 and -90.0 <= y1 < y2 <= 90.0):
+        if bbox is None:
             raise RuntimeError(f"Invalid AOI bbox (WGS84): {b}")
 
         p = self._get_common_params()
@@ -417,10 +391,10 @@ class ExtractorDockWidget(QDockWidget):
         out_base = (
             self.outputPathEdit.text() or ""
         ).strip() or QgsProcessingUtils.tempFolder()
-        out_dir = os.path.join(out_base, f"virtughan_extractor_{uuid.uuid4().hex[:8]}")
+        out_dir = run_dir(out_base, "virtughan_extractor")
 
         params = dict(
-            bbox=self._aoi_bbox,
+            bbox=bbox,
             start_date=p["start_date"],
             end_date=p["end_date"],
             cloud_cover=int(p["cloud_cover"]),
@@ -429,6 +403,7 @@ class ExtractorDockWidget(QDockWidget):
             smart_filter=smart,
             workers=workers,
             output_dir=out_dir,
+            log_path=str(Path(out_dir, "runtime.log")),
         )
 
         if self._aoi_polygon_wgs84:
@@ -445,14 +420,14 @@ class ExtractorDockWidget(QDockWidget):
 
         out_dir = params["output_dir"]
         try:
-            os.makedirs(out_dir, exist_ok=True)
+            Path(out_dir).mkdir(parents=True, exist_ok=True)
         except Exception as e:
             QMessageBox.critical(
                 self, "VirtuGhan", f"Cannot create output folder:\n{out_dir}\n\n{e}"
             )
             return
 
-        log_path = os.path.join(out_dir, "runtime.log")
+        log_path = params["log_path"]
         _log(self, f"Output: {out_dir}")
         _log(self, f"Log file: {log_path}")
         try:
@@ -469,19 +444,19 @@ class ExtractorDockWidget(QDockWidget):
                     f"Extractor failed:\n{exc}\n\nSee runtime.log for details.",
                 )
             else:
-                added = 0
-                for root, _dirs, files in os.walk(out_dir):
-                    for fn in files:
-                        if fn.lower().endswith((".tif", ".tiff", ".vrt")):
-                            path = os.path.join(root, fn)
-                            lyr = QgsRasterLayer(path, os.path.splitext(fn)[0], "gdal")
-                            if lyr.isValid():
-                                QgsProject.instance().addMapLayer(lyr)
-                                _log(self, f"Loaded raster: {path}")
-                                added += 1
-                            else:
-                                _log(self, f"Failed to load raster: {path}", Qgis.Warning)
-                if added == 0:
+                layers = []
+                for entry in iter_rasters(out_dir):
+                    lyr = (QgsRasterLayer(entry.path, entry.name.rpartition(".")[0], "gdal")
+                           if has_raster_signature(entry.path) else None)
+                    if lyr is not None and lyr.isValid():
+                        layers.append(lyr)
+                    else:
+                        _log(self, f"Failed to load raster: {entry.path}", Qgis.Warning)
+                if layers:
+                    # one layersAdded / legend refresh for the whole batch
+                    QgsProject.instance().addMapLayers(layers)
+                    _log(self, "\n".join(f"Loaded raster: {l.source()}" for l in layers))
+                else:
                     _log(self, "No raster files found to load.")
                 QMessageBox.information(
                     self, "VirtuGhan", f"Extractor finished.\nOutput: {out_dir}"
@@ -7,7 +7,8 @@ from qgis.PyQt.QtCore import Qt
 from qgis.core import QgsApplication
 from .common.hub_dialog import VirtughanHubDialog
 
-from .common.map_setup import setup_default_map
+from .common.map_setup import setup_default_map, unhook_project_signals
+from .engine.engine_worker import shutdown_pool
 
 
 PLUGIN_DIR = os.path.dirname(__file__)
@@ -136,6 +137,9 @@ class VirtuGhanPlugin:
                 pass
             self.provider = None 
 
+        unhook_project_signals()
+        shutdown_pool(kill=True)
+
     def _show_hub(self, start_page: str):
         # Optional: add basemap once per click, but skip if already present
         try: